@@ -1,11 +1,20 @@
 import os
 import asyncio
+import contextlib
 import discord
 from discord.ext import commands
 from dotenv import load_dotenv
-import asyncpg
 import uvicorn
 from utils.misc import get_system_info
+from utils.guild_config import GuildConfigCache
+from utils.database import create_pool
+from utils.votes import vote_cache
+from utils.vote_webhook import start_vote_webhook
+from utils.ledger import ledger
+from utils.counters import counters
+from utils.mining_depth import mining_depths
+from utils.catalog import catalog
+from utils.effects import active_effects
 from datetime import datetime, timezone
 
 import logging
@@ -24,20 +33,12 @@ intents = discord.Intents.all()
 async def get_prefix(bot, message):
     if not message.guild:
         return "."
-    guild_id = message.guild.id
-    async with bot.db.acquire() as conn:
-        prefix = await conn.fetchval(
-            "SELECT prefix FROM guild_config WHERE guild_id = $1", guild_id
-        )
-    return prefix if prefix else "."
+    return bot.guild_config.get_prefix(message.guild.id)
 
 bot = commands.Bot(command_prefix=get_prefix, intents=intents, help_command=None)
 bot.start_time = datetime.now(timezone.utc)
+bot.guild_config = GuildConfigCache()
 
-work_cache = {}
-gambling_cache = {}
-work_failures_cache = {}
-mining_events_cache = {}
 async def add_guild_to_db(guild_id):
     """Adds a guild to the database if it doesn't exist."""
     try:
@@ -50,6 +51,7 @@ async def add_guild_to_db(guild_id):
                 """,
                 guild_id,
             )
+        bot.guild_config.add_guild(guild_id)
         logger.info(f"Added guild {guild_id} to database.")
     except Exception as e:
         logger.error(f"Error adding guild {guild_id} to database: {e}")
@@ -65,6 +67,7 @@ async def remove_guild_from_db(guild_id):
                 """,
                 guild_id,
             )
+        bot.guild_config.remove_guild(guild_id)
         logger.info(f"Removed guild {guild_id} from database.")
     except Exception as e:
         logger.error(f"Error removing guild {guild_id} from database: {e}")
@@ -82,6 +85,7 @@ async def set_prefix(guild_id, new_prefix):
         await conn.execute(
             "UPDATE guild_config SET prefix = $1 WHERE guild_id = $2", new_prefix, guild_id
         )
+    bot.guild_config.set_prefix(guild_id, new_prefix)
 
 
 
@@ -100,39 +104,16 @@ async def get_total_connections():
         """)
     return total_connections
 
-def cleanup_activity_caches():
-    """Clean up old entries from activity tracking caches"""
-    from datetime import datetime, timedelta
-    
-    now = datetime.now()
-    five_mins_ago = now - timedelta(minutes=5)
-    one_day_ago = now - timedelta(days=1)
-    
-    for user_id in list(work_cache.keys()):
-        work_cache[user_id] = [ts for ts in work_cache[user_id] if ts > five_mins_ago]
-        if not work_cache[user_id]:
-            del work_cache[user_id]
-    
-    for key in list(gambling_cache.keys()):
-        if '_' in key:
-            try:
-                date_str = key.split('_')[1]
-                cache_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-                if cache_date < one_day_ago.date():
-                    del gambling_cache[key]
-            except:
-                pass
-    
-    today = now.date()
-    for user_id in list(work_failures_cache.keys()):
-        if 'last_reset' in work_failures_cache[user_id]:
-            last_reset = work_failures_cache[user_id]['last_reset']
-            if last_reset < today:
-                work_failures_cache[user_id] = {'count': 0, 'last_reset': today}
-
 async def create_db_pool():
-    bot.db = await asyncpg.create_pool(dsn=db_url, max_size=2, min_size=1)
-    
+    bot.db = await create_pool(db_url)
+    await bot.guild_config.load(bot.db)
+    await active_effects.load(bot.db)
+    await catalog.ensure_loaded(bot.db)
+    ledger.start(bot.db)
+    await counters.load(bot.db)
+    counters.start(bot.db)
+    mining_depths.start(bot.db)
+
     from utils.translation import init_translation
     init_translation(bot)
 
@@ -168,13 +149,6 @@ async def load_cogs():
 
     print(f"Cogs loaded: {loaded_cogs} loaded, {failed_cogs} failed")
 
-async def periodic_cache_cleanup():
-    """Run cache cleanup every hour"""
-    while True:
-        await asyncio.sleep(3600)
-        cleanup_activity_caches()
-        logger.info("Cache cleanup completed")
-
 @bot.event
 async def on_ready():
     try:
@@ -185,9 +159,7 @@ async def on_ready():
 
         for guild in bot.guilds:
             await add_guild_to_db(guild.id)
-        
-        asyncio.create_task(periodic_cache_cleanup())
-        logger.info("Started periodic cache cleanup task")
+
 
     except Exception as e:
         logger.error(f"[ERR] Sync failed: {e}")
@@ -205,8 +177,20 @@ async def main():
     await load_cogs()
     logger.info("Cogs loaded.")
     print(" Cogs loaded.")
-   
-    await bot.start(token)
+    # keep a reference so the server task is not garbage-collected
+    vote_webhook = start_vote_webhook(vote_cache)
+
+    try:
+        await bot.start(token)
+    finally:
+        await ledger.stop()
+        await counters.stop()
+        await mining_depths.stop()
+        if vote_webhook is not None:
+            vote_webhook.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await vote_webhook
+        await vote_cache.close()
 
 if __name__ == "__main__":
     get_system_info()
@@ -4,6 +4,9 @@ from discord import app_commands
 import logging
 from rapidfuzz import process, fuzz
 from utils.db_helpers import ensure_guild_cfg
+from utils.cache import cache_stats
+from utils.catalog import catalog
+from utils.render_cache import render_cache
 LOCALE_MAP = {
     "af": "Afrikaans - Afrikaans",
     "sq": "Albanian - Shqip",
@@ -213,12 +216,14 @@ class Admin(commands.GroupCog, name="admin"):
             return
 
         try:
+            await ensure_guild_cfg(self.bot.db, ctx.guild.id)
             async with self.bot.db.acquire() as conn:
                 await conn.execute(
                     "UPDATE guild_config SET prefix = $1 WHERE guild_id = $2",
                     prefix,
                     ctx.guild.id
                 )
+            self.bot.guild_config.set_prefix(ctx.guild.id, prefix)
 
             embed = discord.Embed(
                 title="Prefix Updated",
@@ -236,6 +241,60 @@ class Admin(commands.GroupCog, name="admin"):
             
             await ctx.reply(embed=embed)
 
+    @commands.command(name="pool-stats")
+    @commands.is_owner()
+    async def pool_stats(self, ctx: commands.Context):
+        """Show live connection pool usage."""
+        if not hasattr(self.bot.db, "stats"):
+            await ctx.reply("Pool statistics are not available.")
+            return
+
+        stats = self.bot.db.stats()
+        embed = discord.Embed(title="Database Pool", color=discord.Color.blue())
+        embed.add_field(name="Connections", value=f"{stats['in_use']} in use / {stats['idle']} idle\n(size {stats['size']}, min {stats['min_size']}, max {stats['max_size']})", inline=False)
+        embed.add_field(name="Queue", value=f"{stats['waiting']} waiting", inline=True)
+        embed.add_field(name="Acquires", value=f"{stats['acquired_total']} total, {stats['timeouts']} timed out, {stats['nested_acquires']} nested", inline=True)
+        embed.add_field(name="Acquire wait", value=f"avg {stats['wait_avg_ms']:.1f} ms, max {stats['wait_max_ms']:.1f} ms", inline=False)
+        await ctx.reply(embed=embed)
+
+    @commands.command(name="catalog-reload")
+    @commands.is_owner()
+    async def catalog_reload(self, ctx: commands.Context):
+        """Reload items, effects, weapons, recipes and farm data, and re-render static pages."""
+        try:
+            await catalog.reload(self.bot.db)
+        except Exception as e:
+            logging.exception("Catalog reload failed")
+            await ctx.reply(f"Catalog reload failed: {e}")
+            return
+        # static pages (recipes, guide) are rebuilt now rather than on their next use
+        render_cache.invalidate()
+        render_cache.warm()
+        await ctx.reply(f"Catalog reloaded (v{catalog.version}): {len(catalog)} items, {len(catalog.recipes())} recipes.")
+
+    @commands.command(name="cache-stats")
+    @commands.is_owner()
+    async def cache_stats(self, ctx: commands.Context):
+        """Show size and hit rate of every registered in-memory cache."""
+        stats = cache_stats()
+        if not stats:
+            await ctx.reply("No caches registered.")
+            return
+
+        embed = discord.Embed(title="Caches", color=discord.Color.blue())
+        for entry in stats[:25]:
+            ttl = f"{entry['ttl']:g}s" if entry["ttl"] is not None else "none"
+            embed.add_field(
+                name=entry["name"],
+                value=(
+                    f"{entry['size']}/{entry['maxsize']} entries, ttl {ttl}\n"
+                    f"{entry['hits']} hits / {entry['misses']} misses ({entry['hit_rate']:.0%})\n"
+                    f"{entry['evictions']} evicted, {entry['expirations']} expired"
+                ),
+                inline=True
+            )
+        await ctx.reply(embed=embed)
+
     @commands.hybrid_command(name="allow-rob", description="Toggles robbing in your server")
     @commands.has_permissions(administrator=True)
     async def set_rob(self, ctx: commands.Context):
@@ -160,13 +160,13 @@ class Blackjack(commands.Cog):
         cap = await get_bet_cap(ctx.author.id)
         if( bet > cap):
             return await ctx.send(embed=discord.Embed(title="Error: Bet Limit Exceeded", description=f"Maximum bet: {cap} coins\nNote: Upvote bot to increase limit to 500k coins", color=discord.Color.red()))
+        await ensure_user(self.bot.db, ctx.author.id)
         async with self.bot.db.acquire() as conn:
-            await ensure_user(self.bot.db, ctx.author.id)
             row = await conn.fetchrow("SELECT coins FROM users WHERE id = $1", ctx.author.id)
             if not row or row["coins"] < bet:
                 return await ctx.reply(f"Error: Insufficient funds\nRequired: {bet} coins\nAvailable: {row['coins'] if row else 0} coins", ephemeral=True)
 
-            await log_spending(self.bot.db, bet)
+            await log_spending(conn, bet)
             await conn.execute(
                 "UPDATE users SET coins = coins - $1 WHERE id = $2",
                 bet, ctx.author.id
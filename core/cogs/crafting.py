@@ -1,7 +1,10 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.db_helpers import ensure_user, ensure_inventory
+from utils.db_helpers import ensure_user
+from utils.catalog import catalog, normalize_name
+from utils.crafting import CraftPlan, apply_plan, load_inventory, max_craftable
+from utils.render_cache import render_cache
 import math
 from utils.parser import parse_amount, AmountParseError  # Added for flexible amount parsing
 
@@ -83,9 +86,93 @@ class RecipeSelectView(discord.ui.View):
         await self.cog.perform_craft(interaction, self.user_id, selected_recipe, self.amount)
         self.stop()
 
+class CraftPlanView(discord.ui.View):
+    def __init__(self, cog, user_id, plan):
+        super().__init__(timeout=60)
+        self.cog = cog
+        self.user_id = user_id
+        self.plan = plan
+
+    @discord.ui.button(label="Craft all steps", style=discord.ButtonStyle.primary)
+    async def confirm(self, interaction: discord.Interaction, button: discord.ui.Button):
+        if interaction.user.id != self.user_id:
+            return await interaction.response.send_message("This is not your crafting menu.", ephemeral=True)
+        await interaction.response.defer()
+        self.stop()
+
+        if not await apply_plan(self.cog.bot.db, self.user_id, self.plan):
+            embed = discord.Embed(
+                title="Error. Inventory changed",
+                description="Materials changed since the plan was made. Nothing was consumed. Run `/craft-plan` again.",
+                color=discord.Color.red()
+            )
+            return await interaction.followup.send(embed=embed, ephemeral=True)
+
+        made = [f"{d}x {catalog.item_name(i)}" for i, d in self.plan.net.items() if d > 0]
+        embed = discord.Embed(
+            title="Fabrication complete",
+            description=f"{len(self.plan.steps)} steps executed.",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Output", value="\n".join(made)[:1024] or "None", inline=False)
+        embed.add_field(name="Status", value="Operational", inline=False)
+        await interaction.followup.send(embed=embed)
+
+def render_recipe_pages() -> list[discord.Embed]:
+    """Build the /recipes pages from the catalog (6 items per page)."""
+    craftable_items = catalog.craftable_items()
+
+    all_recipe_data = []
+    for item in craftable_items:
+        recipe_list = []
+        for recipe in catalog.recipes_for(item['id']):
+            req_text = []
+            for req in recipe['requirements']:
+                consumed = "" if req['is_consumed'] else " (reusable)"
+                req_text.append(f"{req['quantity']}x {catalog.item_name(req['item_id'])}{consumed}")
+
+            recipe_list.append(f"**{recipe['name']}:** {', '.join(req_text)}")
+
+        icon = item['icon'] or "📦"
+        all_recipe_data.append({
+            'name': f"{icon} {item['name']}",
+            'value': "\n".join(recipe_list)
+        })
+
+    items_per_page = 6
+    total_pages = math.ceil(len(all_recipe_data) / items_per_page)
+    pages = []
+
+    for page_num in range(total_pages):
+        embed = discord.Embed(
+            title="Recipe Database",
+            description="Available fabrication recipes. Use `/craft <item_name>` to initiate fabrication.",
+            color=discord.Color.blue()
+        )
+
+        start_idx = page_num * items_per_page
+        end_idx = min(start_idx + items_per_page, len(all_recipe_data))
+
+        for recipe_data in all_recipe_data[start_idx:end_idx]:
+            embed.add_field(
+                name=recipe_data['name'],
+                value=recipe_data['value'],
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {page_num + 1}/{total_pages} | {len(craftable_items)} craftable items")
+        pages.append(embed)
+
+    return pages
+
+
 class Crafting(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+
+    async def cog_load(self):
+        render_cache.register("recipes", render_recipe_pages, version=lambda: catalog.version)
+        render_cache.warm("recipes")
     
     # -------------------- AUTOCOMPLETE --------------------
     async def item_autocomplete(
@@ -93,16 +180,12 @@ class Crafting(commands.Cog):
     ) -> list[app_commands.Choice[str]]:
         """Autocomplete for craftable items"""
         try:
-            async with self.bot.db.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT DISTINCT i.name
-                    FROM recipe_results rr
-                    JOIN items i ON rr.item_id = i.id
-                    WHERE i.name ILIKE $1
-                    ORDER BY i.name
-                    LIMIT 25
-                """, f"%{current}%")
-            return [app_commands.Choice(name=row["name"], value=row["name"]) for row in rows]
+            needle = normalize_name(current)
+            names = [
+                item["name"] for item in catalog.craftable_items()
+                if needle in normalize_name(item["name"])
+            ][:25]
+            return [app_commands.Choice(name=name, value=name) for name in names]
         except Exception as e:
             print(f"[ERROR] Item autocomplete failed: {e}")
             return []
@@ -116,268 +199,198 @@ class Crafting(commands.Cog):
         
         user_id = ctx.author.id
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
         
-        async with self.bot.db.acquire() as conn:
-            # 1. Find all recipes that produce this item
-            recipes = await conn.fetch("""
-                SELECT DISTINCT r.id as recipe_id, r.name as recipe_name, r.description
-                FROM recipes r
-                JOIN recipe_results rr ON r.id = rr.recipe_id
-                JOIN items i ON rr.item_id = i.id
-                WHERE LOWER(i.name) = LOWER($1)
-            """, item)
-            
-            if not recipes:
-                embed = discord.Embed(
-                    title="Error. Item not craftable",
-                    description=f"No recipes found for '{item}'.\nUse `/recipes` to view available recipes.",
-                    color=discord.Color.red()
-                )
-                return await ctx.send(embed=embed)
-            
-            # 2. Get requirements for each recipe
-            recipes_data = []
-            for recipe in recipes:
-                requirements = await conn.fetch("""
-                    SELECT i.name, i.id as item_id, rri.quantity as qty, rri.is_consumed
-                    FROM recipe_require_items rri
-                    JOIN items i ON rri.item_id = i.id
-                    WHERE rri.recipe_id = $1
-                """, recipe['recipe_id'])
-                
-                recipes_data.append({
-                    'recipe_id': recipe['recipe_id'],
-                    'recipe_name': recipe['recipe_name'],
-                    'description': recipe['description'],
-                    'requirements': [dict(r) for r in requirements]
-                })
-            
-            # 3. If only one recipe, craft directly
-            if len(recipes_data) == 1:
-                # For crafting, we'll parse amount as a simple integer or 'max'
-                # 'max' will be calculated based on available materials in perform_craft
-                await self.perform_craft(ctx, user_id, recipes_data[0], amount)
-            else:
-                # 4. Multiple recipes - show dropdown
-                embed = discord.Embed(
-                    title="Recipe Selection",
-                    description=f"Multiple recipes found for {item}. Select one below.",
-                    color=discord.Color.blue()
-                )
-                view = RecipeSelectView(self, user_id, item, recipes_data, amount)
-                await ctx.send(embed=embed, view=view)
+        # 1. Find all recipes that produce this item
+        target = catalog.item_by_name(item)
+        recipes = catalog.recipes_for(target["id"]) if target else []
+
+        if not recipes:
+            embed = discord.Embed(
+                title="Error. Item not craftable",
+                description=f"No recipes found for '{item}'.\nUse `/recipes` to view available recipes.",
+                color=discord.Color.red()
+            )
+            return await ctx.send(embed=embed)
+
+        # 2. Requirements for each recipe come from the catalog
+        recipes_data = []
+        for recipe in recipes:
+            recipes_data.append({
+                'recipe_id': recipe['id'],
+                'recipe_name': recipe['name'],
+                'description': recipe['description'],
+                'requirements': [
+                    {
+                        'name': catalog.item_name(req['item_id']),
+                        'item_id': req['item_id'],
+                        'qty': req['quantity'],
+                        'is_consumed': req['is_consumed'],
+                    }
+                    for req in recipe['requirements']
+                ]
+            })
+
+        # 3. If only one recipe, craft directly
+        if len(recipes_data) == 1:
+            # For crafting, we'll parse amount as a simple integer or 'max'
+            # 'max' will be calculated based on available materials in perform_craft
+            await self.perform_craft(ctx, user_id, recipes_data[0], amount)
+        else:
+            # 4. Multiple recipes - show dropdown
+            embed = discord.Embed(
+                title="Recipe Selection",
+                description=f"Multiple recipes found for {item}. Select one below.",
+                color=discord.Color.blue()
+            )
+            view = RecipeSelectView(self, user_id, item, recipes_data, amount)
+            await ctx.send(embed=embed, view=view)
     
+    async def send_result(self, ctx_or_interaction, embed, ephemeral=False):
+        if hasattr(ctx_or_interaction, 'followup'):
+            return await ctx_or_interaction.followup.send(embed=embed, ephemeral=ephemeral)
+        return await ctx_or_interaction.send(embed=embed)
+
     async def perform_craft(self, ctx_or_interaction, user_id, recipe_data, amount):
         """Actually perform the crafting"""
-        async with self.bot.db.acquire() as conn:
-            recipe_id = recipe_data['recipe_id']
-            requirements = recipe_data['requirements']
-            
-            # Calculate max craftable if amount is 'max' or similar
-            if amount.lower() in ['max', 'all']:
-                # Calculate maximum craftable based on available materials
-                max_craftable = float('inf')
-                for req in requirements:
-                    if req['is_consumed']:  # Only check consumed items
-                        user_qty = await conn.fetchval("""
-                            SELECT quantity FROM inventory
-                            WHERE id = $1 AND item_id = $2
-                        """, user_id, req['item_id'])
-                        if not user_qty:
-                            max_craftable = 0
-                            break
-                        max_craftable = min(max_craftable, user_qty // req['qty'])
-                
-                if max_craftable == float('inf') or max_craftable <= 0:
-                    max_craftable = 0
-                
-                parsed_amount = int(max_craftable)
-            else:
-                # Parse as integer
-                try:
-                    parsed_amount = int(amount)
-                except ValueError:
-                    embed = discord.Embed(
-                        title="Error. Invalid amount",
-                        description="Amount must be a number or 'max'.",
-                        color=discord.Color.red()
-                    )
-                    if hasattr(ctx_or_interaction, 'followup'):
-                        return await ctx_or_interaction.followup.send(embed=embed, ephemeral=True)
-                    else:
-                        return await ctx_or_interaction.send(embed=embed)
-            
-            if parsed_amount < 1:
+        recipe = catalog.recipe(recipe_data['recipe_id'])
+        if recipe is None:
+            embed = discord.Embed(title="Error. Recipe not found", description="Recipe data changed. Try again.", color=discord.Color.red())
+            return await self.send_result(ctx_or_interaction, embed, ephemeral=True)
+
+        # One inventory snapshot serves both 'max' and the requirement check
+        inventory = await load_inventory(self.bot.db, user_id)
+
+        if amount.lower() in ['max', 'all']:
+            parsed_amount = max_craftable(recipe, inventory)
+        else:
+            try:
+                parsed_amount = int(amount)
+            except ValueError:
                 embed = discord.Embed(
                     title="Error. Invalid amount",
-                    description="Amount must be at least 1.",
-                    color=discord.Color.red()
-                )
-                if hasattr(ctx_or_interaction, 'followup'):
-                    return await ctx_or_interaction.followup.send(embed=embed, ephemeral=True)
-                else:
-                    return await ctx_or_interaction.send(embed=embed)
-            
-            # Check if user has all required items (use parsed_amount)
-            missing = []
-            for req in requirements:
-                user_qty = await conn.fetchval("""
-                    SELECT quantity FROM inventory
-                    WHERE id = $1 AND item_id = $2
-                """, user_id, req['item_id'])
-                
-                needed = req['qty'] * parsed_amount
-                if not user_qty or user_qty < needed:
-                    missing.append(f"{needed}x {req['name']} (available {user_qty or 0})")
-            
-            if missing:
-                embed = discord.Embed(
-                    title="Error. Insufficient resources",
-                    description="Required materials not available.\n\n" + "\n".join(missing),
+                    description="Amount must be a number or 'max'.",
                     color=discord.Color.red()
                 )
-                embed.add_field(name="Status", value="Fabrication denied", inline=False)
-                
-                if hasattr(ctx_or_interaction, 'followup'):
-                    return await ctx_or_interaction.followup.send(embed=embed, ephemeral=True)
-                else:
-                    return await ctx_or_interaction.send(embed=embed)
-            
-            # Consume materials (except non-consumed like furnace) - use parsed_amount
-            for req in requirements:
-                if req['is_consumed']:
-                    needed = req['qty'] * parsed_amount
-                    await conn.execute("""
-                        UPDATE inventory 
-                        SET quantity = quantity - $1
-                        WHERE id = $2 AND item_id = $3
-                    """, needed, user_id, req['item_id'])
-                    
-                    # Remove if quantity reaches 0
-                    await conn.execute("""
-                        DELETE FROM inventory
-                        WHERE id = $1 AND item_id = $2 AND quantity <= 0
-                    """, user_id, req['item_id'])
-            
-            # Give result items (use parsed_amount)
-            results = await conn.fetch("""
-                SELECT item_id, quantity
-                FROM recipe_results
-                WHERE recipe_id = $1
-            """, recipe_id)
-            
-            result_text = []
-            for result in results:
-                result_qty = result['quantity'] * parsed_amount
-                
-                # Add to inventory
-                await conn.execute("""
-                    INSERT INTO inventory (id, item_id, quantity)
-                    VALUES ($1, $2, $3)
-                    ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $3
-                """, user_id, result['item_id'], result_qty)
-                
-                item_name = await conn.fetchval("SELECT name FROM items WHERE id = $1", result['item_id'])
-                result_text.append(f"{result_qty}x {item_name}")
-            
-            # Success message (use parsed_amount)
+                return await self.send_result(ctx_or_interaction, embed, ephemeral=True)
+
+        if parsed_amount < 1:
             embed = discord.Embed(
-                title="Fabrication complete",
-                description=f"Recipe {recipe_data['recipe_name']}. Quantity {parsed_amount}.",
-                color=discord.Color.blue()
+                title="Error. Invalid amount",
+                description="Amount must be at least 1.",
+                color=discord.Color.red()
             )
-            embed.add_field(name="Output", value="\n".join(result_text), inline=False)
-            embed.add_field(name="Status", value="Operational", inline=False)
-            
-            if hasattr(ctx_or_interaction, 'followup'):
-                await ctx_or_interaction.followup.send(embed=embed)
-            else:
-                await ctx_or_interaction.send(embed=embed)
-    
+            return await self.send_result(ctx_or_interaction, embed, ephemeral=True)
+
+        # Check if user has all required items (use parsed_amount)
+        missing = []
+        for req in recipe['requirements']:
+            available = inventory.get(req['item_id'], 0)
+            needed = req['quantity'] * parsed_amount
+            if available < needed:
+                missing.append(f"{needed}x {catalog.item_name(req['item_id'])} (available {available})")
+
+        if missing:
+            embed = discord.Embed(
+                title="Error. Insufficient resources",
+                description="Required materials not available.\n\n" + "\n".join(missing),
+                color=discord.Color.red()
+            )
+            embed.add_field(name="Status", value="Fabrication denied", inline=False)
+            return await self.send_result(ctx_or_interaction, embed, ephemeral=True)
+
+        # Materials are all in stock, so the plan is this single recipe
+        plan = CraftPlan(recipe, parsed_amount, inventory)
+        if not await apply_plan(self.bot.db, user_id, plan):
+            embed = discord.Embed(
+                title="Error. Inventory changed",
+                description="Materials changed during fabrication. Nothing was consumed. Try again.",
+                color=discord.Color.red()
+            )
+            return await self.send_result(ctx_or_interaction, embed, ephemeral=True)
+
+        result_text = [
+            f"{result['quantity'] * parsed_amount}x {catalog.item_name(result['item_id'])}"
+            for result in recipe['results']
+        ]
+
+        embed = discord.Embed(
+            title="Fabrication complete",
+            description=f"Recipe {recipe_data['recipe_name']}. Quantity {parsed_amount}.",
+            color=discord.Color.blue()
+        )
+        embed.add_field(name="Output", value="\n".join(result_text), inline=False)
+        embed.add_field(name="Status", value="Operational", inline=False)
+        await self.send_result(ctx_or_interaction, embed)
+
+    @commands.hybrid_command(name="craft-plan", description="Plan a craft including the intermediate items it needs")
+    @app_commands.describe(item="Item you want to craft", amount="How many times to run its recipe")
+    @app_commands.autocomplete(item=item_autocomplete)
+    @commands.cooldown(1, 5, commands.BucketType.user)
+    async def craft_plan(self, ctx: commands.Context, item: str, amount: int = 1):
+        await ctx.defer()
+
+        user_id = ctx.author.id
+        await ensure_user(self.bot.db, user_id)
+
+        target = catalog.item_by_name(item)
+        recipes = catalog.recipes_for(target["id"]) if target else []
+        if not recipes:
+            embed = discord.Embed(
+                title="Error. Item not craftable",
+                description=f"No recipes found for '{item}'.\nUse `/recipes` to view available recipes.",
+                color=discord.Color.red()
+            )
+            return await ctx.send(embed=embed)
+        if amount < 1:
+            return await ctx.send(embed=discord.Embed(title="Error. Invalid amount", description="Amount must be at least 1.", color=discord.Color.red()))
+
+        inventory = await load_inventory(self.bot.db, user_id)
+        # prefer a recipe that can be completed, otherwise report the first one
+        plans = [CraftPlan(recipe, amount, inventory) for recipe in recipes]
+        plan = next((p for p in plans if p.ok), plans[0])
+
+        steps = [
+            f"{i}. {recipe['name']} x{batches}"
+            for i, (recipe, batches) in enumerate(plan.steps, 1)
+        ]
+        embed = discord.Embed(
+            title=f"Fabrication plan: {target['name']}",
+            description="\n".join(steps)[:4000],
+            color=discord.Color.blue() if plan.ok else discord.Color.orange()
+        )
+        net = plan.net
+        used = [f"{-d}x {catalog.item_name(i)}" for i, d in net.items() if d < 0]
+        made = [f"{d}x {catalog.item_name(i)}" for i, d in net.items() if d > 0]
+        if used:
+            embed.add_field(name="Consumes", value="\n".join(used)[:1024], inline=True)
+        if made:
+            embed.add_field(name="Produces", value="\n".join(made)[:1024], inline=True)
+
+        if not plan.ok:
+            short = [f"{qty}x {catalog.item_name(i)}" for i, qty in plan.missing.items()]
+            embed.add_field(name="Missing base materials", value="\n".join(short)[:1024], inline=False)
+            return await ctx.send(embed=embed)
+
+        embed.set_footer(text=f"Direct max without intermediates: {max_craftable(plan.recipe, inventory)}")
+        await ctx.send(embed=embed, view=CraftPlanView(self, user_id, plan))
+
     @commands.hybrid_command(name="recipes", description="View all crafting recipes")
     async def recipes(self, ctx: commands.Context):
-        await ctx.defer()
-        
-        async with self.bot.db.acquire() as conn:
-            # Get all craftable items
-            craftable_items = await conn.fetch("""
-                SELECT DISTINCT i.id, i.name, i.icon
-                FROM items i
-                JOIN recipe_results rr ON i.id = rr.item_id
-                ORDER BY i.name
-            """)
-            
-            if not craftable_items:
-                embed = discord.Embed(
-                    title="Recipe Database",
-                    description="No recipes available in database.",
-                    color=discord.Color.red()
-                )
-                return await ctx.send(embed=embed)
-            
-            # Build all recipe data
-            all_recipe_data = []
-            for item in craftable_items:
-                recipes = await conn.fetch("""
-                    SELECT r.id, r.name
-                    FROM recipes r
-                    JOIN recipe_results rr ON r.id = rr.recipe_id
-                    WHERE rr.item_id = $1
-                """, item['id'])
-                
-                recipe_list = []
-                for recipe in recipes:
-                    reqs = await conn.fetch("""
-                        SELECT i.name, rri.quantity, rri.is_consumed
-                        FROM recipe_require_items rri
-                        JOIN items i ON rri.item_id = i.id
-                        WHERE rri.recipe_id = $1
-                    """, recipe['id'])
-                    
-                    req_text = []
-                    for req in reqs:
-                        consumed = "" if req['is_consumed'] else " (reusable)"
-                        req_text.append(f"{req['quantity']}x {req['name']}{consumed}")
-                    
-                    recipe_list.append(f"**{recipe['name']}:** {', '.join(req_text)}")
-                
-                icon = item['icon'] or "📦"
-                all_recipe_data.append({
-                    'name': f"{icon} {item['name']}",
-                    'value': "\n".join(recipe_list)
-                })
-            
-            # Create pages (6 items per page)
-            items_per_page = 6
-            total_pages = math.ceil(len(all_recipe_data) / items_per_page)
-            pages = []
-            
-            for page_num in range(total_pages):
-                embed = discord.Embed(
-                    title="Recipe Database",
-                    description="Available fabrication recipes. Use `/craft <item_name>` to initiate fabrication.",
-                    color=discord.Color.blue()
-                )
-                
-                start_idx = page_num * items_per_page
-                end_idx = min(start_idx + items_per_page, len(all_recipe_data))
-                
-                for recipe_data in all_recipe_data[start_idx:end_idx]:
-                    embed.add_field(
-                        name=recipe_data['name'],
-                        value=recipe_data['value'],
-                        inline=False
-                    )
-                
-                embed.set_footer(text=f"Page {page_num + 1}/{total_pages} | {len(craftable_items)} craftable items")
-                pages.append(embed)
-            
-            if len(pages) == 1:
-                await ctx.send(embed=pages[0])
-            else:
-                view = RecipesPaginationView(ctx.author.id, pages, len(craftable_items))
-                await ctx.send(embed=pages[0], view=view)
+        pages = render_cache.pages("recipes")
+
+        if not pages:
+            embed = discord.Embed(
+                title="Recipe Database",
+                description="No recipes available in database.",
+                color=discord.Color.red()
+            )
+            return await ctx.send(embed=embed)
+
+        if len(pages) == 1:
+            await ctx.send(embed=pages[0])
+        else:
+            view = RecipesPaginationView(ctx.author.id, pages, sum(len(page.fields) for page in pages))
+            await ctx.send(embed=pages[0], view=view)
 
 async def setup(bot):
     await bot.add_cog(Crafting(bot))
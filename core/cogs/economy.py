@@ -7,7 +7,12 @@ from typing import Optional
 
 from utils.db_helpers import *
 from utils.economy import format_number
-from utils.singleton import BASE_TICK
+from utils.singleton import BASE_TICK, EffectID, ItemID
+from utils.leaderboard import LeaderboardService
+from utils.ledger import ledger
+from utils.effects import PendingEffects, apply_effect, clear_effect, has_effect
+from utils.counters import counters
+from utils.user_names import resolve_user_labels
 from .items import get_inventory_total, get_inventory_penalty, get_inventory_warning
 from utils.parser import parse_amount, AmountParseError  # Added for flexible amount parsing
 
@@ -114,26 +119,15 @@ class ScratchView(discord.ui.View):
         winnings = self.bet * total_multi if total_multi > 0 else 0
 
         async with self.pool.acquire() as conn:
-            is_addict = await conn.fetchval("""
-                SELECT 1 FROM current_effects 
-                WHERE user_id = $1 AND effect_id = 7
-            """, self.user_id)
+            is_addict = has_effect(self.user_id, EffectID.GAMBLING_ADDICT)
             
             mood_change = 4 if is_addict else 2
             
             if winnings > 0:
                 # Pay winnings directly (coins appear)
-                await conn.execute(
-                    "UPDATE users SET coins = coins + $1, mood = LEAST(mood + $2, mood_max) WHERE id = $3",
-                    winnings, mood_change, self.user_id
-                )
-                
-                mood_row = await conn.fetchrow("SELECT mood, mood_max FROM users WHERE id = $1", self.user_id)
+                mood_row = await ledger.apply(conn, self.user_id, coins=winnings, mood=mood_change)
                 if is_addict and mood_row and mood_row['mood'] >= mood_row['mood_max']:
-                    await conn.execute("""
-                        DELETE FROM current_effects 
-                        WHERE user_id = $1 AND effect_id = 7
-                    """, self.user_id)
+                    await clear_effect(conn, self.user_id, EffectID.GAMBLING_ADDICT)
                 
                 desc = (
                     f"Your picks: {picks}\n"
@@ -141,7 +135,7 @@ class ScratchView(discord.ui.View):
                     f"You won **{winnings}** coins!"
                 )
             else:
-                await conn.execute("UPDATE users SET mood = GREATEST(mood - $1, 0) WHERE id = $2", mood_change, self.user_id)
+                ledger.defer(self.user_id, mood=-mood_change)
                 desc = (
                     f"Your picks: {picks}\n"
                     f"Total multiplier: {total_multi}x\n"
@@ -168,6 +162,41 @@ class ScratchButton(discord.ui.Button):
 
 
 
+# ------------------- Work helpers -------------------
+# overwork counts /work uses in a sliding window; failure and gambling counts reset each UTC day
+WORK_WINDOW_SECONDS = 5 * 60
+DAY_SECONDS = 24 * 60 * 60
+
+WORK_STATE_SQL = """
+    SELECT u.coins, u.energy, u.energy_max, u.mood, u.mood_max,
+           EXISTS(
+               SELECT 1 FROM inventory i
+               WHERE i.id = u.id AND i.item_id = $2 AND i.quantity > 0
+           ) AS has_toolbelt
+    FROM users u
+    WHERE u.id = $1
+"""
+
+# (item_id, label, chance, min, max) - each line is rolled independently per successful shift
+WORK_DROPS = [
+    (ItemID.SCRAP, "Scrap", 0.50, 1, 3),
+    (ItemID.WOOD, "Wood", 0.40, 1, 3),
+    (ItemID.STONE, "Stone", 0.25, 1, 2),
+    (ItemID.SCRAP, "Scrap", 0.10, 1, 1),
+    (ItemID.HERB, "Herb", 0.05, 1, 1),
+    (ItemID.COAL, "Coal", 0.03, 1, 1),
+]
+
+
+def roll_work_drops() -> list[tuple[int, str, int]]:
+    """Roll the work drop table, returning (item_id, label, amount) for each hit."""
+    drops = []
+    for item_id, label, chance, low, high in WORK_DROPS:
+        if random.random() < chance:
+            drops.append((item_id, label, random.randint(low, high)))
+    return drops
+
+
 # ------------------- Embed helper -------------------
 def make_embed(title: str, description: str, color: discord.Color) -> discord.Embed:
     e = discord.Embed(title=title, description=description, color=color, timestamp=datetime.utcnow())
@@ -294,8 +323,7 @@ class PickUpView(discord.ui.View):
         await interaction.response.defer()
         try:
             await ensure_user(self.bot.db, interaction.user.id)
-            async with self.bot.db.acquire() as conn:
-                await conn.execute("UPDATE users SET coins = coins + $1 WHERE id = $2", self.amount, interaction.user.id)
+            await ledger.apply(self.bot.db, interaction.user.id, coins=self.amount)
             await self.msg.edit(view=self)
             await interaction.followup.send(f"🎉 You picked up **{self.amount}** coins!", ephemeral=True)
         except Exception as e:
@@ -325,6 +353,7 @@ class PickUpView(discord.ui.View):
 class Econ(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.leaderboard = LeaderboardService(bot.db)
 
     # ---------------- status / health ----------------
     @commands.hybrid_command(name="health", description="Check your current stats")
@@ -335,7 +364,6 @@ class Econ(commands.Cog):
                 target = ctx.author
 
             await ensure_user(self.bot.db, target.id)
-            await ensure_inventory(self.bot.db, target.id)
 
             async with self.bot.db.acquire() as conn:
                 row = await conn.fetchrow("SELECT coins, energy, energy_max, mood, mood_max FROM users WHERE id = $1", target.id)
@@ -421,25 +449,16 @@ class Econ(commands.Cog):
         reward_range = (200, 800)
         mood_penalty = 5
 
+        await ensure_user(self.bot.db, uid)
+
         try:
             async with self.bot.db.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO user_config (user_id) VALUES ($1)
-                    ON CONFLICT (user_id) DO NOTHING
-                """, uid)
-                
-                user_exists = await conn.fetchrow("SELECT id FROM users WHERE id = $1", uid)
-                if not user_exists:
-                    await conn.execute("""
-                        INSERT INTO users (id, coins, energy, energy_max, mood, mood_max)
-                        VALUES ($1, 0, 100, 100, 100, 100)
-                    """, uid)
-                is_overworked = await conn.fetchval("""
-                    SELECT 1 FROM current_effects 
-                    WHERE user_id = $1 AND effect_id = 10
-                """, uid)
-                
-                if is_overworked:
+                # Stats and the toolbelt in one round trip, effects come from the in-memory index
+                row = await conn.fetchrow(WORK_STATE_SQL, uid, ItemID.TOOLBELT)
+                if not row:
+                    return await ctx.send("User data not found.")
+
+                if has_effect(uid, EffectID.OVERWORKED):
                     embed = discord.Embed(
                         title="Alert. Overworked",
                         description="Mandatory rest period active. Duration fifteen minutes. Wait for effect to expire.",
@@ -447,192 +466,97 @@ class Econ(commands.Cog):
                     )
                     return await ctx.send(embed=embed)
                 
-                from datetime import datetime, timedelta
-                from bot import work_cache
-                
-                now = datetime.now()
-                five_mins_ago = now - timedelta(minutes=5)
-                
-                if uid not in work_cache:
-                    work_cache[uid] = []
-                
-                work_cache[uid] = [ts for ts in work_cache[uid] if ts > five_mins_ago]
-                work_cache[uid].append(now)
-                work_count = len(work_cache[uid])
-                
-                # Get user data
-                row = await conn.fetchrow("SELECT coins, energy, energy_max, mood, mood_max FROM users WHERE id = $1", uid)
-                if not row:
-                    return await ctx.send("User data not found.")
+                # counters only change once the transaction below has committed
+                work_key, fail_key = f"work:{uid}", f"work_fail:{uid}"
+                work_count = counters.count(work_key, WORK_WINDOW_SECONDS) + 1
+                failure_count = counters.value(fail_key, DAY_SECONDS)
 
                 if row["energy"] < energy_cost:
+                    counters.hit(work_key, WORK_WINDOW_SECONDS)
                     embed = discord.Embed(
                         title="Warning. Energy insufficient",
                         description=f"Energy level at {row['energy']} out of {row['energy_max']}. Minimum {energy_cost} required. Rest or consume energy items.",
                         color=discord.Color.red()
                     )
                     return await ctx.send(embed=embed)
-                
-                if row["energy"] < 10:
-                    await conn.execute("""
-                        INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                        VALUES ($1, 6, 60, 60, NOW())
-                        ON CONFLICT (user_id, effect_id) DO UPDATE
-                        SET duration = 60, ticks = 60, applied_at = NOW()
-                    """, uid)
 
                 mood_ratio = row["mood"] / row["mood_max"] if row["mood_max"] else 0
                 fail_chance = 0.1 if mood_ratio >= 0.6 else 0.5 if mood_ratio >= 0.3 else 0.8
                 is_success = random.random() > fail_chance
 
-                if is_success:
-                    from bot import work_failures_cache
-                    work_failures_cache[uid] = {'count': 0, 'last_reset': datetime.now().date()}
-                    
-                    reward = random.randint(*reward_range)
-                    
-                    has_toolbelt = await conn.fetchval("""
-                        SELECT quantity FROM inventory 
-                        WHERE id = $1 AND item_id = 26 AND quantity > 0
-                    """, uid)
-                    
-                    toolbelt_bonus = False
-                    if has_toolbelt:
-                        reward = int(reward * 1.25)
-                        toolbelt_bonus = True
-                    
-                    is_motivated = await conn.fetchval("""
-                        SELECT 1 FROM current_effects 
-                        WHERE user_id = $1 AND effect_id = 8
-                    """, uid)
-                    
-                    if is_motivated:
-                        reward = int(reward * 1.25)
-                    
-                    is_demoralized = await conn.fetchval("""
-                        SELECT 1 FROM current_effects 
-                        WHERE user_id = $1 AND effect_id = 9
-                    """, uid)
-                    
-                    if is_demoralized:
-                        reward = int(reward * 0.7)
-                    
-                    await conn.execute("""
-                        UPDATE users
-                        SET coins = coins + $1, energy = GREATEST(energy - $2, 0), mood = GREATEST(mood - 1, 0)
-                        WHERE id = $3
-                    """, reward, energy_cost, uid)
-                    
-                    # Determine material drops
-                    materials_found = []
-                    
-                    # Roll for materials
-
-                    if random.random() < 0.50:
-                        scrap_amt = random.randint(1, 3)
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 3, $2)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $2
-                        """, uid, scrap_amt)
-                        materials_found.append(f"{scrap_amt}x Scrap")
-
-                    if random.random() < 0.40:
-                        wood_amt = random.randint(1, 3)
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 19, $2)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $2
-                        """, uid, wood_amt)
-                        materials_found.append(f"{wood_amt}x Wood")
-                    
-                    if random.random() < 0.25:
-                        stone_amt = random.randint(1, 2)
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 18, $2)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $2
-                        """, uid, stone_amt)
-                        materials_found.append(f"{stone_amt}x Stone")
-                    
-                    if random.random() < 0.10:
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 3, 1)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + 1
-                        """, uid)
-                        materials_found.append("1x Scrap")
-                    
-                    if random.random() < 0.05:
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 10, 1)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + 1
-                        """, uid)
-                        materials_found.append("1x Herb")
-                    
-                    if random.random() < 0.03:
-                        await conn.execute("""
-                            INSERT INTO inventory (id, item_id, quantity) VALUES ($1, 15, 1)
-                            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + 1
-                        """, uid)
-                        materials_found.append("1x Coal")
-                    
-                    # Build VIT-style status report
-                    embed = discord.Embed(
-                        title="Work Complete",
-                        color=discord.Color.blue()
-                    )
-                    embed.add_field(name="Reward", value=f"{reward} coins", inline=True)
-                    
-                    if toolbelt_bonus:
-                        embed.add_field(name="Bonus", value="Toolbelt: +25%", inline=True)
-                    
-                    embed.add_field(name="Energy", value=f"-{energy_cost}", inline=True)
-                    
-                    if materials_found:
-                        embed.add_field(name="Resources Acquired", value="\n".join(materials_found), inline=False)
-                    
-                    embed.add_field(name="Status", value="Operational", inline=False)
-                    
-                    overwork_chance = min(work_count / 20, 1.0)
-                    if random.random() < overwork_chance:
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                            VALUES ($1, 10, 30, 30, NOW())
-                        """, uid)
-                        embed.add_field(name="Warning", value="Overworked effect applied. Mandatory rest period: 15 minutes", inline=False)
-                    
-                    await ctx.send(embed=embed)
+                effects = PendingEffects()
+                async with conn.transaction():
+                    if row["energy"] < 10:
+                        await apply_effect(conn, uid, EffectID.EXHAUSTED, 60, pending=effects)
+
+                    if is_success:
+                        reward = random.randint(*reward_range)
+                        
+                        toolbelt_bonus = False
+                        if row["has_toolbelt"]:
+                            reward = int(reward * 1.25)
+                            toolbelt_bonus = True
+                        
+                        if has_effect(uid, EffectID.MOTIVATED):
+                            reward = int(reward * 1.25)
+                        
+                        if has_effect(uid, EffectID.DEMORALIZED):
+                            reward = int(reward * 0.7)
+
+                        drops = roll_work_drops()
+                        totals = {}
+                        for item_id, _, amount in drops:
+                            totals[item_id] = totals.get(item_id, 0) + amount
+
+                        await ledger.apply(conn, uid, coins=reward, energy=-energy_cost, mood=-1)
+                        await add_items(conn, uid, totals)
+                        materials_found = [f"{amount}x {label}" for _, label, amount in drops]
+                        
+                        # Build VIT-style status report
+                        embed = discord.Embed(
+                            title="Work Complete",
+                            color=discord.Color.blue()
+                        )
+                        embed.add_field(name="Reward", value=f"{reward} coins", inline=True)
+                        
+                        if toolbelt_bonus:
+                            embed.add_field(name="Bonus", value="Toolbelt: +25%", inline=True)
+                        
+                        embed.add_field(name="Energy", value=f"-{energy_cost}", inline=True)
+                        
+                        if materials_found:
+                            embed.add_field(name="Resources Acquired", value="\n".join(materials_found), inline=False)
+                        
+                        embed.add_field(name="Status", value="Operational", inline=False)
+                        
+                        overwork_chance = min(work_count / 20, 1.0)
+                        if random.random() < overwork_chance:
+                            await apply_effect(conn, uid, EffectID.OVERWORKED, 30, pending=effects)
+                            embed.add_field(name="Warning", value="Overworked effect applied. Mandatory rest period: 15 minutes", inline=False)
+                    else:
+                        failure_count += 1
+
+                        if failure_count >= 3:
+                            await apply_effect(conn, uid, EffectID.DEMORALIZED, 120, pending=effects)
+                        await ledger.apply(conn, uid, energy=-energy_cost, mood=-mood_penalty)
+                        
+                        # Build VIT-style failure report
+                        embed = discord.Embed(
+                            title="Work Failed",
+                            description="Operation unsuccessful. Resources depleted.",
+                            color=discord.Color.red()
+                        )
+                        embed.add_field(name="Energy", value=f"-{energy_cost}", inline=True)
+                        embed.add_field(name="Mood", value=f"-{mood_penalty}", inline=True)
+                        embed.add_field(name="Status", value="Retry available", inline=False)
+                effects.commit()
+                counters.hit(work_key, WORK_WINDOW_SECONDS)
+                if is_success or failure_count >= 3:
+                    counters.reset(fail_key)
                 else:
-                    from bot import work_failures_cache
-                    
-                    if uid not in work_failures_cache:
-                        work_failures_cache[uid] = {'count': 0, 'last_reset': datetime.now().date()}
-                    
-                    work_failures_cache[uid]['count'] += 1
-                    failure_count = work_failures_cache[uid]['count']
-                    
-                    if failure_count >= 3:
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                            VALUES ($1, 9, 120, 120, NOW())
-                            ON CONFLICT (user_id, effect_id) DO UPDATE
-                            SET duration = 120, ticks = 120, applied_at = NOW()
-                        """, uid)
-                        work_failures_cache[uid]['count'] = 0
-                    await conn.execute("""
-                        UPDATE users
-                        SET energy = GREATEST(energy - $1, 0), mood = GREATEST(mood - $2, 0)
-                        WHERE id = $3
-                    """, energy_cost, mood_penalty, uid)
-                    
-                    # Build VIT-style failure report
-                    embed = discord.Embed(
-                        title="Work Failed",
-                        description="Operation unsuccessful. Resources depleted.",
-                        color=discord.Color.red()
-                    )
-                    embed.add_field(name="Energy", value=f"-{energy_cost}", inline=True)
-                    embed.add_field(name="Mood", value=f"-{mood_penalty}", inline=True)
-                    embed.add_field(name="Status", value="Retry available", inline=False)
-                    
-                    await ctx.send(embed=embed)
+                    counters.incr(fail_key, DAY_SECONDS)
+
+            await ctx.send(embed=embed)
         except Exception:
             traceback.print_exc()
             await ctx.send(embed=make_embed("Error", "An unexpected error occurred.", discord.Color.red()))
@@ -664,7 +588,6 @@ class Econ(commands.Cog):
             return await ctx.send(embed=make_embed("Error. Invalid bet", "Minimum bet one coin.", discord.Color.red()))
 
         await ensure_user(self.bot.db, uid)
-        await ensure_inventory(self.bot.db, uid)
 
         energy_cost = 1
         mood_gain_on_win = 2
@@ -678,59 +601,41 @@ class Econ(commands.Cog):
                 if row["energy"] < energy_cost:
                     return await ctx.send(embed=make_embed("Warning. Energy insufficient", f"Minimum {energy_cost} required. Current level {row['energy']}. Rest or consume energy items.", discord.Color.red()))
 
-                # Deduct bet from user
-                await log_spending(self.bot.db, pay)
-                await conn.execute("UPDATE users SET coins = coins - $1, energy = GREATEST(energy - $2, 0) WHERE id = $3", pay, energy_cost, uid)
-
-            symbols = ["💠", "🍀", "🔔", "⭐", "🍒"]
-            result = [random.choice(symbols) for _ in range(3)]
-            counts = {s: result.count(s) for s in set(result)}
-            max_count = max(counts.values())
+                symbols = ["💠", "🍀", "🔔", "⭐", "🍒"]
+                result = [random.choice(symbols) for _ in range(3)]
+                counts = {s: result.count(s) for s in set(result)}
+                max_count = max(counts.values())
 
-            multiplier = 5.0 if max_count == 3 else 1.5 if max_count == 2 else 0.0
-            winnings = round(pay * multiplier)
+                multiplier = 5.0 if max_count == 3 else 1.5 if max_count == 2 else 0.0
+                winnings = round(pay * multiplier)
 
-            async with self.bot.db.acquire() as conn:
-                from bot import gambling_cache
-                from datetime import datetime
-                
-                today = datetime.now().date()
-                cache_key = f"{uid}_{today}"
+                gamble_count = counters.incr(f"gamble:{uid}", DAY_SECONDS)
                 
-                if cache_key not in gambling_cache:
-                    gambling_cache[cache_key] = 0
-                gambling_cache[cache_key] += 1
-                
-                gamble_count = gambling_cache[cache_key]
-                
-                is_addict = await conn.fetchval("""
-                    SELECT 1 FROM current_effects 
-                    WHERE user_id = $1 AND effect_id = 7
-                """, uid)
+                is_addict = has_effect(uid, EffectID.GAMBLING_ADDICT)
                 
                 mood_change_win = mood_gain_on_win * 2 if is_addict else mood_gain_on_win
                 mood_change_loss = mood_loss_on_fail * 2 if is_addict else mood_loss_on_fail
-                
-                if winnings > 0:
-                    # Pay winnings directly (coins appear)
-                    await conn.execute("UPDATE users SET coins = coins + $1, mood = LEAST(mood + $2, mood_max) WHERE id = $3", winnings, mood_change_win, uid)
-                    
-                    mood_row = await conn.fetchrow("SELECT mood, mood_max FROM users WHERE id = $1", uid)
-                    if is_addict and mood_row and mood_row['mood'] >= mood_row['mood_max']:
-                        await conn.execute("""
-                            DELETE FROM current_effects 
-                            WHERE user_id = $1 AND effect_id = 7
-                        """, uid)
-                else:
-                    await conn.execute("UPDATE users SET mood = GREATEST(mood - $1, 0) WHERE id = $2", mood_change_loss, uid)
+
+                # Bet, payout, energy and mood are written together
+                updated = await ledger.apply(
+                    conn, uid,
+                    coins=winnings - pay,
+                    energy=-energy_cost,
+                    mood=mood_change_win if winnings > 0 else -mood_change_loss,
+                    min_coins=pay,
+                    min_energy=energy_cost,
+                )
+                if updated is None:
+                    return await ctx.send(embed=make_embed("Error. Insufficient funds", f"Minimum {pay} coins required.", discord.Color.red()))
+                ledger.record_spending(pay)
+
+                if winnings > 0 and is_addict and updated['mood'] >= updated['mood_max']:
+                    await clear_effect(conn, uid, EffectID.GAMBLING_ADDICT)
                 
                 if not is_addict:
                     addict_chance = min(gamble_count / 40, 1.0)
                     if random.random() < addict_chance:
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                            VALUES ($1, 7, 999999, 999999, NOW())
-                        """, uid)
+                        await apply_effect(conn, uid, EffectID.GAMBLING_ADDICT, 999999)
 
             color = discord.Color.blue() if winnings > 0 else discord.Color.red()
             status = "Success" if winnings > 0 else "Loss"
@@ -829,18 +734,12 @@ class Econ(commands.Cog):
 
             async with self.bot.db.acquire() as conn:
                 async with conn.transaction():
-                    giver = await conn.fetchrow("SELECT coins FROM users WHERE id = $1 FOR UPDATE", giver_id)
-                    if not giver or giver["coins"] < amount:
+                    # debit and credit in one statement; fails without changes if the giver can't cover it
+                    if not await ledger.transfer(conn, giver_id, target_id, amount, remaining_amount):
                         return await interaction.followup.send(embed=make_embed("Failed", "Insufficient funds.", discord.Color.red()), ephemeral=True)
 
-                
                     await conn.execute("INSERT INTO guilds (id) VALUES ($1) ON CONFLICT (id) DO NOTHING", guild_id)
 
-                   
-                    await conn.execute("UPDATE users SET coins = coins - $1 WHERE id = $2", amount, giver_id)
-                  
-                    await conn.execute("UPDATE users SET coins = coins + $1 WHERE id = $2", remaining_amount, target_id)
-                 
                     if tax_amount > 0:
                         await conn.execute("UPDATE guilds SET coins = coins + $1 WHERE id = $2", tax_amount, guild_id)
 
@@ -877,54 +776,13 @@ class Econ(commands.Cog):
             author_id = ctx.author.id
             
             if mode == "server" and ctx.guild:
-                async with self.bot.db.acquire() as conn:
-                    # Get top 10
-                    top = await conn.fetch("""
-                        SELECT id, coins FROM users
-                        WHERE id = ANY($1::bigint[])
-                        ORDER BY coins DESC LIMIT 10
-                    """, [m.id for m in ctx.guild.members if not m.bot])
-                    
-                    # Get total count and author's rank
-                    total_count = await conn.fetchval("""
-                        SELECT COUNT(*) FROM users
-                        WHERE id = ANY($1::bigint[])
-                    """, [m.id for m in ctx.guild.members if not m.bot])
-                    
-                    author_rank = await conn.fetchval("""
-                        SELECT COUNT(*) + 1 FROM users
-                        WHERE id = ANY($1::bigint[]) AND coins > (
-                            SELECT coins FROM users WHERE id = $2
-                        )
-                    """, [m.id for m in ctx.guild.members if not m.bot], author_id)
-                    
-                    author_coins = await conn.fetchval("SELECT coins FROM users WHERE id = $1", author_id)
+                ranking = await self.leaderboard.guild_ranking(ctx.guild)
             else:
-                async with self.bot.db.acquire() as conn:
-                    # Get top 10
-                    top = await conn.fetch("""SELECT u.id, u.coins
-                        FROM users u
-                        JOIN user_config c ON u.id = c.user_id
-                        WHERE c.lb_opt_in = TRUE
-                        ORDER BY u.coins DESC
-                        LIMIT 10""")
-                    
-                    # Get total count and author's rank
-                    total_count = await conn.fetchval("""
-                        SELECT COUNT(*) FROM users u
-                        JOIN user_config c ON u.id = c.user_id
-                        WHERE c.lb_opt_in = TRUE
-                    """)
-                    
-                    author_rank = await conn.fetchval("""
-                        SELECT COUNT(*) + 1 FROM users u
-                        JOIN user_config c ON u.id = c.user_id
-                        WHERE c.lb_opt_in = TRUE AND u.coins > (
-                            SELECT coins FROM users WHERE id = $1
-                        )
-                    """, author_id)
-                    
-                    author_coins = await conn.fetchval("SELECT coins FROM users WHERE id = $1", author_id)
+                ranking = await self.leaderboard.global_ranking()
+
+            top = ranking.top(10)
+            author_coins = self.leaderboard.coins_of(author_id)
+            author_rank = ranking.rank_for(author_coins) if author_coins is not None else None
 
             if not top:
                 embed = make_embed("No data", "No leaderboard data available.", discord.Color.red())
@@ -934,42 +792,31 @@ class Econ(commands.Cog):
 
                 # Add author's current ranking info
                 if author_rank and author_coins is not None:
-                    top_percentage = round((author_rank / total_count) * 100, 1) if total_count > 0 else 0
+                    top_percentage = ranking.percentile_for(author_coins)
                     embed.add_field(
                         name="Your Ranking",
                         value=f"**Rank**: #{author_rank:,}\n**Coins**: {format_number(author_coins)}\n**Top**: {top_percentage}%",
                         inline=True
                     )
 
-                for i, row in enumerate(top, start=1):
-                    uid = row["id"]
-                    coins = row["coins"]
-                    
-                    # Get user info
-                    if mode == "server" and ctx.guild:
-                        member = ctx.guild.get_member(uid)
-                        if member:
-                            name = member.display_name
-                            username = member.name
-                        else:
-                            # Try to fetch user from bot cache or API
-                            try:
-                                user = await self.bot.fetch_user(uid)
-                                name = user.display_name or user.name
-                                username = user.name
-                            except:
-                                name = f"User {uid}"
-                                username = "Unknown"
+                members = {}
+                if mode == "server" and ctx.guild:
+                    members = {uid: ctx.guild.get_member(uid) for uid, _ in top}
+                labels = await resolve_user_labels(self.bot, [uid for uid, _ in top if not members.get(uid)])
+
+                for i, (uid, coins) in enumerate(top, start=1):
+                    member = members.get(uid)
+                    if member:
+                        name = member.display_name
+                        username = member.name
                     else:
-                        # Global leaderboard - fetch user info
-                        try:
-                            user = await self.bot.fetch_user(uid)
-                            name = user.display_name or user.name
-                            username = user.name
-                        except:
+                        label = labels.get(uid)
+                        if label:
+                            name, username = label
+                        else:
                             name = f"User {uid}"
                             username = "Unknown"
-                    
+
                     # Create ranking info
                     rank_emoji = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"**#{i}**"
                     
@@ -1044,57 +891,42 @@ class Econ(commands.Cog):
                 if user["energy"] < 1:
                     return await ctx.send(embed=make_embed("Warning. Energy insufficient", f"Minimum one required. Current level {user['energy']}. Rest or consume energy items.", discord.Color.red()))
 
-                # Deduct energy and log spending (use parsed_amount)
-                await conn.execute("UPDATE users SET energy = energy - 1 WHERE id = $1", uid)
-                await log_spending(self.bot.db, parsed_amount)
-                
-                from bot import gambling_cache
-                from datetime import datetime
+                gamble_count = counters.incr(f"gamble:{uid}", DAY_SECONDS)
                 
-                today = datetime.now().date()
-                cache_key = f"{uid}_{today}"
-                
-                if cache_key not in gambling_cache:
-                    gambling_cache[cache_key] = 0
-                gambling_cache[cache_key] += 1
-                
-                gamble_count = gambling_cache[cache_key]
-                
-                is_addict = await conn.fetchval("""
-                    SELECT 1 FROM current_effects 
-                    WHERE user_id = $1 AND effect_id = 7
-                """, uid)
+                is_addict = has_effect(uid, EffectID.GAMBLING_ADDICT)
                 
                 mood_change = 4 if is_addict else 2
                 
                 result = random.choice(["heads", "tails"])
                 win = (guess == result)
+                # Energy, bet outcome and mood in a single write
+                updated = await ledger.apply(
+                    conn, uid,
+                    coins=parsed_amount if win else -parsed_amount,
+                    energy=-1,
+                    mood=mood_change if win else -mood_change,
+                    min_coins=parsed_amount,
+                    min_energy=1,
+                )
+                if updated is None:
+                    return await ctx.send(embed=make_embed("Error. Insufficient funds", f"Minimum {parsed_amount} coins required.", discord.Color.red()))
+                ledger.record_spending(parsed_amount)
+
                 if win:
-                    # Pay winnings directly (coins appear) - use parsed_amount
-                    await conn.execute("UPDATE users SET coins = coins + $1, mood = LEAST(mood + $2, mood_max) WHERE id = $3", parsed_amount, mood_change, uid)
                     desc = f"Result: **{result}**\nStatus: Victory\nPayout: +{parsed_amount} coins"
                     
-                    mood_row = await conn.fetchrow("SELECT mood, mood_max FROM users WHERE id = $1", uid)
-                    if is_addict and mood_row and mood_row['mood'] >= mood_row['mood_max']:
-                        await conn.execute("""
-                            DELETE FROM current_effects 
-                            WHERE user_id = $1 AND effect_id = 7
-                        """, uid)
+                    if is_addict and updated['mood'] >= updated['mood_max']:
+                        await clear_effect(conn, uid, EffectID.GAMBLING_ADDICT)
                     
                     color = discord.Color.blue()
                 else:
-                    # Deduct bet (coins disappear) - use parsed_amount
-                    await conn.execute("UPDATE users SET coins = coins - $1, mood = GREATEST(mood - $2, 0) WHERE id = $3", parsed_amount, mood_change, uid)
                     desc = f"Result: **{result}**\nStatus: Loss\nAmount: -{parsed_amount} coins"
                     color = discord.Color.red()
                 
                 if not is_addict:
                     addict_chance = min(gamble_count / 40, 1.0)
                     if random.random() < addict_chance:
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                            VALUES ($1, 7, 999999, 999999, NOW())
-                        """, uid)
+                        await apply_effect(conn, uid, EffectID.GAMBLING_ADDICT, 999999)
 
             await ctx.send(embed=make_embed("Coinflip Results", desc, color))
         except Exception:
@@ -1121,10 +953,8 @@ class Econ(commands.Cog):
                 if parsed_amount <= 0:
                     return await ctx.send(embed=make_embed("Invalid amount", "Amount must be greater than 0.", discord.Color.red()))
                 
-                if bal < parsed_amount:
+                if bal < parsed_amount or await ledger.apply(conn, uid, coins=-parsed_amount, min_coins=parsed_amount) is None:
                     return await ctx.send(embed=make_embed("Insufficient", "You don't have enough coins.", discord.Color.red()))
-                
-                await conn.execute("UPDATE users SET coins = coins - $1 WHERE id = $2", parsed_amount, uid)
 
             embed = make_embed("💰 Coin Drop!", f"{ctx.author.mention} dropped **{parsed_amount}** coins! Click the button to pick them up.", discord.Color.gold())
             embed.set_footer(text="Coins disappear in 30 seconds.")
@@ -1149,7 +979,6 @@ class Econ(commands.Cog):
             ))
 
         await ensure_user(self.bot.db, uid)
-        await ensure_inventory(self.bot.db, uid)
 
         # Show multipliers & weights
         prize_lines = [f"{m:+}x ({round(w * 100, 2)}%)" for m, w in zip(MULTIPLIERS, MULTI_WEIGHTS)]
@@ -1177,36 +1006,20 @@ class Econ(commands.Cog):
                     ))
 
                 # Deduct bet from user
-                await conn.execute(
-                    "UPDATE users SET coins = coins - $1, energy = GREATEST(energy - 1, 0) WHERE id = $2",
-                    bet, uid
-                )
-                await log_spending(self.bot.db, bet)
-                
-                from bot import gambling_cache
-                from datetime import datetime
-                
-                today = datetime.now().date()
-                cache_key = f"{uid}_{today}"
-                
-                if cache_key not in gambling_cache:
-                    gambling_cache[cache_key] = 0
-                gambling_cache[cache_key] += 1
+                if await ledger.apply(conn, uid, coins=-bet, energy=-1, min_coins=bet, min_energy=1) is None:
+                    return await ctx.send(embed=make_embed(
+                        "Error: Insufficient Funds", f"Required: {bet} coins", discord.Color.red()
+                    ))
+                ledger.record_spending(bet)
                 
-                gamble_count = gambling_cache[cache_key]
+                gamble_count = counters.incr(f"gamble:{uid}", DAY_SECONDS)
                 
-                is_addict = await conn.fetchval("""
-                    SELECT 1 FROM current_effects 
-                    WHERE user_id = $1 AND effect_id = 7
-                """, uid)
+                is_addict = has_effect(uid, EffectID.GAMBLING_ADDICT)
                 
                 if not is_addict:
                     addict_chance = min(gamble_count / 40, 1.0)
                     if random.random() < addict_chance:
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                            VALUES ($1, 7, 999999, 999999, NOW())
-                        """, uid)
+                        await apply_effect(conn, uid, EffectID.GAMBLING_ADDICT, 999999)
 
             grid = generate_grid()
             view = ScratchView(uid, grid, bet, self.bot.db, self)
@@ -2,12 +2,36 @@ from discord.ext import commands, tasks
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from utils.db_helpers import *
-from datetime import datetime
 from utils.singleton import BASE_TICK, EffectID
+from utils.effects import active_effects
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# (energy, mood) applied to the user once per tick while the effect is active
+TICK_DELTAS = {
+    EffectID.REST: (1, 0),
+    EffectID.REPLENISHED: (2, 0),
+    EffectID.EXHAUSTED: (-1, 0),
+    EffectID.GAMBLING_ADDICT: (0, -1),
+}
+
+# full reload of the in-memory effect index every N ticks, in case anything wrote to the table directly
+RESYNC_EVERY_TICKS = 10
+
+
+def _row_count(status: str) -> int:
+    try:
+        return int(status.split()[-1])
+    except (AttributeError, ValueError, IndexError):
+        return 0
 
 class EffectScheduler(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.last_tick = None
+        self._ticks = 0
         self.scheduler = AsyncIOScheduler()
 
         self.scheduler.add_job(
@@ -23,56 +47,83 @@ class EffectScheduler(commands.Cog):
 
     @tasks.loop(seconds=BASE_TICK)
     async def check_and_apply_effects(self):
-        async with self.bot.db.acquire() as conn:
-            await conn.fetch("""
-    DELETE
-    FROM current_effects
-    WHERE EXTRACT(EPOCH FROM applied_at) + (duration * $1) <= EXTRACT(EPOCH FROM clock_timestamp())
-""", BASE_TICK)
-            effect_rows = await conn.fetch("""
-    SELECT user_id, effect_id, applied_at, duration
-    FROM current_effects
-    WHERE EXTRACT(EPOCH FROM applied_at) + (duration * $1) > EXTRACT(EPOCH FROM clock_timestamp())
-""", BASE_TICK)
-
-
-            for effect in effect_rows:
-                user_id = effect['user_id']
-                effect_id = effect['effect_id']
-                applied_at = effect['applied_at'].timestamp()
-                duration = effect['duration'] * BASE_TICK
-
-                end_time = applied_at + duration
-                current_timestamp = datetime.now().timestamp()
-
-                if end_time < datetime.now().timestamp():
-                    
-                    await conn.execute("""
+        started = time.perf_counter()
+        effect_ids = list(TICK_DELTAS)
+        energy_deltas = [TICK_DELTAS[e][0] for e in effect_ids]
+        mood_deltas = [TICK_DELTAS[e][1] for e in effect_ids]
+
+        try:
+            async with self.bot.db.acquire() as conn:
+                async with conn.transaction():
+                    expired = await conn.fetch("""
                         DELETE FROM current_effects
-                        WHERE user_id = $1 AND effect_id = $2
-                    """, user_id, effect_id)
-                    print(f"Effect {effect_id} for user {user_id} has expired and was removed.")
-                else:
-                    await ensure_user(self.bot.db, user_id)
-                    if effect_id == EffectID.REST:
-                        data = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
-                        add = min(data['energy']+1, data['energy_max'])
-                        await conn.execute("UPDATE users SET energy = $1 WHERE id = $2", add, user_id)
-                    
-                    elif effect_id == EffectID.REPLENISHED:
-                        data = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
-                        add = min(data['energy']+2, data['energy_max'])
-                        await conn.execute("UPDATE users SET energy = $1 WHERE id = $2", add, user_id)
-                    
-                    elif effect_id == EffectID.EXHAUSTED:
-                        data = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
-                        drain = max(data['energy']-1, 0)
-                        await conn.execute("UPDATE users SET energy = $1 WHERE id = $2", drain, user_id)
-                    
-                    elif effect_id == EffectID.GAMBLING_ADDICT:
-                        data = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
-                        drain = max(data['mood']-1, 0)
-                        await conn.execute("UPDATE users SET mood = $1 WHERE id = $2", drain, user_id)
+                        WHERE EXTRACT(EPOCH FROM applied_at) + (duration * $1) <= EXTRACT(EPOCH FROM clock_timestamp())
+                        RETURNING user_id, effect_id
+                    """, BASE_TICK)
+
+                    await conn.execute("""
+                        INSERT INTO user_config (user_id)
+                        SELECT DISTINCT user_id FROM current_effects WHERE effect_id = ANY($1::int8[])
+                        ON CONFLICT (user_id) DO NOTHING
+                    """, effect_ids)
+                    await conn.execute("""
+                        INSERT INTO users (id, coins, energy, energy_max, mood, mood_max)
+                        SELECT DISTINCT ce.user_id, 0, 100, 100, 100, 100
+                        FROM current_effects ce
+                        WHERE ce.effect_id = ANY($1::int8[])
+                          AND NOT EXISTS (SELECT 1 FROM users u WHERE u.id = ce.user_id)
+                    """, effect_ids)
+
+                    updated = await conn.execute("""
+                        WITH deltas AS (
+                            SELECT ce.user_id,
+                                   SUM(t.energy) AS energy,
+                                   SUM(t.mood) AS mood
+                            FROM current_effects ce
+                            JOIN unnest($1::int8[], $2::int8[], $3::int8[]) AS t(effect_id, energy, mood)
+                              ON t.effect_id = ce.effect_id
+                            GROUP BY ce.user_id
+                        )
+                        UPDATE users u
+                        SET energy = CASE
+                                WHEN d.energy > 0 THEN LEAST(u.energy + d.energy, u.energy_max)
+                                WHEN d.energy < 0 THEN GREATEST(u.energy + d.energy, 0)
+                                ELSE u.energy
+                            END,
+                            mood = CASE
+                                WHEN d.mood > 0 THEN LEAST(u.mood + d.mood, u.mood_max)
+                                WHEN d.mood < 0 THEN GREATEST(u.mood + d.mood, 0)
+                                ELSE u.mood
+                            END
+                        FROM deltas d
+                        WHERE u.id = d.user_id
+                    """, effect_ids, energy_deltas, mood_deltas)
+        except Exception:
+            logger.exception("Effect tick failed")
+            return
+
+        for row in expired:
+            active_effects.remove(row["user_id"], row["effect_id"])
+
+        self._ticks += 1
+        if not active_effects.loaded or self._ticks % RESYNC_EVERY_TICKS == 0:
+            try:
+                await active_effects.load(self.bot.db)
+            except Exception:
+                logger.exception("Effect index resync failed")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.last_tick = {
+            "expired": len(expired),
+            "updated": _row_count(updated),
+            "duration_ms": elapsed_ms,
+        }
+        logger.debug(
+            "Effect tick: %s expired, %s users updated in %.1f ms",
+            self.last_tick["expired"], self.last_tick["updated"], elapsed_ms
+        )
+        if elapsed_ms > BASE_TICK * 1000 / 2:
+            logger.warning("Effect tick took %.1f ms (BASE_TICK=%ss)", elapsed_ms, BASE_TICK)
 
     async def reset_shop_at_midnight(self):
         print("Shop reset triggered!")
@@ -1,10 +1,11 @@
 import discord
 from discord.ext import commands
 import datetime
-import random
 
-from utils.db_helpers import is_item_req_valid, ensure_inventory, add_item, check_has_user_upvoted
+from utils.db_helpers import is_item_req_valid, add_item, check_has_user_upvoted
 from utils.singleton import BASE_TICK
+from utils.catalog import catalog
+from utils.farming import format_rewards, harvest_user, pop_harvest_summary
 
 MAX_FARM_SLOTS = 5
 
@@ -26,78 +27,83 @@ class Farm(commands.Cog):
             farms = await conn.fetch(
                 "SELECT * FROM farm_sessions WHERE user_id = $1 ORDER BY session_id", user.id
             )
+            # rewards the background harvester credited since the last look
+            auto_harvested = await pop_harvest_summary(conn, user.id) if user == ctx.author else {}
+        harvested_text = "\n".join(format_rewards(auto_harvested))
+
+        # If no farms, show a friendly message
+        if not farms:
+            embed = discord.Embed(
+                title="Farm Info",
+                description=("You have no active farms." if user == ctx.author else f"{user.display_name} has no active farms."),
+                color=discord.Color.red(),
+            )
+            if harvested_text:
+                embed.add_field(name="Harvested automatically", value=harvested_text[:1024], inline=False)
+            return await ctx.send(embed=embed)
 
-            # If no farms, show a friendly message
-            if not farms:
-                embed = discord.Embed(
-                    title="Farm Info",
-                    description=("You have no active farms." if user == ctx.author else f"{user.display_name} has no active farms."),
-                    color=discord.Color.red(),
+        # Build paginated pages (4 farms per page)
+        pages = []
+        per_page = 4
+        for i in range(0, len(farms), per_page):
+            chunk = farms[i:i+per_page]
+            embed = discord.Embed(title=f"{user.display_name}'s Farm ({i//per_page + 1}/{(len(farms)-1)//per_page + 1})", color=discord.Color.green())
+            for farm in chunk:
+                farm_rewards = catalog.farm_rewards(farm["farm_id"])
+                input_item = catalog.item(farm_rewards[0]["input_id"]) if farm_rewards else None
+
+                end_time = farm["finished_at"]
+                start_time = farm["created_at"]
+
+                if end_time.tzinfo is None:
+                    end_time = end_time.replace(tzinfo=datetime.timezone.utc)
+                if start_time.tzinfo is None:
+                    start_time = start_time.replace(tzinfo=datetime.timezone.utc)
+
+                now = datetime.datetime.now(datetime.timezone.utc)
+                total = (end_time - start_time).total_seconds()
+                elapsed = (now - start_time).total_seconds()
+                percent = max(0, min(elapsed / total, 1)) if total > 0 else 1
+
+                bar = make_bar(percent)
+                remaining = int((end_time - now).total_seconds()) if end_time > now else 0
+
+                rewards_str = " + ".join(
+                    catalog.item_label(reward["output_id"]) for reward in farm_rewards
+                ) if farm_rewards else ""
+
+                desc = (
+                    f"{input_item['name'] if input_item else 'Unknown'} => {rewards_str}\n"
+                    f"Progress: {bar} ({int(percent * 100)}%)\n"
+                    + (f"Finishes <t:{int(end_time.timestamp())}:R>" if remaining > 0 else "Ready to collect")
                 )
-                return await ctx.send(embed=embed)
-
-            # Build paginated pages (4 farms per page)
-            pages = []
-            per_page = 4
-            for i in range(0, len(farms), per_page):
-                chunk = farms[i:i+per_page]
-                embed = discord.Embed(title=f"{user.display_name}'s Farm ({i//per_page + 1}/{(len(farms)-1)//per_page + 1})", color=discord.Color.green())
-                for farm in chunk:
-                    farm_rewards = await conn.fetch("SELECT * FROM farm_info WHERE farm_id = $1", farm["farm_id"])
-                    input_item = await conn.fetchrow("SELECT * FROM items WHERE id = $1", farm_rewards[0]["input_id"]) if farm_rewards else None
-
-                    end_time = farm["finished_at"]
-                    start_time = farm["created_at"]
-
-                    if end_time.tzinfo is None:
-                        end_time = end_time.replace(tzinfo=datetime.timezone.utc)
-                    if start_time.tzinfo is None:
-                        start_time = start_time.replace(tzinfo=datetime.timezone.utc)
-
-                    now = datetime.datetime.now(datetime.timezone.utc)
-                    total = (end_time - start_time).total_seconds()
-                    elapsed = (now - start_time).total_seconds()
-                    percent = max(0, min(elapsed / total, 1)) if total > 0 else 1
-
-                    bar = make_bar(percent)
-                    remaining = int((end_time - now).total_seconds()) if end_time > now else 0
-
-                    rewards_str = " + ".join([
-                        f"{await self._get_item_name_icon(conn, reward['output_id'])}"
-                        for reward in farm_rewards
-                    ]) if farm_rewards else ""
-
-                    desc = (
-                        f"{input_item['name'] if input_item else 'Unknown'} => {rewards_str}\n"
-                        f"Progress: {bar} ({int(percent * 100)}%)\n"
-                        + (f"Finishes <t:{int(end_time.timestamp())}:R>" if remaining > 0 else "Ready to collect")
-                    )
 
-                    embed.add_field(name=f"Farm #{farm['session_id']}", value=desc, inline=False)
+                embed.add_field(name=f"Farm #{farm['session_id']}", value=desc, inline=False)
 
-                pages.append(embed)
+            pages.append(embed)
 
-            
-            if user == ctx.author:
-                current_farms = await conn.fetchval("SELECT COUNT(*) FROM farm_sessions WHERE user_id = $1", user.id)
-                is_user_upvoted = await check_has_user_upvoted(user.id)
-                max_slots = 10 if is_user_upvoted else MAX_FARM_SLOTS
-                pages[0].set_footer(text=f"Slots: {current_farms}/{max_slots}")
+        
+        if user == ctx.author:
+            current_farms = len(farms)
+            is_user_upvoted = await check_has_user_upvoted(user.id)
+            max_slots = 10 if is_user_upvoted else MAX_FARM_SLOTS
+            pages[0].set_footer(text=f"Slots: {current_farms}/{max_slots}")
+            if harvested_text:
+                pages[0].add_field(name="Harvested automatically", value=harvested_text[:1024], inline=False)
 
        
-            if len(pages) == 1:
-                view = InfoActionView(self, user.id, show_plant=True)
-                await ctx.send(embed=pages[0], view=view)
-                return
-
-            view = FarmPagesView(self, user.id, pages)
+        if len(pages) == 1:
+            view = InfoActionView(self, user.id, show_plant=True)
             await ctx.send(embed=pages[0], view=view)
+            return
+
+        view = FarmPagesView(self, user.id, pages)
+        await ctx.send(embed=pages[0], view=view)
 
     @farm.command(name="info")
     async def info(self, ctx):
         
         async with self.bot.db.acquire() as conn:
-            await ensure_inventory(self.bot.db, ctx.author.id)
             current_farms = await conn.fetchval("SELECT COUNT(*) FROM farm_sessions WHERE user_id = $1", ctx.author.id)
             is_user_upvoted = await check_has_user_upvoted(ctx.author.id)
             max_slots = 10 if is_user_upvoted else MAX_FARM_SLOTS
@@ -115,46 +121,12 @@ class Farm(commands.Cog):
         view = InfoActionView(self, ctx.author.id, show_plant=True)
         await ctx.send(embed=embed, view=view)
 
-    async def _get_item_name_icon(self, conn, item_id):
-        item = await conn.fetchrow("SELECT * FROM items WHERE id = $1", item_id)
-        if not item:
-            return f"Unknown({item_id})"
-        return f"{item.get('icon', '')} {item['name']}"
-
-    async def _collect_finished_for_user(self, conn, user_id: int):
-     
-        now = datetime.datetime.now(datetime.timezone.utc)
-        farms = await conn.fetch("SELECT * FROM farm_sessions WHERE user_id = $1 ORDER BY session_id", user_id)
-        finished = [
-            f for f in farms
-            if (f["finished_at"].replace(tzinfo=datetime.timezone.utc)
-                if f["finished_at"].tzinfo is None else f["finished_at"]) <= now
-        ]
-
-        if not finished:
-            return []
-
-        totals = {}
-        labels = {}
-        for farm in finished:
-            farm_rewards = await conn.fetch("SELECT * FROM farm_info WHERE farm_id = $1", farm["farm_id"])
-            for reward in farm_rewards:
-                amount = random.randint(max(1, reward["output_amount"] // 2), reward["output_amount"])
-                await add_item(self.bot.db, user_id, reward["output_id"], amount)
-                item = await conn.fetchrow("SELECT * FROM items WHERE id = $1", reward["output_id"])
-                oid = reward["output_id"]
-                totals[oid] = totals.get(oid, 0) + amount
-                labels[oid] = f"{item.get('icon', '')} {item['name']}"
-            await conn.execute("DELETE FROM farm_sessions WHERE session_id = $1", farm["session_id"])
-
-        total_collected = [f"{totals[oid]} x {labels[oid]}" for oid in sorted(totals.keys(), key=lambda k: labels[k])]
-        return total_collected
+    async def _collect_finished_for_user(self, user_id: int):
+        return format_rewards(await harvest_user(self.bot.db, user_id))
 
     @farm.command(name="harvest", aliases=["collect"])
     async def farm_harvest(self, ctx):
-        await ensure_inventory(self.bot.db, ctx.author.id)
-        async with self.bot.db.acquire() as conn:
-            collected = await self._collect_finished_for_user(conn, ctx.author.id)
+        collected = await self._collect_finished_for_user(ctx.author.id)
 
         if not collected:
             embed = discord.Embed(title="Not Ready", description="No farms are ready to harvest yet.", color=discord.Color.orange())
@@ -184,7 +156,7 @@ class Farm(commands.Cog):
                     )
                     return await ctx.send(embed=embed)
 
-                item = await conn.fetchrow("SELECT * FROM items WHERE name ILIKE $1", f"%{item_query}%")
+                item = catalog.find_item(item_query)
                 if not item:
                     embed = discord.Embed(
                         title="Item Not Found",
@@ -193,7 +165,7 @@ class Farm(commands.Cog):
                     )
                     return await ctx.send(embed=embed)
 
-                farm_info = await conn.fetchrow("SELECT * FROM farm_info WHERE input_id = $1", item["id"])
+                farm_info = catalog.farm_for_input(item["id"])
                 if not farm_info:
                     embed = discord.Embed(
                         title="Not Plantable",
@@ -202,7 +174,7 @@ class Farm(commands.Cog):
                     )
                     return await ctx.send(embed=embed)
 
-                valid = await is_item_req_valid(self.bot.db, ctx.author.id, item["id"], 1)
+                valid = await is_item_req_valid(conn, ctx.author.id, item["id"], 1)
                 if not valid:
                     embed = discord.Embed(
                         title="Insufficient Items",
@@ -227,7 +199,7 @@ class Farm(commands.Cog):
                     end_time,
                 )
 
-                await add_item(self.bot.db, ctx.author.id, item["id"], -1)
+                await add_item(conn, ctx.author.id, item["id"], -1)
 
                 embed = discord.Embed(
                     title="Seed Planted",
@@ -241,36 +213,24 @@ class Farm(commands.Cog):
     @farm.command(name="wiki", description="List plantable items and their possible outputs")
     async def farm_wiki(self, ctx):
         """Show list of plantable items and their outputs in a paginated embed."""
-        async with self.bot.db.acquire() as conn:
-            rows = await conn.fetch("SELECT * FROM farm_info ORDER BY farm_id")
-
-            if not rows:
-                return await ctx.send(embed=discord.Embed(title="Farm Wiki", description="No farm data available.", color=discord.Color.red()))
+        groups = catalog.farms()
+        if not groups:
+            return await ctx.send(embed=discord.Embed(title="Farm Wiki", description="No farm data available.", color=discord.Color.red()))
 
-       
-            groups = {}
-            for r in rows:
-                groups.setdefault(r['farm_id'], []).append(r)
-
-            pages = []
-            for farm_id, rewards in groups.items():
-                input_item = await conn.fetchrow("SELECT * FROM items WHERE id = $1", rewards[0]['input_id'])
-                lines = []
-                for reward in rewards:
-                    out_item = await conn.fetchrow("SELECT * FROM items WHERE id = $1", reward['output_id'])
-                    lines.append(f"{reward['output_amount']} x {out_item.get('icon','')} {out_item['name']}")
-
-                embed = discord.Embed(title=f"Farm ID {farm_id}: {input_item.get('icon','')} {input_item['name']}", description="\n".join(lines), color=discord.Color.blurple())
-                pages.append(embed)
+        pages = []
+        for farm_id, rewards in groups.items():
+            lines = [
+                f"{reward['output_amount']} x {catalog.item_label(reward['output_id'])}"
+                for reward in rewards
+            ]
+            embed = discord.Embed(title=f"Farm ID {farm_id}: {catalog.item_label(rewards[0]['input_id'])}", description="\n".join(lines), color=discord.Color.blurple())
+            pages.append(embed)
 
-            if not pages:
-                return await ctx.send(embed=discord.Embed(title="Farm Wiki", description="No farm info found.", color=discord.Color.red()))
+        if len(pages) == 1:
+            return await ctx.send(embed=pages[0])
 
-            if len(pages) == 1:
-                return await ctx.send(embed=pages[0])
-
-            view = FarmPagesView(self, ctx.author.id, pages)
-            await ctx.send(embed=pages[0], view=view)
+        view = FarmPagesView(self, ctx.author.id, pages)
+        await ctx.send(embed=pages[0], view=view)
 
 
 
@@ -323,8 +283,7 @@ class InfoActionView(discord.ui.View):
         if interaction.user.id != self.user_id:
             return await interaction.response.send_message("This action is not for you.", ephemeral=True)
         await interaction.response.defer()
-        async with self.cog.bot.db.acquire() as conn:
-            collected = await self.cog._collect_finished_for_user(conn, interaction.user.id)
+        collected = await self.cog._collect_finished_for_user(interaction.user.id)
         if not collected:
             return await interaction.followup.send(embed=discord.Embed(title="Not Ready", description="No farms are ready to harvest yet.", color=discord.Color.orange()), ephemeral=True)
         return await interaction.followup.send(embed=discord.Embed(title="Harvest Complete", description=("**You collected:**\n" + "\n".join(collected)), color=discord.Color.gold()), ephemeral=True)
@@ -357,15 +316,15 @@ class PlantModal(discord.ui.Modal, title="Plant Seed"):
                 if current_farms >= max_slots:
                     return await interaction.followup.send(embed=discord.Embed(title="Farm Slots Full", description=f"You already have {max_slots} active farms.", color=discord.Color.orange()), ephemeral=True)
 
-                item = await conn.fetchrow("SELECT * FROM items WHERE name ILIKE $1", f"%{item_query}%")
+                item = catalog.find_item(item_query)
                 if not item:
                     return await interaction.followup.send(embed=discord.Embed(title="Item Not Found", description=f"No item matches '{item_query}'.", color=discord.Color.red()), ephemeral=True)
 
-                farm_info = await conn.fetchrow("SELECT * FROM farm_info WHERE input_id = $1", item["id"])
+                farm_info = catalog.farm_for_input(item["id"])
                 if not farm_info:
                     return await interaction.followup.send(embed=discord.Embed(title="Not Plantable", description=f"You cannot plant {item['name']}.", color=discord.Color.red()), ephemeral=True)
 
-                valid = await is_item_req_valid(self.cog.bot.db, interaction.user.id, item["id"], 1)
+                valid = await is_item_req_valid(conn, interaction.user.id, item["id"], 1)
                 if not valid:
                     return await interaction.followup.send(embed=discord.Embed(title="Insufficient Items", description=f"You don't have any {item['name']} to plant.", color=discord.Color.red()), ephemeral=True)
 
@@ -385,7 +344,7 @@ class PlantModal(discord.ui.Modal, title="Plant Seed"):
                     end_time,
                 )
 
-                await add_item(self.cog.bot.db, interaction.user.id, item["id"], -1)
+                await add_item(conn, interaction.user.id, item["id"], -1)
 
                 return await interaction.followup.send(embed=discord.Embed(title="Seed Planted", description=f"You planted **{item['name']}**!\nIt will finish <t:{int(end_time.timestamp())}:R>.", color=discord.Color.green()), ephemeral=True)
         except Exception as e:
@@ -0,0 +1,56 @@
+from discord.ext import commands
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from utils.farming import harvest_due, HARVEST_BATCH_SIZE
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+AUTO_HARVEST = os.getenv("FARM_AUTO_HARVEST", "0").lower() in ("1", "true", "yes")
+HARVEST_INTERVAL_SECONDS = int(os.getenv("FARM_HARVEST_INTERVAL_SECONDS", "60"))
+# cap per run so a large backlog is worked off over several runs instead of one long one
+MAX_BATCHES_PER_RUN = 5
+
+
+class FarmScheduler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_run = None
+        self.scheduler = AsyncIOScheduler()
+        if AUTO_HARVEST:
+            self.scheduler.add_job(
+                self.harvest_finished_farms,
+                IntervalTrigger(seconds=HARVEST_INTERVAL_SECONDS),
+                name="Farm Auto Harvest",
+                max_instances=1,
+                coalesce=True
+            )
+            self.scheduler.start()
+
+    def cog_unload(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    async def harvest_finished_farms(self):
+        started = time.perf_counter()
+        sessions = users = 0
+        try:
+            for _ in range(MAX_BATCHES_PER_RUN):
+                harvested, credited = await harvest_due(self.bot.db, HARVEST_BATCH_SIZE)
+                sessions += harvested
+                users += credited
+                if harvested < HARVEST_BATCH_SIZE:
+                    break
+        except Exception:
+            logger.exception("Farm auto harvest failed")
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.last_run = {"sessions": sessions, "users": users, "duration_ms": elapsed_ms}
+        if sessions:
+            logger.info(f"Auto harvested {sessions} farms for {users} users in {elapsed_ms:.1f} ms")
+
+
+async def setup(bot):
+    await bot.add_cog(FarmScheduler(bot))
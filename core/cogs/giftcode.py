@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 import asyncpg
-from utils.db_helpers import ensure_user, ensure_inventory
+from utils.db_helpers import ensure_user
 from utils.economy import calculate_multiplier, format_number
 class Giftcode(commands.Cog):
     def __init__(self, bot):
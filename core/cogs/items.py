@@ -2,9 +2,11 @@ from datetime import timedelta
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.db_helpers import ensure_inventory, ensure_user
+from utils.db_helpers import ensure_user
 import traceback
 from utils.singleton import EffectID
+from utils.effects import apply_effect, has_effect
+from utils.catalog import catalog
 import math
 from utils.parser import parse_amount, AmountParseError  # Added for flexible amount parsing
 
@@ -117,7 +119,6 @@ class Items(commands.Cog):
         await ctx.defer()
 
         user_id = ctx.author.id
-        await ensure_inventory(self.bot.db, user_id)
         await ensure_user(self.bot.db, user_id)
 
         try:
@@ -212,7 +213,6 @@ class Items(commands.Cog):
         await interaction.response.defer()
         user_id = interaction.user.id
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
         
        
         try:
@@ -299,17 +299,9 @@ class Items(commands.Cog):
                             WHERE item_id = $1 AND name = $2
                             """, item_id , "rob_protection" )
                         effect_value = int(effect_value)
-                        effect_row = await conn.fetchrow("""
-                            SELECT icon, name 
-                            FROM user_effects
-                            WHERE id = $1
-                        """, EffectID.ROB_PROTECT)
-
-                        current_effect = await conn.fetchrow("""
-                        SELECT * FROM current_effects WHERE user_id = $1 AND effect_id = $2 
-""", interaction.user.id, EffectID.ROB_PROTECT)
-                        
-                        if current_effect is not None:
+                        effect_row = catalog.effect(EffectID.ROB_PROTECT)
+
+                        if has_effect(interaction.user.id, EffectID.ROB_PROTECT):
                             return await interaction.followup.send("You cant use the lock while it is active bruh")
                         if not effect_row:
                             return await interaction.followup.send("Rob data effect not found!")
@@ -319,10 +311,7 @@ class Items(commands.Cog):
                         effect_name = effect_row['name']
 
                         
-                        await conn.execute("""
-                            INSERT INTO current_effects (user_id, effect_id, duration, ticks)
-                            VALUES ($1, $2, $3, $4)
-                        """, user_id, EffectID.ROB_PROTECT, effect_value, effect_value)
+                        await apply_effect(conn, user_id, EffectID.ROB_PROTECT, effect_value)
                     if effect_name == "lottery_ticket":
                         # Use parsed_amount for lottery tickets
                         for _ in range(parsed_amount):
@@ -339,12 +328,7 @@ class Items(commands.Cog):
                 
                 # Trigger Replenished effect if energy reaches max
                 if new_energy >= energy_max:
-                    await conn.execute("""
-                        INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                        VALUES ($1, $2, $3, $3, NOW())
-                        ON CONFLICT (user_id, effect_id) DO UPDATE
-                        SET duration = $3, ticks = $3, applied_at = NOW()
-                    """, user_id, EffectID.REPLENISHED, 120)
+                    await apply_effect(conn, user_id, EffectID.REPLENISHED, 120)
                 if restore_total:
                     used_effects.append(f"⚡ Restored `{restore_total}` energy")
                 if energy_max_inc:
@@ -483,9 +467,7 @@ class Items(commands.Cog):
         await interaction.response.defer()
 
         await ensure_user(self.bot.db, interaction.user.id)
-        await ensure_inventory(self.bot.db, interaction.user.id)
         await ensure_user(self.bot.db, target.id)
-        await ensure_inventory(self.bot.db, target.id)
 
         if target.id == interaction.user.id:
             return await interaction.followup.send(embed=discord.Embed(
@@ -527,13 +509,6 @@ class Items(commands.Cog):
                         color=discord.Color.red()
                     ))
 
-                target_info = await conn.fetchrow("""
-                    SELECT inv.id, inv.item_id, inv.quantity, ite.name
-                    FROM inventory inv
-                    INNER JOIN items ite ON ite.id = inv.item_id
-                    WHERE inv.id = $1 AND LOWER(ite.name) = LOWER($2)
-                """, target.id, item)
-
                 item_id = author_info['item_id']
                 remain = author_info['quantity'] - parsed_amount  # Use parsed_amount
                 if remain < 0:
@@ -2,10 +2,16 @@ import discord
 from discord.ext import commands
 from datetime import datetime
 import traceback
-from typing import Optional, Any, Dict
+from typing import Optional, Any, Dict, Literal
 
-from utils.db_helpers import ensure_inventory, ensure_user
+from utils.db_helpers import ensure_user
 from utils.parser import parse_amount, AmountParseError  # Added for flexible amount parsing
+from utils.catalog import catalog
+from utils.pagination import KeysetPageView, cached_count
+from utils.price_history import DAY, HOUR, candles, record_fills
+from utils.market import (
+    MarketError, buy_from_book, cancel_buy_order, match_listing, order_book, place_buy_order
+)
 
 
 # -------------------- BUY MODAL --------------------
@@ -106,9 +112,9 @@ class WithdrawModal(discord.ui.Modal, title="Withdraw Trade"):
 
 
 # -------------------- VIEW WITH GLOBAL BUTTONS --------------------
-class MarketView(discord.ui.View):
-    def __init__(self, cog):
-        super().__init__(timeout=None)
+class MarketView(KeysetPageView):
+    def __init__(self, cog, author_id: int, fetch, render, per_page: int):
+        super().__init__(author_id, fetch, render, key=lambda row: (row["created_at"], row["id"]), per_page=per_page)
         self.cog = cog
 
     @discord.ui.button(label="Buy", style=discord.ButtonStyle.primary)
@@ -127,49 +133,52 @@ class Market(commands.GroupCog, name="market"):
 
     # ---------- LIST ----------
     @commands.hybrid_command(name="list", description="Show current trades")
-    async def list_trades(self, ctx: commands.Context, page: int = 1):
+    async def list_trades(self, ctx: commands.Context):
         await ctx.defer()
-        if page < 1:
-            return await ctx.send("Page must be >= 1.")
         limit = 20
-        offset = (page - 1) * limit
         try:
-            async with self.bot.db.acquire() as conn:
-                total_trades = await conn.fetchval("SELECT COUNT(*) FROM trades")
-                rows = await conn.fetch("""
-                    SELECT t.id, t.offerer_id, i.name, t.price, t.quantity, t.created_at
-                    FROM trades t
-                    JOIN items i ON i.id = t.item_id
-                    ORDER BY t.created_at DESC
-                    LIMIT $1 OFFSET $2
-                """, limit, offset)
-
-            if not rows:
-                return await ctx.send("No trades available on this page.")
+            total_trades = await cached_count(self.bot.db, "SELECT COUNT(*) FROM trades")
+
+            async def fetch(cursor, count):
+                # newest first; the cursor is the (created_at, id) of the last row shown
+                async with self.bot.db.acquire() as conn:
+                    return await conn.fetch("""
+                        SELECT t.id, t.offerer_id, t.item_id, t.price, t.quantity, t.created_at
+                        FROM trades t
+                        WHERE $1::timestamp IS NULL OR (t.created_at, t.id) < ($1, $2)
+                        ORDER BY t.created_at DESC, t.id DESC
+                        LIMIT $3
+                    """, cursor[0] if cursor else None, cursor[1] if cursor else None, count)
+
+            def render(rows, page):
+                embed = discord.Embed(
+                    title=f"📜 Market Trades (Page {page})",
+                    color=discord.Color.blurple(),
+                    timestamp=datetime.utcnow(),
+                    description="Click **Buy** and enter the Trade ID shown below to purchase."
+                )
 
-            embed = discord.Embed(
-                title=f"📜 Market Trades (Page {page})",
-                color=discord.Color.blurple(),
-                timestamp=datetime.utcnow(),
-                description="Click **Buy** and enter the Trade ID shown below to purchase."
-            )
+                for row in rows:
+                    seller = self.bot.get_user(row["offerer_id"])
+                    seller_name = seller.name if seller else str(row["offerer_id"])
+                    embed.add_field(
+                        name=f"Trade #{row['id']} — {catalog.item_name(row['item_id'])}",
+                        value=(
+                            f"Price: **{row['price']}** each • In Stock: **{row['quantity']}**\n"
+                            f"Seller: {seller_name}"
+                        ),
+                        inline=False
+                    )
 
-            for row in rows:
-                seller = self.bot.get_user(row["offerer_id"])
-                seller_name = seller.name if seller else str(row["offerer_id"])
-                embed.add_field(
-                    name=f"Trade #{row['id']} — {row['name']}",
-                    value=(
-                        f"Price: **{row['price']}** each • In Stock: **{row['quantity']}**\n"
-                        f"Seller: {seller_name}"
-                    ),
-                    inline=False
-                )
+                max_page = max(1, (total_trades + limit - 1) // limit)
+                embed.set_footer(text=f"Page {page}/~{max_page} • Total Trades: ~{total_trades}")
+                return embed
 
-            max_page = max(1, (total_trades + limit - 1) // limit)
-            embed.set_footer(text=f"Page {page}/{max_page} • Total Trades: {total_trades}")
-            view = MarketView(self)
-            await ctx.send(embed=embed, view=view)
+            view = MarketView(self, ctx.author.id, fetch, render, limit)
+            await view.load()
+            if not view.rows:
+                return await ctx.send("No trades available.")
+            await ctx.send(embed=view.embed(), view=view)
 
         except Exception as e:
             traceback.print_exc()
@@ -184,7 +193,6 @@ class Market(commands.GroupCog, name="market"):
             return await ctx.send("Quantity and price must be > 0.")
 
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
 
         try:
             async with self.bot.db.acquire() as conn:
@@ -216,20 +224,176 @@ class Market(commands.GroupCog, name="market"):
 
                     trade_id = trade_row["id"]
 
+                    # fill resting buy orders at or above the asking price first
+                    matched = await match_listing(conn, trade_id)
+
             # outside transaction
+            description = f"Listed **{quantity}x {item_row['name']}** for **{price}** coins each."
+            if matched["filled"]:
+                description += (
+                    f"\nMatched **{matched['filled']}x** with buy orders for **{matched['proceeds']}** coins."
+                )
             embed = discord.Embed(
                 title="Trade Created ",
-                description=f"Listed **{quantity}x {item_row['name']}** for **{price}** coins each.",
+                description=description,
                 color=discord.Color.green(),
                 timestamp=datetime.utcnow()
             )
-            embed.set_footer(text=f"Trade ID: {trade_id} — Use that ID to buy or withdraw.")
+            if matched["filled"] < quantity:
+                embed.set_footer(text=f"Trade ID: {trade_id} — Use that ID to buy or withdraw.")
             await ctx.send(embed=embed)
 
         except Exception as e:
             traceback.print_exc()
             await ctx.send(f"Error: {e}")
 
+    # ---------- ORDER BOOK ----------
+    @commands.hybrid_command(name="book", description="Show the order book for an item")
+    async def show_book(self, ctx: commands.Context, item_name: str):
+        await ctx.defer()
+        item = catalog.item_by_name(item_name)
+        if not item:
+            return await ctx.send("That item does not exist.")
+
+        try:
+            asks, bids = await order_book(self.bot.db, item["id"])
+        except Exception as e:
+            traceback.print_exc()
+            return await ctx.send(f"Error: {e}")
+
+        def levels(rows):
+            if not rows:
+                return "—"
+            return "\n".join(f"**{row['price']}** × {row['quantity']} ({row['orders']})" for row in rows)
+
+        embed = discord.Embed(
+            title=f"📈 Order Book — {catalog.item_label(item['id'])}",
+            color=discord.Color.blurple(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Sell listings (price × qty)", value=levels(asks), inline=True)
+        embed.add_field(name="Buy orders (price × qty)", value=levels(bids), inline=True)
+        embed.set_footer(text="Use /market buy to take the best listings or /market bid to place a buy order.")
+        await ctx.send(embed=embed)
+
+    # ---------- BUY AT BEST PRICE ----------
+    @commands.hybrid_command(name="buy", description="Buy an item at the best available prices")
+    async def buy_best(self, ctx: commands.Context, item_name: str, quantity: int, max_price: Optional[int] = None):
+        await ctx.defer()
+        item = catalog.item_by_name(item_name)
+        if not item:
+            return await ctx.send("That item does not exist.")
+
+        await ensure_user(self.bot.db, ctx.author.id)
+        try:
+            result = await buy_from_book(self.bot.db, ctx.author.id, item["id"], quantity, max_price)
+        except MarketError as e:
+            return await ctx.send(str(e))
+        except Exception as e:
+            traceback.print_exc()
+            return await ctx.send("An internal error occurred while processing the purchase.")
+
+        embed = discord.Embed(
+            title="Purchase Successful ✅",
+            description=(
+                f"You bought **{result['amount']}x {item['name']}** for **{result['total_cost']}** coins "
+                f"(avg {result['total_cost'] / result['amount']:.1f} each)."
+            ),
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        embed.set_footer(text=f"Filled from {len(result['fills'])} listing(s)")
+        await ctx.send(embed=embed)
+
+    # ---------- BUY ORDERS ----------
+    @commands.hybrid_command(name="bid", description="Place a buy order for an item")
+    async def place_bid(self, ctx: commands.Context, item_name: str, quantity: int, price: int):
+        await ctx.defer()
+        item = catalog.item_by_name(item_name)
+        if not item:
+            return await ctx.send("That item does not exist.")
+
+        await ensure_user(self.bot.db, ctx.author.id)
+        try:
+            result = await place_buy_order(self.bot.db, ctx.author.id, item["id"], quantity, price)
+        except MarketError as e:
+            return await ctx.send(str(e))
+        except Exception as e:
+            traceback.print_exc()
+            return await ctx.send("An internal error occurred while placing the buy order.")
+
+        lines = []
+        if result["filled"]:
+            lines.append(f"Bought **{result['filled']}x {item['name']}** right away for **{result['cost']}** coins.")
+        if result["remaining"]:
+            lines.append(
+                f"Buy order for **{result['remaining']}x** at **{price}** each is open; "
+                f"**{result['remaining'] * price}** coins are held until it fills or is cancelled."
+            )
+        embed = discord.Embed(
+            title="Buy Order Placed",
+            description="\n".join(lines),
+            color=discord.Color.green(),
+            timestamp=datetime.utcnow()
+        )
+        if result["order_id"]:
+            embed.set_footer(text=f"Order ID: {result['order_id']} — Use /market cancel-bid to cancel.")
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="cancel-bid", description="Cancel one of your buy orders")
+    async def cancel_bid(self, ctx: commands.Context, order_id: int):
+        await ctx.defer()
+        try:
+            refund = await cancel_buy_order(self.bot.db, ctx.author.id, order_id)
+        except MarketError as e:
+            return await ctx.send(str(e))
+        except Exception as e:
+            traceback.print_exc()
+            return await ctx.send("An internal error occurred while cancelling the buy order.")
+        await ctx.send(f"Buy order #{order_id} cancelled, **{refund}** coins refunded.")
+
+    # ---------- PRICE HISTORY ----------
+    @commands.hybrid_command(name="price-history", description="Show recent sale prices for an item")
+    async def price_history(self, ctx: commands.Context, item_name: str, period: Literal["hourly", "daily"] = "hourly"):
+        await ctx.defer()
+        item = catalog.item_by_name(item_name)
+        if not item:
+            return await ctx.send("That item does not exist.")
+
+        bucket_seconds, limit, fmt = (HOUR, 24, "%m-%d %H:00") if period == "hourly" else (DAY, 30, "%Y-%m-%d")
+        try:
+            rows = await candles(self.bot.db, item["id"], bucket_seconds, limit)
+        except Exception as e:
+            traceback.print_exc()
+            return await ctx.send(f"Error: {e}")
+
+        if not rows:
+            return await ctx.send(f"No recorded sales for {item['name']} yet.")
+
+        lines = [f"{'Period':<12} {'Open':>7} {'High':>7} {'Low':>7} {'Close':>7} {'Vol':>6}"]
+        for row in rows:
+            lines.append(
+                f"{row['bucket_start'].strftime(fmt):<12} {row['open']:>7} {row['high']:>7} "
+                f"{row['low']:>7} {row['close']:>7} {row['volume']:>6}"
+            )
+
+        volume = sum(row["volume"] for row in rows)
+        vwap = sum(row["turnover"] for row in rows) / volume if volume else 0
+        first_open, last_close = rows[0]["open"], rows[-1]["close"]
+        change = (last_close - first_open) / first_open * 100 if first_open else 0
+
+        embed = discord.Embed(
+            title=f"📊 Price History — {catalog.item_label(item['id'])}",
+            description="```\n" + "\n".join(lines)[:4000] + "\n```",
+            color=discord.Color.blurple(),
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="Last", value=f"**{last_close}**", inline=True)
+        embed.add_field(name="Change", value=f"{change:+.1f}%", inline=True)
+        embed.add_field(name="VWAP", value=f"{vwap:.1f}", inline=True)
+        embed.set_footer(text=f"{period.capitalize()} candles • Volume: {volume}")
+        await ctx.send(embed=embed)
+
     # ---------- PROCESS BUY ----------
     async def process_buy(self, buyer_id: int, trade_id: int, amount: int) -> Any:
         """
@@ -241,7 +405,6 @@ class Market(commands.GroupCog, name="market"):
             return "Amount must be positive."
 
         await ensure_user(self.bot.db, buyer_id)
-        await ensure_inventory(self.bot.db, buyer_id)
 
         try:
             async with self.bot.db.acquire() as conn:
@@ -290,6 +453,8 @@ class Market(commands.GroupCog, name="market"):
                         ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $3
                     """, buyer_id, trade["item_id"], amount)
 
+                    await record_fills(conn, trade["item_id"], [(trade["offerer_id"], buyer_id, amount, trade["price"])])
+
                     item_row = await conn.fetchrow("SELECT name FROM items WHERE id = $1", trade["item_id"])
 
                     return {
@@ -310,7 +475,6 @@ class Market(commands.GroupCog, name="market"):
         Returns integer (quantity returned) on success, or str error.
         """
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
 
         try:
             async with self.bot.db.acquire() as conn:
@@ -0,0 +1,47 @@
+from discord.ext import commands
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from datetime import datetime
+from utils.price_history import candle_rollup
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_INTERVAL_SECONDS = 300
+
+
+class MarketScheduler(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_run = None
+        self.scheduler = AsyncIOScheduler()
+        self.scheduler.add_job(
+            self.rollup_price_candles,
+            IntervalTrigger(seconds=ROLLUP_INTERVAL_SECONDS),
+            name="Price Candle Rollup",
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True
+        )
+        self.scheduler.start()
+
+    def cog_unload(self):
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=False)
+
+    async def rollup_price_candles(self):
+        started = time.perf_counter()
+        try:
+            written = await candle_rollup.run(self.bot.db)
+        except Exception:
+            logger.exception("Price candle rollup failed")
+            return
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.last_run = {"candles": written, "duration_ms": elapsed_ms}
+        logger.debug(f"Price candle rollup wrote {written} candles in {elapsed_ms:.1f} ms")
+
+
+async def setup(bot):
+    await bot.add_cog(MarketScheduler(bot))
@@ -2,10 +2,15 @@ import discord
 from discord.ext import commands
 import random
 import traceback
-from datetime import datetime, timedelta
 
 from utils.db_helpers import *
 from utils.singleton import ItemID
+from utils.counters import counters
+from utils.catalog import catalog
+from utils.mining_depth import mining_depths
+
+# each event type has a per-user cooldown
+EVENT_COOLDOWN_SECONDS = 5 * 60
 
 # Mining Results View with continue button
 class MiningResultsView(discord.ui.View):
@@ -36,13 +41,13 @@ class MiningView(discord.ui.View):
         
         await interaction.response.defer()
         
-        current_depth = self.cog.bot.mining_depth_cache.get(self.user_id, 0)
+        current_depth = await mining_depths.get(self.cog.bot.db, self.user_id)
         if current_depth <= 0:
             return await interaction.followup.send("Already at surface level.", ephemeral=True)
         
 
         new_depth = max(0, current_depth - 5)
-        self.cog.bot.mining_depth_cache[self.user_id] = new_depth
+        mining_depths.set(self.user_id, new_depth)
         
         await self.cog.show_mining_panel(interaction, self.user_id, edit=True)
     
@@ -75,11 +80,11 @@ class MiningView(discord.ui.View):
         
         await interaction.response.defer()
         
-        current_depth = self.cog.bot.mining_depth_cache.get(self.user_id, 0)
+        current_depth = await mining_depths.get(self.cog.bot.db, self.user_id)
         
         # down 5 meters
         new_depth = current_depth + 5
-        self.cog.bot.mining_depth_cache[self.user_id] = new_depth
+        mining_depths.set(self.user_id, new_depth)
         
         await self.cog.show_mining_panel(interaction, self.user_id, edit=True)
 
@@ -92,11 +97,6 @@ ZONE_DIAMOND_ABYSS = (50, float('inf'))
 class Mining(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        # Initialize mining depth tracking (cache-based)
-        if not hasattr(bot, 'mining_depth_cache'):
-            bot.mining_depth_cache = {}
-        if not hasattr(bot, 'mining_events_cache'):
-            bot.mining_events_cache = {}
 
     def get_zone_info(self, depth):
         """Determine mining zone based on depth"""
@@ -158,18 +158,11 @@ class Mining(commands.Cog):
 
     def check_event_cooldown(self, user_id, event_type):
         """Check if user is on cooldown for specific event"""
-        cache_key = f"{user_id}_{event_type}"
-        if cache_key in self.bot.mining_events_cache:
-            last_event = self.bot.mining_events_cache[cache_key]
-            # 5 minute cooldown per event type
-            if datetime.now() - last_event < timedelta(minutes=5):
-                return False
-        return True
+        return not counters.on_cooldown(f"mine_event:{user_id}:{event_type}", EVENT_COOLDOWN_SECONDS)
 
     def set_event_cooldown(self, user_id, event_type):
         """Set cooldown for specific event"""
-        cache_key = f"{user_id}_{event_type}"
-        self.bot.mining_events_cache[cache_key] = datetime.now()
+        counters.start_cooldown(f"mine_event:{user_id}:{event_type}", EVENT_COOLDOWN_SECONDS)
 
     async def process_mining_event(self, conn, user_id, depth, user):
         """Process random mining events"""
@@ -193,7 +186,7 @@ class Mining(commands.Cog):
                 "UPDATE users SET energy = GREATEST(energy - 20, 0) WHERE id = $1",
                 user_id
             )
-            self.bot.mining_depth_cache[user_id] = 0
+            mining_depths.set(user_id, 0)
             return {
                 'type': 'cave_in',
                 'title': 'Alert: Cave-In Detected',
@@ -272,19 +265,15 @@ class Mining(commands.Cog):
             user = await conn.fetchrow("SELECT * FROM users WHERE id = $1", user_id)
 
             # Get or initialize depth
-            if user_id not in self.bot.mining_depth_cache:
-                self.bot.mining_depth_cache[user_id] = 0
-
-            current_depth = self.bot.mining_depth_cache[user_id]
+            current_depth = await mining_depths.get(conn, user_id)
             zone_name, _ = self.get_zone_info(current_depth)
 
             # Check pickaxe
             pickaxe = await conn.fetchrow("""
-                SELECT i.* FROM inventory i
-                INNER JOIN item_effects ie ON i.item_id = ie.item_id
-                WHERE i.id = $1 AND ie.name = 'mining_tool' AND i.quantity > 0
+                SELECT * FROM inventory
+                WHERE id = $1 AND item_id = ANY($2::int4[]) AND quantity > 0
                 LIMIT 1
-            """, user_id)
+            """, user_id, catalog.items_with_effect("mining_tool"))
             has_pickaxe = pickaxe is not None
 
             # If we have mining results, show them instead of the normal interface
@@ -308,8 +297,7 @@ class Mining(commands.Cog):
                 if mining_results.get('loot_items'):
                     loot_text = ""
                     for item_id, quantity in mining_results['loot_items']:
-                        item_row = await conn.fetchrow("SELECT * FROM items WHERE id = $1", item_id)
-                        loot_text += f"{item_row['icon']} {item_row['name']} x{quantity}\n"
+                        loot_text += f"{catalog.item_label(item_id)} x{quantity}\n"
                     embed.add_field(
                         name="Resources Acquired",
                         value=loot_text.strip(),
@@ -353,9 +341,8 @@ class Mining(commands.Cog):
                 loot_table = self.get_zone_loot_table(current_depth)
                 loot_info = []
                 for item_id, prob in loot_table.items():
-                    item_row = await conn.fetchrow("SELECT name, icon FROM items WHERE id = $1", item_id)
-                    if item_row:
-                        loot_info.append(f"{item_row['icon']} {item_row['name']} ({int(prob*100)}%)")
+                    if catalog.item(item_id):
+                        loot_info.append(f"{catalog.item_label(item_id)} ({int(prob*100)}%)")
 
                 embed.add_field(name="Available Resources", value="\n".join(loot_info) if loot_info else "None", inline=False)
                 embed.set_footer(text="Use buttons to navigate or mine. Mining costs 10 energy.")
@@ -377,7 +364,6 @@ class Mining(commands.Cog):
         await ctx.defer()
         try:
             await ensure_user(self.bot.db, ctx.author.id)
-            await ensure_inventory(self.bot.db, ctx.author.id)
             
             await self.show_mining_panel(ctx, ctx.author.id)
             
@@ -407,11 +393,10 @@ class Mining(commands.Cog):
 
                 # check pickaxe
                 pickaxe = await conn.fetchrow("""
-                    SELECT i.* FROM inventory i
-                    INNER JOIN item_effects ie ON i.item_id = ie.item_id
-                    WHERE i.id = $1 AND ie.name = 'mining_tool' AND i.quantity > 0
+                    SELECT * FROM inventory
+                    WHERE id = $1 AND item_id = ANY($2::int4[]) AND quantity > 0
                     LIMIT 1
-                """, user_id)
+                """, user_id, catalog.items_with_effect("mining_tool"))
                 if not pickaxe:
                     return "error", {
                         'type': 'no_pickaxe',
@@ -421,7 +406,7 @@ class Mining(commands.Cog):
                     }
 
                 # Get current depth
-                current_depth = self.bot.mining_depth_cache.get(user_id, 0)
+                current_depth = await mining_depths.get(conn, user_id)
 
                 # Check for mining event BEFORE mining
                 event_result = await self.process_mining_event(conn, user_id, current_depth, user)
@@ -459,7 +444,7 @@ class Mining(commands.Cog):
                 if not (event_result and event_result['type'] == 'cave_in'):
                     depth_gain = random.randint(1, 3)
                     current_depth += depth_gain
-                    self.bot.mining_depth_cache[user_id] = current_depth
+                    mining_depths.set(user_id, current_depth)
 
                 # Return mining results data
                 return "success", {
@@ -14,29 +14,24 @@ import pycountry
 from rapidfuzz import process, fuzz
 from utils.translation import translate as tr, translate_bulk
 from utils.db_helpers import ensure_user
+from utils.cache import TTLCache
+from utils.render_cache import render_cache
 temp_store = {}
 
 load_dotenv()
 OWM_API_KEY = os.getenv("OWM_API_KEY")
 
-# --------- Cache: simple TTL cache (5 minutes) ---------
-_weather_cache = {}
+# --------- Cache: TTL cache (5 minutes) ---------
 CACHE_TTL_SECONDS = 300  # 5 minutes
+_weather_cache = TTLCache("weather", maxsize=512, ttl=CACHE_TTL_SECONDS)
 
 
 def _cache_get(key):
-    entry = _weather_cache.get(key)
-    if not entry:
-        return None
-    ts, value = entry
-    if (datetime.datetime.utcnow() - ts).total_seconds() > CACHE_TTL_SECONDS:
-        del _weather_cache[key]
-        return None
-    return value
+    return _weather_cache.get(key)
 
 
 def _cache_set(key, value):
-    _weather_cache[key] = (datetime.datetime.utcnow(), value)
+    _weather_cache.set(key, value)
 
 
 # --------- Fuzzy country lookup to tolerate typos ----------
@@ -262,10 +257,49 @@ SUPPORT_DYNAMIC_LINK = "https://dsc.gg/convit"
 
 
 # ============ Cog & commands ============
+GUIDE_PAGE_TITLES = [
+    "Welcome to the Bot!",
+    "Core Stats & Effects",
+    "Items & Inventory",
+    "Economy & Trading",
+    "Resource Gathering",
+    "Combat & RPG",
+    "Social Features & Games"
+]
+
+
+def render_guide_pages() -> list[discord.Embed]:
+    """Build the /guide pages from docs/tutorial/page_N.txt."""
+    pages_content = []
+    for i in range(1, len(GUIDE_PAGE_TITLES) + 1):
+        try:
+            with open(f"docs/tutorial/page_{i}.txt", "r", encoding="utf-8") as f:
+                content = f.read().strip()
+                if content:
+                    pages_content.append(content)
+        except FileNotFoundError:
+            continue
+
+    embeds = []
+    for i, (content, title) in enumerate(zip(pages_content, GUIDE_PAGE_TITLES)):
+        embed = discord.Embed(
+            title=title,
+            description=content,
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Page {i+1}/{len(pages_content)}")
+        embeds.append(embed)
+    return embeds
+
+
 class Ping(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        render_cache.register("guide", render_guide_pages)
+        render_cache.warm("guide")
+
     @app_commands.command(name="ping", description="Bot latency")
     async def ping(self, interaction: discord.Interaction):
         # keep your non-emoji formatting approach
@@ -483,45 +517,12 @@ class Ping(commands.Cog):
     async def guide(self, ctx: commands.Context):
         """Display the bot tutorial guide with pagination"""
         try:
-            await ctx.defer()
-
-            # Read all tutorial pages
-            pages_content = []
-            for i in range(1, 8):
-                try:
-                    with open(f"docs/tutorial/page_{i}.txt", "r", encoding="utf-8") as f:
-                        content = f.read().strip()
-                        if content:
-                            pages_content.append(content)
-                except FileNotFoundError:
-                    continue
-
-            if not pages_content:
+            embeds = render_cache.pages("guide")
+
+            if not embeds:
                 await ctx.reply("Tutorial guide not available.")
                 return
 
-            # Create embeds for each page
-            embeds = []
-            page_titles = [
-                "Welcome to the Bot!",
-                "Core Stats & Effects",
-                "Items & Inventory",
-                "Economy & Trading",
-                "Resource Gathering",
-                "Combat & RPG",
-                "Social Features & Games"
-            ]
-
-            for i, (content, title) in enumerate(zip(pages_content, page_titles)):
-                embed = discord.Embed(
-                    title=title,
-                    description=content,
-                    color=discord.Color.blue(),
-                    timestamp=datetime.datetime.utcnow()
-                )
-                embed.set_footer(text=f"Page {i+1}/{len(pages_content)}")
-                embeds.append(embed)
-
             # Send first page
             if len(embeds) == 1:
                 await ctx.reply(embed=embeds[0])
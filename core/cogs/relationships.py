@@ -14,6 +14,8 @@ from typing import Optional
 from utils.db_helpers import *
 from utils.translation import translate as tr
 from utils.datetime_helpers import utc_now, ensure_utc, format_discord_timestamp
+from utils.graphviz_render import renderer
+from utils.user_names import resolve_user_names
 
 
 logger = logging.getLogger(__name__)
@@ -905,13 +907,8 @@ class Relationship(commands.Cog):
         if not family_data:
             return await ctx.reply(await tr("No family data found.", ctx))
 
-        user_names = {}
-        for m in family_data:
-            try:
-                u = await self.bot.fetch_user(m["id"])
-                user_names[m["id"]] = u.name[:20].replace('"', '\\"')
-            except:
-                user_names[m["id"]] = f"User {m['id']}"
+        resolved = await resolve_user_names(self.bot, [m["id"] for m in family_data])
+        user_names = {uid: name[:20].replace('"', '\\"') for uid, name in resolved.items()}
 
         generations = {}
         for m in family_data:
@@ -980,15 +977,11 @@ class Relationship(commands.Cog):
         dot.append("}")
         dot_src = "\n".join(dot)
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                "https://kroki.io/graphviz/png",
-                data=dot_src,
-                headers={"Content-Type": "text/plain"},
-            ) as r:
-                if r.status != 200:
-                    return await ctx.reply(await tr("Failed to render family tree.", ctx))
-                img = await r.read()
+        try:
+            img = await renderer.render_png(dot_src)
+        except Exception as e:
+            logger.error(f"Family tree render failed: {e}")
+            return await ctx.reply(await tr("Failed to render family tree.", ctx))
 
         embed = discord.Embed(
             title=f"Family Tree for {target.display_name}",
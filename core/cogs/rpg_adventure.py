@@ -3,8 +3,10 @@ from discord import app_commands
 import discord
 import random
 import asyncio
-from utils.db_helpers import ensure_user, ensure_inventory
+from utils.db_helpers import ensure_user
 from utils.singleton import EffectID, ItemID
+from utils.effects import apply_effect, has_effect
+from utils.catalog import catalog
 from utils.enemy_rpg_class import *
 
 class RPGAdventure(commands.Cog):
@@ -19,29 +21,16 @@ class RPGAdventure(commands.Cog):
 
         user_id = interaction.user.id
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
 
-        async with self.bot.db.acquire() as conn:
-            is_injured = await conn.fetchval("""
-                SELECT 1 FROM current_effects
-                WHERE user_id = $1 AND effect_id = $2
-            """, user_id, EffectID.INJURED)
-
-            if is_injured:
-                return await interaction.followup.send("ur injured! rest 5 mins before adventuring again")
+        if has_effect(user_id, EffectID.INJURED):
+            return await interaction.followup.send("ur injured! rest 5 mins before adventuring again")
 
         if user_id in self.battle_sessions or user_id in self.safe_zone_sessions:
             return await interaction.followup.send("ur already adventuring bro")
 
         async with self.bot.db.acquire() as conn:
-            weapon_check = await conn.fetchrow("""
-                SELECT i.item_id, i.quantity, w.needs_ammo, w.ammo_item_id
-                FROM inventory i
-                INNER JOIN item_weapons w ON i.item_id = w.item_id
-                WHERE i.id = $1 AND i.quantity > 0
-                ORDER BY i.quantity DESC
-                LIMIT 1
-            """, user_id)
+            owned = await self.owned_weapons(conn, user_id)
+            weapon_check = max(owned, key=lambda w: w['quantity']) if owned else None
 
             if weapon_check:
                 weapon_id = weapon_check['item_id']
@@ -89,6 +78,19 @@ class RPGAdventure(commands.Cog):
         session_data['message_obj'] = message
         await self.update_safe_zone_message(user_id)
 
+    async def owned_weapons(self, conn, user_id: int) -> list[dict]:
+        """Weapons in the user's inventory with their stats, strongest first."""
+        rows = await conn.fetch("""
+            SELECT item_id, quantity FROM inventory
+            WHERE id = $1 AND item_id = ANY($2::int4[]) AND quantity > 0
+        """, user_id, catalog.weapon_ids())
+        weapons = [
+            {**catalog.weapon(row['item_id']), 'quantity': row['quantity'], 'name': catalog.item_name(row['item_id'])}
+            for row in rows
+        ]
+        weapons.sort(key=lambda w: w['damage_max'], reverse=True)
+        return weapons
+
     async def process_turn(self, user_id: int, action_number: int):
         if user_id not in self.battle_sessions:
             return
@@ -118,43 +120,39 @@ class RPGAdventure(commands.Cog):
                 crit_multiplier = 2 if random.random() < 0.1 else 1
                 weapon_broken = False
             else:
-                async with self.bot.db.acquire() as conn:
-                    weapon_stats = await conn.fetchrow("""
-                        SELECT damage_min, damage_max, crit_rate, break_chance, needs_ammo, ammo_item_id, mag_capacity
-                        FROM item_weapons WHERE item_id = $1
-                    """, action['weapon_id'])
-
-                    if not weapon_stats:
-                        await self.update_battle_message(user_id, "wtf invalid weapon")
-                        return
+                weapon_stats = catalog.weapon(action['weapon_id'])
 
+                if not weapon_stats:
+                    await self.update_battle_message(user_id, "wtf invalid weapon")
+                    return
 
-                    base_damage = random.randint(weapon_stats['damage_min'], weapon_stats['damage_max'])
 
+                base_damage = random.randint(weapon_stats['damage_min'], weapon_stats['damage_max'])
 
+
+                if weapon_stats['needs_ammo']:
+                    if ammo_count <= 0:
+                        await self.update_battle_message(user_id, "out of ammo bro!")
+                        return
+                    ammo_count -= 1
+
+                weapon_broken = False
+                break_chance = weapon_stats['break_chance']
+                if battle_data.get('double_break_chance', False):
+                    break_chance *= 2
+                if random.random() < break_chance:
+                    weapon_broken = True
+                    player_message = "Your weapon breaks!"
+                else:
+                    weapon_type = weapon_stats['weapon_type']
                     if weapon_stats['needs_ammo']:
-                        if ammo_count <= 0:
-                            await self.update_battle_message(user_id, "out of ammo bro!")
-                            return
-                        ammo_count -= 1
-
-                    weapon_broken = False
-                    break_chance = weapon_stats['break_chance']
-                    if battle_data.get('double_break_chance', False):
-                        break_chance *= 2
-                    if random.random() < break_chance:
-                        weapon_broken = True
-                        player_message = "Your weapon breaks!"
+                        player_message = "You fire your weapon!"
+                    elif weapon_type == "melee":
+                        player_message = "You strike with your weapon!"
                     else:
-                        weapon_type = await conn.fetchval("SELECT weapon_type FROM item_weapons WHERE item_id = $1", action['weapon_id'])
-                        if weapon_stats['needs_ammo']:
-                            player_message = "You fire your weapon!"
-                        elif weapon_type == "melee":
-                            player_message = "You strike with your weapon!"
-                        else:
-                            player_message = "You attack with your weapon!"
+                        player_message = "You attack with your weapon!"
 
-                    crit_multiplier = 2 if random.random() < weapon_stats['crit_rate'] else 1
+                crit_multiplier = 2 if random.random() < weapon_stats['crit_rate'] else 1
 
             player_damage = int(base_damage * crit_multiplier)
 
@@ -309,15 +307,7 @@ Enter action number:
 
 
         async with self.bot.db.acquire() as conn:
-            weapons = await conn.fetch("""
-                SELECT i.item_id, i.quantity, it.name, w.damage_min, w.damage_max,
-                       w.crit_rate, w.break_chance, w.needs_ammo, w.ammo_item_id, w.mag_capacity
-                FROM inventory i
-                INNER JOIN items it ON i.item_id = it.id
-                INNER JOIN item_weapons w ON i.item_id = w.item_id
-                WHERE i.id = $1 AND i.quantity > 0
-                ORDER BY w.damage_max DESC
-            """, user_id)
+            weapons = await self.owned_weapons(conn, user_id)
 
             if not weapons:
                 actions.append({
@@ -348,29 +338,28 @@ Enter action number:
                 })
 
 
-            async with self.bot.db.acquire() as conn:
-                for weapon in weapons:
-                    if weapon['needs_ammo'] and weapon['ammo_item_id']:
-
-                        ammo_check = await conn.fetchrow("""
-                            SELECT quantity FROM inventory
-                            WHERE id = $1 AND item_id = $2
-                        """, user_id, weapon['ammo_item_id'])
-                        available_ammo = ammo_check['quantity'] if ammo_check else 0
-
-                        if available_ammo > 0:
-                            mag_capacity = weapon['mag_capacity'] or 1
-                            current_ammo = battle_data.get('ammo_count', 0)
-                            if current_ammo < mag_capacity:
-                                actions.append({
-                                    'type': 'reload',
-                                    'weapon_id': weapon['item_id'],
-                                    'weapon_name': weapon['name'],
-                                    'ammo_item_id': weapon['ammo_item_id'],
-                                    'mag_capacity': mag_capacity,
-                                    'available_ammo': available_ammo,
-                                    'description': f'Reload {weapon["name"]} ({available_ammo} ammo available)'
-                                })
+            for weapon in weapons:
+                if weapon['needs_ammo'] and weapon['ammo_item_id']:
+
+                    ammo_check = await conn.fetchrow("""
+                        SELECT quantity FROM inventory
+                        WHERE id = $1 AND item_id = $2
+                    """, user_id, weapon['ammo_item_id'])
+                    available_ammo = ammo_check['quantity'] if ammo_check else 0
+
+                    if available_ammo > 0:
+                        mag_capacity = weapon['mag_capacity'] or 1
+                        current_ammo = battle_data.get('ammo_count', 0)
+                        if current_ammo < mag_capacity:
+                            actions.append({
+                                'type': 'reload',
+                                'weapon_id': weapon['item_id'],
+                                'weapon_name': weapon['name'],
+                                'ammo_item_id': weapon['ammo_item_id'],
+                                'mag_capacity': mag_capacity,
+                                'available_ammo': available_ammo,
+                                'description': f'Reload {weapon["name"]} ({available_ammo} ammo available)'
+                            })
 
             if weapons:
                 first_weapon = weapons[0]['name']
@@ -406,8 +395,7 @@ Enter action number:
                 for loot_item in enemy.loot:
                     if random.random() < loot_item['chance']:
                         amount = random.randint(loot_item['amount'][0], loot_item['amount'][1])
-                        item_row = await conn.fetchrow("SELECT name FROM items WHERE id = $1", loot_item['id'])
-                        item_name = item_row['name'] if item_row else f"Item {loot_item['id']}"
+                        item_name = catalog.item_name(loot_item['id'])
 
                         battle_data['loot'].append({'id': loot_item['id'], 'amount': amount})
 
@@ -420,9 +408,7 @@ Enter action number:
                 """, user_id, battle_data['weapon_id'])
                 status_messages.append("Your weapon broke!")
 
-            weapon_stats = await conn.fetchrow("""
-                SELECT needs_ammo, ammo_item_id FROM item_weapons WHERE item_id = $1
-            """, battle_data['weapon_id'])
+            weapon_stats = catalog.weapon(battle_data['weapon_id'])
 
             if weapon_stats and weapon_stats['needs_ammo'] and weapon_stats['ammo_item_id']:
                 initial_ammo = battle_data.get('initial_ammo', battle_data['ammo_count'])
@@ -434,12 +420,7 @@ Enter action number:
                     """, user_id, weapon_stats['ammo_item_id'], ammo_used)
 
             if result == "defeat":
-                await conn.execute("""
-                    INSERT INTO current_effects (user_id, effect_id, duration, ticks)
-                    VALUES ($1, $2, $3, $4)
-                    ON CONFLICT (user_id, effect_id) DO UPDATE
-                    SET duration = $3, ticks = $4
-                """, user_id, EffectID.INJURED, 300, 300)
+                await apply_effect(conn, user_id, EffectID.INJURED, 300)
                 status_messages.append("You're injured! Rest for 5 minutes.")
 
         # Create result message
@@ -615,10 +596,7 @@ Enter item number:
         else:
             loot_items = []
             for loot_item in loot:
-                async with self.bot.db.acquire() as conn:
-                    item_row = await conn.fetchrow("SELECT name FROM items WHERE id = $1", loot_item['id'])
-                    item_name = item_row['name'] if item_row else f"Item {loot_item['id']}"
-                loot_items.append(f"{loot_item['amount']}x {item_name}")
+                loot_items.append(f"{loot_item['amount']}x {catalog.item_name(loot_item['id'])}")
 
             message = "Your accumulated loot:\n" + "\n".join(loot_items)
 
@@ -633,14 +611,7 @@ Enter item number:
         available_weapons = [{'item_id': 0, 'name': 'Fists', 'quantity': 1, 'needs_ammo': False, 'ammo_item_id': None}]
 
         async with self.bot.db.acquire() as conn:
-            db_weapons = await conn.fetch("""
-                SELECT i.item_id, i.quantity, it.name, w.needs_ammo, w.ammo_item_id
-                FROM inventory i
-                INNER JOIN items it ON i.item_id = it.id
-                INNER JOIN item_weapons w ON i.item_id = w.item_id
-                WHERE i.id = $1 AND i.quantity > 0
-                ORDER BY w.damage_max DESC
-            """, user_id)
+            db_weapons = await self.owned_weapons(conn, user_id)
 
             available_weapons.extend(db_weapons)
 
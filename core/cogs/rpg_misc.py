@@ -11,20 +11,17 @@ from utils.db_helpers import (
     get_parent,
     get_parents,
     is_too_closely_related,
+    get_family_graph,
 )
 from dotenv import load_dotenv
 from utils.singleton import EffectID
+from utils.ledger import ledger
+from utils.effects import apply_effect, clear_effect, has_effect
+from utils.catalog import catalog
 from utils.translation import translate as tr, translate_bulk
+from utils.activity import activity_tracker
 import logging
 
-
-from datetime import datetime, timedelta
-
-# Track user's last active guild and timestamp
-# Format: {user_id: (guild_id, last_seen_timestamp)}
-user_current_guild = {}
-ACTIVITY_TIMEOUT = timedelta(minutes=30)  # User must have chatted in last 30 minutes
-
 load_dotenv()
 
 logger = logging.getLogger("RPG_MISC")
@@ -70,30 +67,12 @@ class RPG_MISC(commands.Cog):
             return True, "extended_family"
 
         # Check for ancestor/descendant relationship
-        async with self.bot.db.acquire() as conn:
-            is_ancestor = await conn.fetchval("""
-                WITH RECURSIVE ancestors(id) AS (
-                    SELECT parent_id FROM parents WHERE child_id = $1
-                    UNION
-                    SELECT p.parent_id FROM parents p JOIN ancestors a ON p.child_id = a.id
-                )
-                SELECT EXISTS(SELECT 1 FROM ancestors WHERE id = $2)
-            """, user_id, target_id)
-
-            if is_ancestor:
-                return True, "ancestor"
-
-            is_descendant = await conn.fetchval("""
-                WITH RECURSIVE descendants(id) AS (
-                    SELECT child_id FROM parents WHERE parent_id = $1
-                    UNION
-                    SELECT p.child_id FROM parents p JOIN descendants d ON p.parent_id = d.id
-                )
-                SELECT EXISTS(SELECT 1 FROM descendants WHERE id = $2)
-            """, user_id, target_id)
+        graph = await get_family_graph(self.bot.db)
+        if graph.is_ancestor(target_id, user_id):
+            return True, "ancestor"
 
-            if is_descendant:
-                return True, "descendant"
+        if graph.is_descendant(target_id, user_id):
+            return True, "descendant"
 
         return False, ""
 
@@ -106,12 +85,7 @@ class RPG_MISC(commands.Cog):
 
     async def maybe_apply_social_buff(self, conn, user_id: int):
         if random.random() < 0.20:
-            await conn.execute("""
-                INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
-                VALUES ($1, 8, 120, 120, NOW())
-                ON CONFLICT (user_id, effect_id)
-                DO UPDATE SET duration = 120, ticks = 120, applied_at = NOW()
-            """, user_id)
+            await apply_effect(conn, user_id, EffectID.MOTIVATED, 120)
 
     async def fetch_gif(self, query: str) -> str | None:
         giphy_api_key = os.getenv("GIPHY_API_KEY")
@@ -409,14 +383,7 @@ class RPG_MISC(commands.Cog):
             target_row = await conn.fetchrow("SELECT coins FROM users WHERE id = $1", target.id)
             rob_allowed = await conn.fetchval("SELECT allow_rob FROM guild_config WHERE guild_id = $1", ctx.guild.id)
             # Check if target has been active in this guild recently
-            target_activity = user_current_guild.get(target.id)
-            target_is_here = False
-            if target_activity:
-                guild_id, last_seen = target_activity
-                if guild_id == ctx.guild.id and datetime.now() - last_seen < ACTIVITY_TIMEOUT:
-                    target_is_here = True
-            
-            if not target_is_here:
+            if not activity_tracker.is_active(target.id, ctx.guild.id):
                 title = await tr("Error. Target unavailable", ctx)
                 desc = await tr("Target has not been active in this server recently. Action denied. Target out of range.", ctx)
                 return await ctx.reply(embed=discord.Embed(
@@ -433,14 +400,8 @@ class RPG_MISC(commands.Cog):
                     color=discord.Color.red()
                 ), ephemeral=True)
             # check rob protection
-            target_effect = await conn.fetchrow("""
-                SELECT user_effects.icon, user_effects.name
-                FROM current_effects
-                INNER JOIN user_effects ON current_effects.effect_id = user_effects.id
-                WHERE current_effects.user_id = $1 AND current_effects.effect_id = $2
-            """, target.id, EffectID.ROB_PROTECT)
-
-            if target_effect:
+            if has_effect(target.id, EffectID.ROB_PROTECT):
+                target_effect = catalog.effect(EffectID.ROB_PROTECT)
                 return await ctx.reply(embed=discord.Embed(
                     title=f"{target_effect['icon']} {target_effect['name']}",
                     description=f"{target.mention}'s wallet is under protection. You can’t rob them!",
@@ -461,11 +422,11 @@ class RPG_MISC(commands.Cog):
             elif user_row["mood"] < 20:
                 success_chance -= 0.1
 
-            # Deduct energy
-            await conn.execute("UPDATE users SET energy = energy - $1 WHERE id = $2", config["energy"], ctx.author.id)
+            # Energy cost and the mood/coin outcome are written together per branch
+            energy_cost = -config["energy"]
 
             if target_row["coins"] <= 0:
-                await conn.execute("UPDATE users SET mood = GREATEST(mood - 5, 0) WHERE id = $1", ctx.author.id)
+                await ledger.apply(conn, ctx.author.id, energy=energy_cost, mood=-5)
                 return await ctx.reply(embed=discord.Embed(
                     title="Robbery failed",
                     description=f"Target {target.mention}. No funds detected. Mood decreased by five.",
@@ -474,8 +435,10 @@ class RPG_MISC(commands.Cog):
 
             if random.random() < success_chance:
                 amount = max(1, int(target_row["coins"] * config["multiplier"]))
-                await conn.execute("UPDATE users SET coins = coins - $1 WHERE id = $2", amount, target.id)
-                await conn.execute("UPDATE users SET coins = coins + $1, mood = LEAST(mood + 5, mood_max) WHERE id = $2", amount, ctx.author.id)
+                await ledger.apply_many(conn, {
+                    target.id: (-amount, 0, 0),
+                    ctx.author.id: (amount, energy_cost, 5),
+                })
 
                 embed = discord.Embed(
                     title="Robbery successful",
@@ -487,7 +450,7 @@ class RPG_MISC(commands.Cog):
                 embed.add_field(name="Status", value="Operation complete", inline=False)
                 return await ctx.reply(embed=embed, ephemeral=True)
             else:
-                await conn.execute("UPDATE users SET mood = GREATEST(mood - 3, 0) WHERE id = $1", ctx.author.id)
+                await ledger.apply(conn, ctx.author.id, energy=energy_cost, mood=-3)
                 embed = discord.Embed(
                     title="Robbery failed",
                     description=f"Initiator {ctx.author.mention}. Target {target.mention}. Mode {mode}.",
@@ -509,17 +472,12 @@ class RPG_MISC(commands.Cog):
         await ensure_user(self.bot.db, user_id)
 
         async with self.bot.db.acquire() as conn:
-            effect_row = await conn.fetchrow(
-                "SELECT icon, name FROM user_effects WHERE id = $1", EffectID.REST
-            )
+            effect_row = catalog.effect(EffectID.REST)
             if not effect_row:
                 msg = await tr("Resting effect not found! ERROR", ctx)
                 return await ctx.reply(msg)
 
-            await conn.execute("""
-                INSERT INTO current_effects (user_id, effect_id, duration, ticks)
-                VALUES ($1, $2, $3, $4)
-            """, user_id, EffectID.REST, 1000000, 1000000)
+            await apply_effect(conn, user_id, EffectID.REST, 1000000)
 
             translations = await translate_bulk([
                 "Applied",
@@ -564,8 +522,14 @@ class RPG_MISC(commands.Cog):
         if message.author.bot:
             return
 
-        # Track user activity with timestamp
-        user_current_guild[message.author.id] = (message.guild.id, datetime.now())
+        # Track the guild the user was last active in (DMs don't count)
+        if message.guild is not None:
+            activity_tracker.touch(message.author.id, message.guild.id)
+
+        # answered from the in-memory effect index, no query unless the user is resting
+        if not has_effect(message.author.id, EffectID.REST):
+            return
+
         # skip if message starts with prefix (optional): prevents cancelling when calling prefix commands
         try:
             prefixes = getattr(self.bot, "command_prefix", None)
@@ -583,21 +547,12 @@ class RPG_MISC(commands.Cog):
         user_id = message.author.id
         try:
             async with self.bot.db.acquire() as conn:
-                effect_row = await conn.fetchrow(
-                    """SELECT ue.icon, ue.name
-                       FROM current_effects ce
-                       JOIN user_effects ue ON ce.effect_id = ue.id
-                       WHERE ce.user_id = $1 AND ce.effect_id = $2""",
-                    user_id, EffectID.REST
-                )
-
-                if not effect_row:
-                    return  # not resting
-
-                await conn.execute("DELETE FROM current_effects WHERE user_id = $1 AND effect_id = $2", user_id, EffectID.REST)
+                if not await clear_effect(conn, user_id, EffectID.REST):
+                    return  # already expired or cancelled
 
-                icon = effect_row.get("icon") or ""
-                name = effect_row.get("name") or "Resting"
+                effect_row = catalog.effect(EffectID.REST)
+                icon = (effect_row and effect_row.get("icon")) or ""
+                name = (effect_row and effect_row.get("name")) or "Resting"
 
                 translations = await translate_bulk([
                     "Removed",
@@ -1,7 +1,7 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from utils.db_helpers import ensure_user, ensure_inventory, log_spending
+from utils.db_helpers import ensure_user, log_spending
 import traceback
 import logging
 from utils.parser import parse_amount, AmountParseError  # Added for flexible amount parsing
@@ -79,7 +79,6 @@ class Shop(commands.Cog):
         user_id = interaction.user.id
 
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
 
         try:
             async with self.bot.db.acquire() as conn:
@@ -124,7 +123,7 @@ class Shop(commands.Cog):
 
                 # Deduct coins from user
                 await conn.execute("UPDATE users SET coins = coins - $1 WHERE id = $2", total_price, user_id)
-                await log_spending(self.bot.db, total_price)
+                await log_spending(conn, total_price)
                 # Update inventory (use parsed_amount)
                 await conn.execute("""
                     INSERT INTO inventory (id, item_id, quantity) VALUES ($1, $2, $3)
@@ -2,11 +2,15 @@ import discord
 from discord.ext import commands
 from datetime import datetime, timedelta
 import random
+import time
 import traceback
 from typing import Optional, Any, Dict
 
-from utils.db_helpers import ensure_inventory, ensure_user
+from utils.db_helpers import ensure_user
 from utils.parser import parse_amount, AmountParseError
+from utils.catalog import catalog
+from utils.trade_quests import generate_trade_quests, short_expiry
+from utils.pagination import KeysetPageView, cached_count
 
 
 class TradeQuestModal(discord.ui.Modal, title="Accept Trade Quest"):
@@ -52,9 +56,9 @@ class TradeQuestModal(discord.ui.Modal, title="Accept Trade Quest"):
         await interaction.followup.send(embed=embed, ephemeral=True)
 
 
-class TradeQuestView(discord.ui.View):
-    def __init__(self, cog):
-        super().__init__(timeout=None)
+class TradeQuestView(KeysetPageView):
+    def __init__(self, cog, author_id: int, fetch, render, per_page: int):
+        super().__init__(author_id, fetch, render, key=lambda row: (row["created_at"], row["id"]), per_page=per_page)
         self.cog = cog
 
     @discord.ui.button(label="Accept Quest", style=discord.ButtonStyle.primary)
@@ -67,52 +71,56 @@ class TradeQuests(commands.GroupCog, name="trade-quest"):
         self.bot = bot
 
     @commands.hybrid_command(name="show", description="Show available trade quests")
-    async def show_quests(self, ctx: commands.Context, page: int = 1):
+    async def show_quests(self, ctx: commands.Context):
         await ctx.defer()
-        if page < 1:
-            return await ctx.send("Page must be >= 1.")
         limit = 10
-        offset = (page - 1) * limit
         try:
-            async with self.bot.db.acquire() as conn:
-                total_quests = await conn.fetchval("SELECT COUNT(*) FROM trade_quests WHERE expires_at > NOW()")
-                rows = await conn.fetch("""
-                    SELECT t.id, t.trust_level, i.name, i.icon, t.item_amount, t.payout, t.expires_at
-                    FROM trade_quests t
-                    JOIN items i ON i.id = t.item_id
-                    WHERE t.expires_at > NOW()
-                    ORDER BY t.created_at DESC
-                    LIMIT $1 OFFSET $2
-                """, limit, offset)
-
-            if not rows:
-                return await ctx.send("No active trade quests available.")
-
-            embed = discord.Embed(
-                title=f"🛒 Trade Quests (Page {page})",
-                color=discord.Color.blue(),
-                timestamp=datetime.utcnow(),
-                description="NPCs are looking to buy your items! Click **Accept Quest** and enter the Quest ID."
-            )
-
-            for row in rows:
-                trust_text = self.get_trust_description(row["trust_level"])
-                scam_chance = (10 - row["trust_level"]) * 10
-                icon = row["icon"] or ":package:"
-                embed.add_field(
-                    name=f"{icon} {row['name']} x{row['item_amount']}",
-                    value=(
-                        f"**Quest #{row['id']}**\n"
-                        f"Trust: **{trust_text}** ({scam_chance}% scam risk)\n"
-                        f"Payout: **{row['payout']}** coins"
-                    ),
-                    inline=False
+            total_quests = await cached_count(self.bot.db, "SELECT COUNT(*) FROM trade_quests WHERE expires_at > NOW()")
+
+            async def fetch(cursor, count):
+                # newest first; the cursor is the (created_at, id) of the last row shown
+                async with self.bot.db.acquire() as conn:
+                    return await conn.fetch("""
+                        SELECT t.id, t.trust_level, t.item_id, t.item_amount, t.payout, t.expires_at, t.created_at
+                        FROM trade_quests t
+                        WHERE t.expires_at > NOW()
+                          AND ($1::timestamp IS NULL OR (t.created_at, t.id) < ($1, $2))
+                        ORDER BY t.created_at DESC, t.id DESC
+                        LIMIT $3
+                    """, cursor[0] if cursor else None, cursor[1] if cursor else None, count)
+
+            def render(rows, page):
+                embed = discord.Embed(
+                    title=f"🛒 Trade Quests (Page {page})",
+                    color=discord.Color.blue(),
+                    timestamp=datetime.utcnow(),
+                    description="NPCs are looking to buy your items! Click **Accept Quest** and enter the Quest ID."
                 )
 
-            max_page = max(1, (total_quests + limit - 1) // limit)
-            embed.set_footer(text=f"Page {page}/{max_page} • Total Active Quests: {total_quests}")
-            view = TradeQuestView(self)
-            await ctx.send(embed=embed, view=view)
+                for row in rows:
+                    trust_text = self.get_trust_description(row["trust_level"])
+                    scam_chance = (10 - row["trust_level"]) * 10
+                    item = catalog.item(row["item_id"]) or {}
+                    icon = item.get("icon") or ":package:"
+                    embed.add_field(
+                        name=f"{icon} {catalog.item_name(row['item_id'])} x{row['item_amount']}",
+                        value=(
+                            f"**Quest #{row['id']}**\n"
+                            f"Trust: **{trust_text}** ({scam_chance}% scam risk)\n"
+                            f"Payout: **{row['payout']}** coins"
+                        ),
+                        inline=False
+                    )
+
+                max_page = max(1, (total_quests + limit - 1) // limit)
+                embed.set_footer(text=f"Page {page}/~{max_page} • Total Active Quests: ~{total_quests}")
+                return embed
+
+            view = TradeQuestView(self, ctx.author.id, fetch, render, limit)
+            await view.load()
+            if not view.rows:
+                return await ctx.send("No active trade quests available.")
+            await ctx.send(embed=view.embed(), view=view)
 
         except Exception as e:
             traceback.print_exc()
@@ -136,79 +144,25 @@ class TradeQuests(commands.GroupCog, name="trade-quest"):
     @commands.is_owner()
     async def generate_quests(self, ctx: commands.Context, count: int = 5):
         await ctx.defer()
-        if count < 1 or count > 20:
-            return await ctx.send("Count must be between 1 and 20.")
+        if count < 1 or count > 5000:
+            return await ctx.send("Count must be between 1 and 5000.")
 
-        generated = 0
-        failed = 0
         try:
-            async with self.bot.db.acquire() as conn:
-                total_items = await conn.fetchval("SELECT COUNT(*) FROM items WHERE id > 0")
-                if total_items == 0:
-                    return await ctx.send("No items found in database!")
-
-                for _ in range(count):
-                    result = await self.generate_single_quest()
-                    if result:
-                        generated += 1
-                    else:
-                        failed += 1
+            total_items = len(catalog)
+            if total_items == 0:
+                return await ctx.send("No items found in database!")
 
-            await ctx.send(f"Generated {generated} new trade quests. Failed: {failed}. Total items in DB: {total_items}")
+            started = time.perf_counter()
+            generated = await generate_trade_quests(self.bot.db, count, expiry=short_expiry)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            await ctx.send(f"Generated {generated} new trade quests in {elapsed_ms:.0f} ms. Total items in DB: {total_items}")
         except Exception as e:
             traceback.print_exc()
             await ctx.send(f"Error generating quests: {e}")
 
-    async def generate_single_quest(self):
-        try:
-            async with self.bot.db.acquire() as conn:
-                tradeable_items = await conn.fetch("""
-                    SELECT id, name FROM items
-                    WHERE id > 0
-                    ORDER BY RANDOM() LIMIT 1
-                """)
-
-                if not tradeable_items:
-                    return False
-
-                item = tradeable_items[0]
-
-                trust_weights = [0.15, 0.15, 0.15, 0.15, 0.15, 0.10, 0.05, 0.03, 0.02]
-                trust_level = random.choices(range(1, 10), weights=trust_weights)[0]
-
-                amount = random.randint(1, 5)
-                base_value = await self.get_item_base_value(conn, item['id'])
-                payout = int(base_value * amount * (0.6 + trust_level * 0.04))
-
-                timeout_minutes = 10 + (trust_level - 1) * 2
-
-                await conn.execute("""
-                    INSERT INTO trade_quests (trust_level, item_id, item_amount, payout, expires_at)
-                    VALUES ($1, $2, $3, $4, NOW() + INTERVAL '1 minute' * $5)
-                """, trust_level, item['id'], amount, payout, timeout_minutes)
-
-                return True
-        except Exception:
-            return False
-
-    async def get_item_base_value(self, conn, item_id):
-        market_prices = await conn.fetch("""
-            SELECT AVG(price) as avg_price FROM trades
-            WHERE item_id = $1 AND created_at > NOW() - INTERVAL '24 hours'
-            GROUP BY item_id
-        """, item_id)
-
-        if market_prices:
-            return int(market_prices[0]['avg_price'] or 100)
-
-        default_values = {
-            3: 50, 10: 80, 15: 120, 18: 25, 19: 30, 26: 500
-        }
-        return default_values.get(item_id, 100)
-
     async def process_trade_quest(self, user_id: int, quest_id: int) -> Any:
         await ensure_user(self.bot.db, user_id)
-        await ensure_inventory(self.bot.db, user_id)
 
         try:
             async with self.bot.db.acquire() as conn:
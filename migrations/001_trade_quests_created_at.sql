@@ -0,0 +1,7 @@
+-- trade_quests.created_at becomes NOT NULL: the keyset paging in /trade-quest compares
+-- (created_at, id), which skips rows with a NULL created_at.
+
+UPDATE public.trade_quests SET created_at = now() WHERE created_at IS NULL;
+ALTER TABLE public.trade_quests ALTER COLUMN created_at SET NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_trade_quests_created_at ON public.trade_quests USING btree (created_at, id);
+CREATE INDEX IF NOT EXISTS idx_trades_created_at ON public.trades USING btree (created_at, id);
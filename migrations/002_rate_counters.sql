@@ -0,0 +1,4 @@
+-- rate_counters: persisted work/gambling counters, read by CounterStore.load at startup.
+
+CREATE TABLE IF NOT EXISTS public.rate_counters ( "key" text NOT NULL, window_seconds int4 NOT NULL, bucket_start float8 NOT NULL, "current" int4 DEFAULT 0 NOT NULL, previous int4 DEFAULT 0 NOT NULL, expires_at timestamptz NOT NULL, CONSTRAINT rate_counters_pkey PRIMARY KEY (key));
+CREATE INDEX IF NOT EXISTS idx_rate_counters_expires_at ON public.rate_counters USING btree (expires_at);
@@ -0,0 +1,4 @@
+-- farm_harvests: rewards collected by the background harvester, shown once on the farm dashboard.
+
+CREATE TABLE IF NOT EXISTS public.farm_harvests ( user_id int8 NOT NULL, item_id int4 NOT NULL, quantity int4 DEFAULT 0 NOT NULL, harvested_at timestamptz DEFAULT CURRENT_TIMESTAMP NOT NULL, CONSTRAINT farm_harvests_pkey PRIMARY KEY (user_id, item_id));
+CREATE INDEX IF NOT EXISTS idx_farm_sessions_finished_at ON public.farm_sessions USING btree (finished_at);
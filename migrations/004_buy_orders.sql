@@ -0,0 +1,6 @@
+-- buy_orders: resting bids of the market order book, plus the indexes both sides of the book are walked by.
+
+CREATE TABLE IF NOT EXISTS public.buy_orders ( id serial4 NOT NULL, buyer_id int8 NOT NULL, item_id int4 NOT NULL, quantity int8 NOT NULL, price int8 NOT NULL, created_at timestamp DEFAULT now() NOT NULL, CONSTRAINT buy_orders_pkey PRIMARY KEY (id));
+CREATE INDEX IF NOT EXISTS idx_buy_orders_book ON public.buy_orders USING btree (item_id, price DESC, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_buy_orders_buyer ON public.buy_orders USING btree (buyer_id);
+CREATE INDEX IF NOT EXISTS idx_trades_book ON public.trades USING btree (item_id, price, created_at, id);
@@ -0,0 +1,7 @@
+-- trade_fills: every completed market sale; price_candles: hourly and daily OHLC rolled up from them.
+
+CREATE TABLE IF NOT EXISTS public.trade_fills ( id bigserial NOT NULL, item_id int4 NOT NULL, seller_id int8 NOT NULL, buyer_id int8 NOT NULL, quantity int8 NOT NULL, price int8 NOT NULL, filled_at timestamptz DEFAULT now() NOT NULL, CONSTRAINT trade_fills_pkey PRIMARY KEY (id));
+CREATE INDEX IF NOT EXISTS idx_trade_fills_filled_at ON public.trade_fills USING btree (filled_at);
+CREATE INDEX IF NOT EXISTS idx_trade_fills_item ON public.trade_fills USING btree (item_id, filled_at);
+
+CREATE TABLE IF NOT EXISTS public.price_candles ( item_id int4 NOT NULL, bucket_seconds int4 NOT NULL, bucket_start timestamptz NOT NULL, "open" int8 NOT NULL, high int8 NOT NULL, low int8 NOT NULL, "close" int8 NOT NULL, volume int8 NOT NULL, turnover int8 NOT NULL, fills int4 NOT NULL, CONSTRAINT price_candles_pkey PRIMARY KEY (item_id, bucket_seconds, bucket_start));
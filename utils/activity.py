@@ -0,0 +1,63 @@
+import time
+from collections import OrderedDict
+
+ACTIVITY_WINDOW_SECONDS = 30 * 60
+MAX_TRACKED_USERS = 100_000
+
+
+class ActivityTracker:
+    """Last guild each user chatted in, kept for ACTIVITY_WINDOW_SECONDS.
+
+    Entries are stored oldest-first, so expiry and the size cap only ever trim the
+    front of the dict. Lives at module level so cog reloads keep the state.
+    """
+
+    def __init__(self, window: float = ACTIVITY_WINDOW_SECONDS, max_users: int = MAX_TRACKED_USERS):
+        self.window = window
+        self.max_users = max_users
+        self._seen: OrderedDict[int, tuple[int, float]] = OrderedDict()
+        self._guild_counts: dict[int, int] = {}
+
+    def _drop(self, user_id: int):
+        guild_id, _ = self._seen.pop(user_id)
+        remaining = self._guild_counts[guild_id] - 1
+        if remaining:
+            self._guild_counts[guild_id] = remaining
+        else:
+            del self._guild_counts[guild_id]
+
+    def prune(self, now: float | None = None):
+        now = time.monotonic() if now is None else now
+        cutoff = now - self.window
+        while self._seen:
+            user_id, (_, seen_at) = next(iter(self._seen.items()))
+            if seen_at > cutoff and len(self._seen) <= self.max_users:
+                break
+            self._drop(user_id)
+
+    def touch(self, user_id: int, guild_id: int):
+        now = time.monotonic()
+        if user_id in self._seen:
+            self._drop(user_id)
+        self._seen[user_id] = (guild_id, now)
+        self._guild_counts[guild_id] = self._guild_counts.get(guild_id, 0) + 1
+        self.prune(now)
+
+    def is_active(self, user_id: int, guild_id: int, within: float | None = None) -> bool:
+        """True if the user's last message was in `guild_id` within `within` seconds (default: the window)."""
+        entry = self._seen.get(user_id)
+        if entry is None:
+            return False
+        last_guild, seen_at = entry
+        within = self.window if within is None else min(within, self.window)
+        return last_guild == guild_id and time.monotonic() - seen_at < within
+
+    def active_count(self, guild_id: int) -> int:
+        self.prune()
+        return self._guild_counts.get(guild_id, 0)
+
+    def __len__(self):
+        return len(self._seen)
+
+
+activity_tracker = ActivityTracker()
@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+# name -> cache, for the cache-stats admin command
+_registry: dict[str, "TTLCache"] = {}
+
+
+class TTLCache:
+    """Size-bounded LRU cache with optional per-entry expiry.
+
+    Expired entries are dropped lazily when they are read or when they reach the
+    front of the LRU order, so there is no periodic sweep.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float | None = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        _registry[name] = self
+
+    def _lookup(self, key, now: float):
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._data[key]
+            self.expirations += 1
+            return _MISSING
+        return value
+
+    def get(self, key, default=None):
+        value = self._lookup(key, time.monotonic())
+        if value is _MISSING:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key, value, ttl: float | None = _MISSING):
+        """Store `value`; `ttl` overrides the cache default for this entry (None = never expires)."""
+        now = time.monotonic()
+        ttl = self.ttl if ttl is _MISSING else ttl
+        self._data[key] = (value, now + ttl if ttl is not None else None)
+        self._data.move_to_end(key)
+        self._trim(now)
+
+    def _trim(self, now: float):
+        while len(self._data) > self.maxsize:
+            _, (_, expires_at) = self._data.popitem(last=False)
+            if expires_at is not None and expires_at <= now:
+                self.expirations += 1
+            else:
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            return default
+        return value
+
+    def purge_expired(self) -> int:
+        now = time.monotonic()
+        expired = [k for k, (_, exp) in self._data.items() if exp is not None and exp <= now]
+        for key in expired:
+            del self._data[key]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def clear(self):
+        self._data.clear()
+
+    def __contains__(self, key):
+        return self._lookup(key, time.monotonic()) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": self.name,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def cache_stats() -> list[dict]:
+    return [cache.stats() for _, cache in sorted(_registry.items())]
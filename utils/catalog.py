@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from utils.database import connection
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.split()).casefold()
+
+
+class GameCatalog:
+    """Read-only copy of the static game tables: items, item_effects, user_effects,
+    item_weapons, recipes (with requirements and results) and farm_info.
+
+    Loaded once at startup and swapped in whole on reload(); `version` increases with
+    every load so callers can key derived caches on it.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.loaded_at = 0.0
+        self._lock = asyncio.Lock()
+        self._items: dict[int, dict] = {}
+        self._items_by_name: dict[str, dict] = {}
+        self._item_effects: dict[int, list[dict]] = {}
+        self._effects: dict[int, dict] = {}
+        self._weapons: dict[int, dict] = {}
+        self._recipes: dict[int, dict] = {}
+        self._recipes_by_result: dict[int, list[dict]] = {}
+        self._farms: dict[int, list[dict]] = {}
+        self._farm_by_input: dict[int, dict] = {}
+
+    @property
+    def loaded(self) -> bool:
+        return self.version > 0
+
+    async def ensure_loaded(self, db):
+        if self.loaded:
+            return
+        async with self._lock:
+            if not self.loaded:
+                await self._load(db)
+
+    async def reload(self, db):
+        async with self._lock:
+            await self._load(db)
+
+    async def _load(self, db):
+        async with connection(db) as conn:
+            item_rows = await conn.fetch("SELECT * FROM items ORDER BY id")
+            item_effect_rows = await conn.fetch("SELECT * FROM item_effects ORDER BY id")
+            effect_rows = await conn.fetch("SELECT * FROM user_effects ORDER BY id")
+            weapon_rows = await conn.fetch("SELECT * FROM item_weapons")
+            recipe_rows = await conn.fetch("SELECT * FROM recipes ORDER BY id")
+            require_rows = await conn.fetch("SELECT * FROM recipe_require_items ORDER BY recipe_id, item_id")
+            result_rows = await conn.fetch("SELECT * FROM recipe_results ORDER BY recipe_id, item_id")
+            farm_rows = await conn.fetch("SELECT * FROM farm_info ORDER BY farm_id, id")
+
+        items = {r["id"]: dict(r) for r in item_rows}
+        items_by_name = {}
+        for item in items.values():
+            items_by_name.setdefault(normalize_name(item["name"]), item)
+
+        item_effects = defaultdict(list)
+        for r in item_effect_rows:
+            item_effects[r["item_id"]].append(dict(r))
+
+        recipes = {
+            r["id"]: {**dict(r), "requirements": [], "results": []}
+            for r in recipe_rows
+        }
+        for r in require_rows:
+            if r["recipe_id"] in recipes:
+                recipes[r["recipe_id"]]["requirements"].append(dict(r))
+        recipes_by_result = defaultdict(list)
+        for r in result_rows:
+            if r["recipe_id"] in recipes:
+                recipes[r["recipe_id"]]["results"].append(dict(r))
+                recipes_by_result[r["item_id"]].append(recipes[r["recipe_id"]])
+
+        farms = defaultdict(list)
+        farm_by_input = {}
+        for r in farm_rows:
+            farms[r["farm_id"]].append(dict(r))
+            farm_by_input.setdefault(r["input_id"], farms[r["farm_id"]][-1])
+
+        self._items = items
+        self._items_by_name = items_by_name
+        self._item_effects = dict(item_effects)
+        self._effects = {r["id"]: dict(r) for r in effect_rows}
+        self._weapons = {r["item_id"]: dict(r) for r in weapon_rows}
+        self._recipes = recipes
+        self._recipes_by_result = dict(recipes_by_result)
+        self._farms = dict(farms)
+        self._farm_by_input = farm_by_input
+        self.version += 1
+        self.loaded_at = time.time()
+        logger.info(
+            f"Game catalog v{self.version} loaded: {len(items)} items, {len(recipes)} recipes, "
+            f"{len(self._weapons)} weapons, {len(self._farms)} farms"
+        )
+
+    # ---- items ----
+
+    def item(self, item_id: int) -> dict | None:
+        return self._items.get(item_id)
+
+    def item_by_name(self, name: str) -> dict | None:
+        return self._items_by_name.get(normalize_name(name))
+
+    def find_item(self, query: str) -> dict | None:
+        """Exact (case-insensitive) name match first, then the first item whose name contains `query`."""
+        item = self.item_by_name(query)
+        if item is not None:
+            return item
+        needle = normalize_name(query)
+        return next((i for i in self._items.values() if needle in normalize_name(i["name"])), None)
+
+    def item_name(self, item_id: int) -> str:
+        item = self._items.get(item_id)
+        return item["name"] if item else f"Item {item_id}"
+
+    def item_label(self, item_id: int) -> str:
+        """Icon and name as shown in embeds."""
+        item = self._items.get(item_id)
+        if item is None:
+            return f"Unknown({item_id})"
+        return f"{item.get('icon') or ''} {item['name']}"
+
+    def items(self) -> list[dict]:
+        return list(self._items.values())
+
+    def item_effects(self, item_id: int) -> list[dict]:
+        return self._item_effects.get(item_id, [])
+
+    def items_with_effect(self, effect_name: str) -> list[int]:
+        return [
+            item_id for item_id, effects in self._item_effects.items()
+            if any(e["name"] == effect_name for e in effects)
+        ]
+
+    # ---- effects, weapons ----
+
+    def effect(self, effect_id: int) -> dict | None:
+        return self._effects.get(effect_id)
+
+    def weapon(self, item_id: int) -> dict | None:
+        return self._weapons.get(item_id)
+
+    def weapon_ids(self) -> list[int]:
+        return list(self._weapons)
+
+    # ---- recipes ----
+
+    def recipe(self, recipe_id: int) -> dict | None:
+        return self._recipes.get(recipe_id)
+
+    def recipes(self) -> list[dict]:
+        return list(self._recipes.values())
+
+    def recipes_for(self, item_id: int) -> list[dict]:
+        return self._recipes_by_result.get(item_id, [])
+
+    def craftable_items(self) -> list[dict]:
+        return sorted(
+            (self._items[i] for i in self._recipes_by_result if i in self._items),
+            key=lambda item: item["name"]
+        )
+
+    # ---- farms ----
+
+    def farm_rewards(self, farm_id: int) -> list[dict]:
+        return self._farms.get(farm_id, [])
+
+    def farm_for_input(self, item_id: int) -> dict | None:
+        return self._farm_by_input.get(item_id)
+
+    def farms(self) -> dict[int, list[dict]]:
+        return self._farms
+
+    def __len__(self):
+        return len(self._items)
+
+
+catalog = GameCatalog()
@@ -0,0 +1,180 @@
+import logging
+import math
+import os
+import time
+
+from utils.database import connection
+from utils.flusher import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_SECONDS = float(os.getenv("COUNTER_SNAPSHOT_SECONDS", "30"))
+
+
+class CounterStore:
+    """Rate counters kept in memory and snapshotted to the rate_counters table.
+
+    Every counter is a pair of fixed buckets of `window` seconds aligned to the epoch
+    (entry = [window, bucket_start, current, previous]), so increments and reads are O(1):
+    - hit()/count() give a sliding-window estimate (previous bucket weighted by overlap)
+    - incr()/value() count within the current bucket only (e.g. per UTC day)
+    - start_cooldown()/on_cooldown() store an unaligned bucket starting now
+    Only counters touched since the last snapshot are written.
+    """
+
+    def __init__(self, snapshot_seconds: float = SNAPSHOT_SECONDS):
+        self.snapshot_seconds = snapshot_seconds
+        self._counters: dict[str, list] = {}
+        self._dirty: set[str] = set()
+        self._deleted: set[str] = set()
+        self._db = None
+        self._flusher = PeriodicFlusher(self._snapshot, snapshot_seconds, "counter snapshot")
+
+    def _entry(self, key: str, window: int, now: float) -> list:
+        start = math.floor(now / window) * window
+        entry = self._counters.get(key)
+        if entry is None or entry[0] != window:
+            entry = [window, start, 0, 0]
+            self._counters[key] = entry
+        elif entry[1] != start:
+            # roll forward; anything older than the previous bucket is dropped
+            entry[3] = entry[2] if entry[1] == start - window else 0
+            entry[2] = 0
+            entry[1] = start
+        return entry
+
+    @staticmethod
+    def _estimate(entry: list, now: float) -> int:
+        window, start, current, previous = entry
+        overlap = 1 - (now - start) / window
+        return current + math.floor(previous * overlap)
+
+    def hit(self, key: str, window: int, amount: int = 1) -> int:
+        """Record `amount` events and return the sliding-window count including them."""
+        now = time.time()
+        entry = self._entry(key, window, now)
+        entry[2] += amount
+        self._dirty.add(key)
+        self._deleted.discard(key)
+        return self._estimate(entry, now)
+
+    def count(self, key: str, window: int) -> int:
+        entry = self._counters.get(key)
+        if entry is None or entry[0] != window:
+            return 0
+        now = time.time()
+        start = math.floor(now / window) * window
+        if entry[1] == start:
+            return self._estimate(entry, now)
+        if entry[1] == start - window:
+            return math.floor(entry[2] * (1 - (now - start) / window))
+        return 0
+
+    def incr(self, key: str, window: int, amount: int = 1) -> int:
+        """Add to the counter for the current fixed window and return its value."""
+        entry = self._entry(key, window, time.time())
+        entry[2] += amount
+        self._dirty.add(key)
+        self._deleted.discard(key)
+        return entry[2]
+
+    def value(self, key: str, window: int) -> int:
+        entry = self._counters.get(key)
+        if entry is None or entry[0] != window:
+            return 0
+        return entry[2] if entry[1] == math.floor(time.time() / window) * window else 0
+
+    def start_cooldown(self, key: str, seconds: int):
+        self._counters[key] = [seconds, time.time(), 1, 0]
+        self._dirty.add(key)
+        self._deleted.discard(key)
+
+    def on_cooldown(self, key: str, seconds: int) -> bool:
+        entry = self._counters.get(key)
+        return entry is not None and entry[0] == seconds and time.time() < entry[1] + seconds
+
+    def reset(self, key: str):
+        if self._counters.pop(key, None) is not None:
+            self._dirty.discard(key)
+            self._deleted.add(key)
+
+    def __len__(self):
+        return len(self._counters)
+
+    def _prune(self, now: float):
+        expired = [k for k, (window, start, _, _) in self._counters.items() if start + 2 * window <= now]
+        for key in expired:
+            del self._counters[key]
+            self._dirty.discard(key)
+
+    async def load(self, db):
+        async with connection(db) as conn:
+            rows = await conn.fetch("""
+                SELECT key, window_seconds, bucket_start, current, previous
+                FROM rate_counters
+                WHERE expires_at > NOW()
+            """)
+        for row in rows:
+            if row["key"] not in self._counters:
+                self._counters[row["key"]] = [
+                    row["window_seconds"], row["bucket_start"], row["current"], row["previous"]
+                ]
+        logger.info(f"Loaded {len(rows)} rate counters")
+
+    async def snapshot(self, db=None):
+        await self._flusher.run(db)
+
+    async def _snapshot(self, db=None):
+        db = db or self._db
+        if db is None:
+            return
+        now = time.time()
+        self._prune(now)
+
+        dirty, self._dirty = [k for k in self._dirty if k in self._counters], set()
+        deleted, self._deleted = list(self._deleted), set()
+        entries = [self._counters[k] for k in dirty]
+
+        try:
+            async with connection(db) as conn:
+                async with conn.transaction():
+                    if entries:
+                        await conn.execute("""
+                            INSERT INTO rate_counters (key, window_seconds, bucket_start, current, previous, expires_at)
+                            SELECT t.key, t.window_seconds, t.bucket_start, t.current, t.previous,
+                                   to_timestamp(t.bucket_start + 2 * t.window_seconds)
+                            FROM unnest($1::text[], $2::int4[], $3::float8[], $4::int4[], $5::int4[])
+                                AS t(key, window_seconds, bucket_start, current, previous)
+                            ON CONFLICT (key) DO UPDATE
+                            SET window_seconds = EXCLUDED.window_seconds,
+                                bucket_start = EXCLUDED.bucket_start,
+                                current = EXCLUDED.current,
+                                previous = EXCLUDED.previous,
+                                expires_at = EXCLUDED.expires_at
+                        """, dirty, [e[0] for e in entries], [float(e[1]) for e in entries],
+                            [e[2] for e in entries], [e[3] for e in entries])
+                    await conn.execute(
+                        "DELETE FROM rate_counters WHERE key = ANY($1::text[]) OR expires_at <= NOW()",
+                        deleted
+                    )
+        except Exception:
+            logger.exception("Counter snapshot failed, retrying %s keys next time", len(dirty))
+            self._dirty.update(dirty)
+            self._deleted.update(k for k in deleted if k not in self._counters)
+            return
+
+        logger.debug(f"Counter snapshot wrote {len(dirty)} keys, removed {len(deleted)}")
+
+    @property
+    def running(self) -> bool:
+        return self._flusher.running
+
+    def start(self, db):
+        self._db = db
+        self._flusher.start()
+
+    async def stop(self):
+        await self._flusher.stop()
+
+
+counters = CounterStore()
@@ -0,0 +1,137 @@
+import logging
+import math
+from collections import defaultdict
+
+from utils.catalog import catalog
+from utils.database import connection
+from utils.db_helpers import add_items
+
+logger = logging.getLogger(__name__)
+
+MAX_PLAN_DEPTH = 6
+
+
+async def load_inventory(db, user_id: int) -> dict[int, int]:
+    """One snapshot of a user's inventory as item_id -> quantity."""
+    async with connection(db) as conn:
+        rows = await conn.fetch(
+            "SELECT item_id, quantity FROM inventory WHERE id = $1 AND quantity > 0", user_id
+        )
+    return {row["item_id"]: row["quantity"] for row in rows}
+
+
+def max_craftable(recipe: dict, inventory: dict[int, int]) -> int:
+    """How many times `recipe` can be crafted from `inventory` without crafting anything else.
+
+    Every requirement, reusable ones (tools) included, must be held `quantity` times per
+    batch; tools are just not used up. Recipes with no consumed requirements report 0,
+    as 'max' has no meaning for them.
+    """
+    if not any(req["is_consumed"] for req in recipe["requirements"]):
+        return 0
+    return min(inventory.get(req["item_id"], 0) // req["quantity"] for req in recipe["requirements"])
+
+
+def max_craftable_all(inventory: dict[int, int]) -> dict[int, int]:
+    return {recipe["id"]: max_craftable(recipe, inventory) for recipe in catalog.recipes()}
+
+
+class CraftPlan:
+    """Ordered crafting steps for a recipe, including intermediates crafted on the way."""
+
+    def __init__(self, recipe: dict, batches: int, inventory: dict[int, int]):
+        self.recipe = recipe
+        self.batches = batches
+        self.steps: list[tuple[dict, int]] = []
+        self.missing: dict[int, int] = defaultdict(int)
+        self._initial = dict(inventory)
+        self._stock = defaultdict(int, inventory)
+        self._low: dict[int, int] = {}
+
+        self._craft(recipe, batches, frozenset(), 0)
+
+    @property
+    def ok(self) -> bool:
+        return not self.missing
+
+    @property
+    def net(self) -> dict[int, int]:
+        """Inventory change when the plan is applied."""
+        items = set(self._initial) | set(self._stock)
+        delta = {i: self._stock[i] - self._initial.get(i, 0) for i in items}
+        return {i: d for i, d in delta.items() if d}
+
+    @property
+    def uses(self) -> dict[int, int]:
+        """Quantity of each item that must already be in the inventory for the plan to run."""
+        return {
+            i: self._initial.get(i, 0) - low
+            for i, low in self._low.items()
+            if self._initial.get(i, 0) - low > 0
+        }
+
+    def _take(self, item_id: int, qty: int):
+        self._stock[item_id] -= qty
+        self._low[item_id] = min(self._low.get(item_id, self._initial.get(item_id, 0)), self._stock[item_id])
+
+    def _pick_recipe(self, item_id: int, path: frozenset) -> dict | None:
+        for recipe in catalog.recipes_for(item_id):
+            if not any(req["item_id"] in path for req in recipe["requirements"]):
+                return recipe
+        return None
+
+    def _produce(self, item_id: int, qty: int, path: frozenset, depth: int):
+        recipe = self._pick_recipe(item_id, path) if depth < MAX_PLAN_DEPTH else None
+        if recipe is None:
+            # record the shortfall and pretend we have it so the rest of the plan is still reported
+            self.missing[item_id] += qty
+            self._stock[item_id] += qty
+            self._initial[item_id] = self._initial.get(item_id, 0) + qty
+            return
+        per_batch = next(r["quantity"] for r in recipe["results"] if r["item_id"] == item_id)
+        self._craft(recipe, math.ceil(qty / per_batch), path | {item_id}, depth + 1)
+
+    def _craft(self, recipe: dict, batches: int, path: frozenset, depth: int):
+        for req in recipe["requirements"]:
+            item_id = req["item_id"]
+            needed = req["quantity"] * batches
+            short = needed - self._stock[item_id]
+            if short > 0:
+                self._produce(item_id, short, path, depth)
+            self._take(item_id, needed)
+            if not req["is_consumed"]:
+                self._stock[item_id] += needed
+
+        self.steps.append((recipe, batches))
+        for result in recipe["results"]:
+            self._stock[result["item_id"]] += result["quantity"] * batches
+
+
+async def apply_plan(db, user_id: int, plan: CraftPlan) -> bool:
+    """Apply a plan's net inventory change in one transaction.
+
+    The rows involved are locked and re-checked against `plan.uses`; returns False
+    (and changes nothing) when the inventory no longer covers the plan.
+    """
+    if not plan.ok:
+        return False
+    uses = plan.uses
+    net = plan.net
+
+    async with connection(db) as conn:
+        async with conn.transaction():
+            rows = await conn.fetch("""
+                SELECT item_id, quantity FROM inventory
+                WHERE id = $1 AND item_id = ANY($2::int4[])
+                FOR UPDATE
+            """, user_id, list(uses))
+            current = {row["item_id"]: row["quantity"] for row in rows}
+            if any(current.get(item_id, 0) < qty for item_id, qty in uses.items()):
+                return False
+
+            await add_items(conn, user_id, net)
+            await conn.execute("""
+                DELETE FROM inventory
+                WHERE id = $1 AND item_id = ANY($2::int4[]) AND quantity <= 0
+            """, user_id, [item_id for item_id, d in net.items() if d < 0])
+    return True
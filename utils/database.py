@@ -1,18 +1,183 @@
+import asyncio
 import asyncpg
+import contextvars
+import logging
 import os
+import time
+import traceback
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
 load_dotenv()
-db_url = os.getenv("DB_URL")
 
-db = None 
+logger = logging.getLogger(__name__)
 
-async def init_db_pool():
-    global db
-    db = await asyncpg.create_pool(dsn=db_url, max_size=2, min_size=1)
-    print("Database pool created.")
+# DB_NESTED_ACQUIRE=warn|raise reports a task acquiring a second pool connection while it
+# already holds one; pass the held connection down instead (helpers accept either).
+NESTED_ACQUIRE_MODE = os.getenv("DB_NESTED_ACQUIRE", "").strip().lower()
 
-async def get_total_connections():
-    async with db.acquire() as conn:
-        total = await conn.fetchval("SELECT COUNT(*) FROM pg_stat_activity;")
-    return total
+# (task, connections held) for the running task; tasks created while a connection is
+# held inherit the value, so it only counts when the task matches
+_held_connections: contextvars.ContextVar = contextvars.ContextVar("held_connections", default=(None, 0))
+
+
+class NestedAcquireError(RuntimeError):
+    pass
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        logger.warning(f"Invalid integer for {name}: {value!r}, using {default}")
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        logger.warning(f"Invalid number for {name}: {value!r}, using {default}")
+        return default
+
+
+def pool_settings() -> dict:
+    """Pool options read from the environment (see .env.example)."""
+    min_size = _env_int("DB_POOL_MIN_SIZE", 1)
+    max_size = max(_env_int("DB_POOL_MAX_SIZE", 5), min_size)
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "command_timeout": _env_float("DB_COMMAND_TIMEOUT", 30.0),
+        "statement_cache_size": _env_int("DB_STATEMENT_CACHE_SIZE", 100),
+        "max_inactive_connection_lifetime": _env_float("DB_MAX_INACTIVE_CONNECTION_LIFETIME", 300.0),
+    }
+
+
+def _held_by_current_task() -> int:
+    task, held = _held_connections.get()
+    return held if task is not None and task is asyncio.current_task() else 0
+
+
+class _AcquireContext:
+    def __init__(self, pool: "InstrumentedPool", timeout):
+        self._pool = pool
+        self._timeout = timeout
+        self._conn = None
+        self._token = None
+
+    async def __aenter__(self):
+        if NESTED_ACQUIRE_MODE:
+            held = _held_by_current_task()
+            if held:
+                self._pool._report_nested(held)
+            self._token = _held_connections.set((asyncio.current_task(), held + 1))
+        try:
+            self._conn = await self._pool._acquire(self._timeout)
+        except BaseException:
+            self._reset_held()
+            raise
+        return self._conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        conn, self._conn = self._conn, None
+        self._reset_held()
+        await self._pool._pool.release(conn)
+
+    def _reset_held(self):
+        if self._token is not None:
+            _held_connections.reset(self._token)
+            self._token = None
+
+
+class InstrumentedPool:
+    """Thin wrapper over asyncpg.Pool that records acquire wait times and queue length.
+
+    Anything not defined here (fetch, execute, close, ...) is forwarded to the real pool.
+    """
+
+    def __init__(self, pool: asyncpg.Pool):
+        self._pool = pool
+        self.waiting = 0
+        self.acquired_total = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+        self.nested_acquires = 0
+
+    def acquire(self, *, timeout=None):
+        return _AcquireContext(self, timeout)
+
+    async def _acquire(self, timeout):
+        self.waiting += 1
+        started = time.perf_counter()
+        try:
+            conn = await self._pool.acquire(timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.acquired_total += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def _report_nested(self, held: int):
+        self.nested_acquires += 1
+        message = f"Task acquired a pool connection while already holding {held}"
+        if NESTED_ACQUIRE_MODE == "raise":
+            raise NestedAcquireError(message)
+        stack = "".join(traceback.format_stack(limit=8)[:-2])
+        logger.warning("%s:\n%s", message, stack)
+
+    def stats(self) -> dict:
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "size": size,
+            "min_size": self._pool.get_min_size(),
+            "max_size": self._pool.get_max_size(),
+            "in_use": size - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "acquired_total": self.acquired_total,
+            "timeouts": self.timeouts,
+            "nested_acquires": self.nested_acquires,
+            "wait_avg_ms": (self.wait_total / self.acquired_total * 1000) if self.acquired_total else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+    def __getattr__(self, name):
+        return getattr(self._pool, name)
+
+
+async def create_pool(dsn: str | None = None, **overrides) -> InstrumentedPool:
+    """Create the bot's single shared connection pool."""
+    settings = pool_settings()
+    settings.update(overrides)
+    pool = await asyncpg.create_pool(dsn=dsn or os.getenv("DB_URL"), **settings)
+    logger.info(
+        "Database pool created (min=%s, max=%s, command_timeout=%ss, statement_cache=%s)",
+        settings["min_size"], settings["max_size"],
+        settings["command_timeout"], settings["statement_cache_size"]
+    )
+    return InstrumentedPool(pool)
+
+
+@asynccontextmanager
+async def connection(db):
+    """Yield `db` itself when it is already a connection, otherwise acquire one from the pool."""
+    if hasattr(db, "acquire"):
+        async with db.acquire() as conn:
+            yield conn
+    else:
+        yield db
@@ -5,60 +5,59 @@ import discord
 from discord.ext import commands
 import json
 import os
-import aiohttp
+import asyncio
 import asyncpg
 
 from utils.economy import format_number
+from utils.votes import vote_cache
+from utils.family_graph import PendingFamilyChanges, family_graph, graph_for
+from utils.ledger import ledger
+from utils.database import connection
+from utils.cache import TTLCache
 from utils.datetime_helpers import utc_now, ensure_utc
 
 TOPGG_BOT_LINK = os.getenv("TOPGG_INVITE")
-TOPGG_API_TOKEN = os.getenv("TOPGG_TOKEN")
-TOPGG_BOT_ID = os.getenv("BOT_ID")
 logger = logging.getLogger(__name__)
 
 CHILDREN_MAX = 5
 PARTNERS_MAX = 2
 
+# users that are known to have both user_config and users rows in this process
+_known_users = TTLCache("known_users", maxsize=50_000, ttl=6 * 60 * 60)
+
 async def ensure_user(db, user_id: int):
+    if user_id in _known_users:
+        return
     logger.debug("ensure_user: user_id=%s", user_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
+        # rows created inside a caller's transaction may still be rolled back
+        memoize = not conn.is_in_transaction()
         try:
-            await conn.execute("""
-                INSERT INTO user_config (user_id)
-                VALUES ($1)
-                ON CONFLICT (user_id) DO NOTHING
-            """, user_id)
-            row = await conn.fetchrow("SELECT id FROM users WHERE id = $1", user_id)
-            if not row:
-                await conn.execute("""
+            created = await conn.fetchval("""
+                WITH cfg AS (
+                    INSERT INTO user_config (user_id)
+                    VALUES ($1)
+                    ON CONFLICT (user_id) DO NOTHING
+                ), new_user AS (
                     INSERT INTO users (id, coins, energy, energy_max, mood, mood_max)
-                    VALUES ($1, 0, 100, 100, 100, 100)
-                """, user_id)
+                    SELECT $1, 0, 100, 100, 100, 100
+                    WHERE NOT EXISTS (SELECT 1 FROM users WHERE id = $1)
+                    RETURNING id
+                )
+                SELECT COUNT(*) FROM new_user
+            """, user_id)
+            if created:
                 logger.info("ensure_user: created users row for %s", user_id)
         except Exception as e:
             logger.exception("ensure_user failed for %s", user_id)
             raise
-
-async def ensure_inventory(db, user_id: int):
-    logger.debug("ensure_inventory: user_id=%s", user_id)
-   
-    async with db.acquire() as conn:
-        try:
-            await conn.execute("""
-            INSERT INTO inventory (id, item_id, quantity)
-            SELECT $1, items.id, 0
-            FROM items
-            ON CONFLICT (id, item_id) DO NOTHING
-        """, user_id)
-            logger.info("ensure_inventory: ensured inventory for %s", user_id)
-        except Exception:
-            logger.exception("ensure_inventory failed for %s", user_id)
-            raise
+    if memoize:
+        _known_users.set(user_id, True)
 
 async def is_item_req_valid(db, user_id: int, item_id: int, amount: int = 1):
     try:
 
-        async with db.acquire() as conn:
+        async with connection(db) as conn:
             row = await conn.fetchrow("""
                 SELECT 1 FROM inventory
                 WHERE id = $1 AND item_id = $2 AND quantity >= $3
@@ -68,48 +67,48 @@ async def is_item_req_valid(db, user_id: int, item_id: int, amount: int = 1):
         logging.exception(e)
 
 async def add_item(db, user_id: int, item_id: int, amount: int = 1):
-    
+    # inventory rows are created lazily here instead of being pre-filled per item
     logger.debug("add_item: user_id=%s item_id=%s amount=%s", user_id, item_id, amount)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         try:
             await conn.execute("""
-                UPDATE inventory SET quantity = quantity + $3
-                WHERE id = $1 AND item_id = $2
+                INSERT INTO inventory (id, item_id, quantity)
+                VALUES ($1, $2, $3)
+                ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + $3
             """, user_id, item_id, amount)
             logger.info("add_item: updated inventory for %s item %s by %s", user_id, item_id, amount)
         except Exception:
             logger.exception("add_item failed for user=%s item=%s", user_id, item_id)
             raise
 
+async def add_items(db, user_id: int, items: dict[int, int]):
+    """Add several items to one inventory with a single multi-row upsert.
+
+    `db` may be the pool or an already acquired connection.
+    """
+    items = {item_id: qty for item_id, qty in items.items() if qty}
+    if not items:
+        return
+    logger.debug("add_items: user_id=%s items=%s", user_id, items)
+    async with connection(db) as conn:
+        await conn.execute("""
+            INSERT INTO inventory (id, item_id, quantity)
+            SELECT $1, t.item_id, t.quantity
+            FROM unnest($2::int4[], $3::int4[]) AS t(item_id, quantity)
+            ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+        """, user_id, list(items), list(items.values()))
+
 async def ensure_guild(db, guild_id: int):
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         row = await conn.fetchrow("SELECT id FROM guilds WHERE id = $1", guild_id)
         if not row:
             await conn.execute("INSERT INTO guilds (id) VALUES ($1)", guild_id)
 
 async def check_has_user_upvoted(user_id):
-    try:
-        url = f"https://top.gg/api/bots/{TOPGG_BOT_ID}/check?userId={user_id}"
-        headers = {"Authorization": TOPGG_API_TOKEN}
-        
-        # Add timeout and better error handling
-        timeout = aiohttp.ClientTimeout(total=5)  # 5 second timeout
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status != 200: 
-                    logger.warning(f"TopGG API returned status {resp.status} for user {user_id}")
-                    return False
-                data = await resp.json()
-                return bool(data.get("voted", 0))
-    except asyncio.TimeoutError:
-        logger.warning(f"TopGG API timeout for user {user_id}")
-        return False
-    except Exception as e:
-        logger.warning(f"TopGG API error for user {user_id}: {e}")
-        return False
+    return await vote_cache.has_voted(user_id)
 
 async def get_active_effects(db, user_id: int):
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         now = utc_now()
         return await conn.fetch("""
             SELECT effect_type, value, expires_at
@@ -117,8 +116,8 @@ async def get_active_effects(db, user_id: int):
             WHERE user_id = $1 AND expires_at > $2
         """, user_id, now)
 
-async def ensure_guild_cfg(pool, guild_id: int):
-    async with pool.acquire() as conn:
+async def ensure_guild_cfg(db, guild_id: int):
+    async with connection(db) as conn:
         row = await conn.fetchrow("SELECT guild_id FROM guild_config WHERE guild_id = $1", guild_id)
         if row is None:
             await conn.execute("""
@@ -127,8 +126,12 @@ async def ensure_guild_cfg(pool, guild_id: int):
             """, guild_id)
 
 async def log_spending(db, amount: int):
+    if ledger.running:
+        # batched into the next ledger flush
+        ledger.record_spending(amount)
+        return
     now = utc_now()
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         await conn.execute("""
             INSERT INTO spending_hourly (day, hour, total_spent)
             VALUES ($1, $2, $3)
@@ -137,7 +140,7 @@ async def log_spending(db, amount: int):
         """, now.date(), now.hour, amount)
 
 async def ensure_mine(db, guild_id: int):
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         rows = await conn.fetch("SELECT item_id FROM global_mining_config")
         for row in rows:
             await conn.execute("""
@@ -152,100 +155,90 @@ async def get_bet_cap(user_id):
 def canonical_pair(a: int, b: int):
     return (a, b) if a < b else (b, a)
 
+async def get_family_graph(db):
+    """Return the in-memory family index, loading it from the DB on first use."""
+    await family_graph.ensure_loaded(db)
+    return family_graph
+
 async def get_parents(db, user_id: int):
     """Get all parents of a user (supports multiple parents)"""
-    logger.debug("get_parents: user_id=%s", user_id)
-    async with db.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT parent_id FROM parents WHERE child_id = $1",
-            user_id
-        )
-        parents = [r["parent_id"] for r in rows]
-        logger.debug("get_parents: user=%s parents=%s", user_id, parents)
-        return parents
+    graph = await get_family_graph(db)
+    parents = graph.parents(user_id)
+    logger.debug("get_parents: user=%s parents=%s", user_id, parents)
+    return parents
 
 async def get_parent(db, user_id: int):
     """Get first parent of a user (for backward compatibility)"""
     parents = await get_parents(db, user_id)
     return parents[0] if parents else None
 
-async def add_child(db, parent_id: int, child_id: int):
+async def add_child(db, parent_id: int, child_id: int, pending: PendingFamilyChanges | None = None):
+    """Inside a transaction pass `pending`; the family graph is then updated by pending.commit()."""
     logger.debug("add_child: parent=%s child=%s", parent_id, child_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
+        graph = graph_for(conn, pending)
         try:
             await conn.execute(
                 "INSERT INTO parents (child_id, parent_id) VALUES ($1, $2)",
                 child_id, parent_id
             )
+            graph.add_child(parent_id, child_id)
             logger.info("add_child: relationship added parent=%s -> child=%s", parent_id, child_id)
         except Exception:
             logger.exception("add_child failed parent=%s child=%s", parent_id, child_id)
             raise
 
-async def remove_child_relationship(db, child_id: int):
+async def remove_child_relationship(db, child_id: int, pending: PendingFamilyChanges | None = None):
     logger.debug("remove_child_relationship: child=%s", child_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
+        graph = graph_for(conn, pending)
         try:
             await conn.execute(
                 "DELETE FROM parents WHERE child_id = $1",
                 child_id
             )
+            graph.remove_parents(child_id)
             logger.info("remove_child_relationship: removed all parents for child=%s", child_id)
         except Exception:
             logger.exception("remove_child_relationship failed for child=%s", child_id)
             raise
 
-async def try_add_parent(db, child_id: int, parent_id: int):
+async def try_add_parent(db, child_id: int, parent_id: int, pending: PendingFamilyChanges | None = None):
     logger.debug("try_add_parent: child=%s parent=%s", child_id, parent_id)
     try:
-        await add_child(db, parent_id, child_id)
+        await add_child(db, parent_id, child_id, pending)
         return False, None
     except asyncpg.PostgresError as e:
         logger.warning("try_add_parent postgres error child=%s parent=%s err=%s", child_id, parent_id, e)
         return True, str(e)
 
 async def get_user_children(db, user_id: int):
-    logger.debug("get_user_children: user_id=%s", user_id)
-    async with db.acquire() as conn:
-        rows = await conn.fetch(
-            "SELECT child_id FROM parents WHERE parent_id = $1",
-            user_id
-        )
-        children = [r["child_id"] for r in rows]
-        logger.debug("get_user_children: user=%s children=%s", user_id, children)
-        return children
+    graph = await get_family_graph(db)
+    children = graph.children(user_id)
+    logger.debug("get_user_children: user=%s children=%s", user_id, children)
+    return children
 
 async def get_user_partners(db, user_id: int):
-    logger.debug("get_user_partners: user_id=%s", user_id)
-    async with db.acquire() as conn:
-        rows = await conn.fetch(
-            """
-            SELECT spouse_a, spouse_b
-            FROM marriages
-            WHERE spouse_a = $1 OR spouse_b = $1
-            """,
-            user_id
-        )
-
-    partners = []
-    for a, b in rows:
-        partners.append(b if a == user_id else a)
+    graph = await get_family_graph(db)
+    partners = graph.partners(user_id)
     logger.debug("get_user_partners: user=%s partners=%s", user_id, partners)
     return partners
 
 async def get_marriage_date(db, user1_id: int, user2_id: int):
     a, b = canonical_pair(user1_id, user2_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         row = await conn.fetchrow(
             "SELECT created_at FROM marriages WHERE spouse_a = $1 AND spouse_b = $2",
             a, b
         )
         return row["created_at"] if row else None
 
-async def add_partner(db, user_id: int, partner_id: int, marriage_date=None):
+async def add_partner(db, user_id: int, partner_id: int, marriage_date=None,
+                      pending: PendingFamilyChanges | None = None):
     logger.debug("add_partner: user=%s partner=%s marriage_date=%s", user_id, partner_id, marriage_date)
     a, b = canonical_pair(user_id, partner_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
+        graph = graph_for(conn, pending)
         try:
             if marriage_date:
                 await conn.execute(
@@ -263,30 +256,33 @@ async def add_partner(db, user_id: int, partner_id: int, marriage_date=None):
                     """,
                     a, b
                 )
+            graph.add_partner(a, b)
             logger.info("add_partner: added marriage %s-%s", a, b)
         except Exception:
             logger.exception("add_partner failed for %s-%s", a, b)
             raise
 
-async def remove_partner(db, user_id: int, partner_id: int):
+async def remove_partner(db, user_id: int, partner_id: int, pending: PendingFamilyChanges | None = None):
     logger.debug("remove_partner: user=%s partner=%s", user_id, partner_id)
     a, b = canonical_pair(user_id, partner_id)
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
+        graph = graph_for(conn, pending)
         try:
             res = await conn.execute(
                 "DELETE FROM marriages WHERE spouse_a = $1 AND spouse_b = $2",
                 a, b
             )
+            graph.remove_partner(a, b)
             logger.info("remove_partner: removed marriage %s-%s result=%s", a, b, res)
             return res != "DELETE 0"
         except Exception:
             logger.exception("remove_partner failed for %s-%s", a, b)
             raise
 
-async def try_add_partner(db, user_id: int, partner_id: int):
+async def try_add_partner(db, user_id: int, partner_id: int, pending: PendingFamilyChanges | None = None):
     logger.debug("try_add_partner: user=%s partner=%s", user_id, partner_id)
     try:
-        await add_partner(db, user_id, partner_id)
+        await add_partner(db, user_id, partner_id, pending=pending)
         return False, None
     except asyncpg.PostgresError as e:
         logger.warning("try_add_partner postgres error user=%s partner=%s err=%s", user_id, partner_id, e)
@@ -294,7 +290,7 @@ async def try_add_partner(db, user_id: int, partner_id: int):
 
 async def get_relationship_data(db, user_id: int):
     """Get basic relationship data for a user"""
-    async with db.acquire() as conn:
+    async with connection(db) as conn:
         # This is a placeholder function that returns basic user data
         # The relationships.py code expects this but doesn't actually use the return value
         return {"user_id": user_id}
@@ -333,33 +329,14 @@ async def check_parent_conflicts(db, child_id: int, parent_id: int):
 
 async def can_adopt(db, parent_id: int, child_id: int):
     """
-    Check if parent_id can adopt child_id using recursive CTE.
+    Check if parent_id can adopt child_id.
     Ensures parent is not already a descendant of the child.
     """
     logger.debug("can_adopt: parent=%s child=%s", parent_id, child_id)
-    async with db.acquire() as conn:
-        try:
-            result = await conn.fetchval("""
-                WITH RECURSIVE descendants(id) AS (
-                    -- Direct children of the child
-                    SELECT child_id
-                    FROM parents
-                    WHERE parent_id = $1
-
-                    UNION
-
-                    -- Recursive descendants of the child
-                    SELECT p.child_id
-                    FROM parents p
-                    JOIN descendants d ON p.parent_id = d.id
-                )
-                SELECT EXISTS(SELECT 1 FROM descendants WHERE id = $2)
-            """, child_id, parent_id)
-            logger.debug("can_adopt: descendant_check result=%s", result)
-            return not result  # Return True if parent is NOT a descendant
-        except Exception:
-            logger.exception("can_adopt query failed parent=%s child=%s", parent_id, child_id)
-            raise
+    graph = await get_family_graph(db)
+    result = graph.is_descendant(parent_id, child_id)
+    logger.debug("can_adopt: descendant_check result=%s", result)
+    return not result  # Return True if parent is NOT a descendant
 
 async def is_too_closely_related(db, user_a: int, user_b: int, depth: int = 3):
     """
@@ -367,78 +344,14 @@ async def is_too_closely_related(db, user_a: int, user_b: int, depth: int = 3):
     Returns True if they share a common ancestor within the specified depth.
     """
     logger.debug("is_too_closely_related: a=%s b=%s depth=%s", user_a, user_b, depth)
-    async with db.acquire() as conn:
-        try:
-            result = await conn.fetchval("""
-                WITH RECURSIVE 
-                ancestors_a(ancestor_id, generation) AS (
-                    -- Direct parents of user_a
-                    SELECT parent_id, 1
-                    FROM parents
-                    WHERE child_id = $1
-
-                    UNION
-
-                    -- Recursive ancestors of user_a up to depth
-                    SELECT p.parent_id, a.generation + 1
-                    FROM parents p
-                    JOIN ancestors_a a ON p.child_id = a.ancestor_id
-                    WHERE a.generation < $3
-                ),
-                ancestors_b(ancestor_id, generation) AS (
-                    -- Direct parents of user_b
-                    SELECT parent_id, 1
-                    FROM parents
-                    WHERE child_id = $2
-
-                    UNION
-
-                    -- Recursive ancestors of user_b up to depth
-                    SELECT p.parent_id, b.generation + 1
-                    FROM parents p
-                    JOIN ancestors_b b ON p.child_id = b.ancestor_id
-                    WHERE b.generation < $3
-                )
-                SELECT EXISTS(
-                    SELECT 1 FROM ancestors_a a
-                    JOIN ancestors_b b ON a.ancestor_id = b.ancestor_id
-                )
-            """, user_a, user_b, depth)
-            logger.debug("is_too_closely_related: result=%s", result)
-            return result
-        except Exception:
-            logger.exception("is_too_closely_related query failed for %s vs %s", user_a, user_b)
-            raise
+    graph = await get_family_graph(db)
+    result = bool(graph.common_ancestors(user_a, user_b, depth))
+    logger.debug("is_too_closely_related: result=%s", result)
+    return result
 
 async def get_all_family_members(db, user_id: int, max_generations: int = 5):
     logger.debug("get_all_family_members: user_id=%s max_generations=%s", user_id, max_generations)
-    family = {}
-    visited = set()
-
-    async def walk(uid: int, gen: int):
-        if uid in visited or abs(gen) > max_generations:
-            return
-
-        visited.add(uid)
-
-        parents = await get_parents(db, uid)  # Support multiple parents
-        partners = await get_user_partners(db, uid)
-        children = await get_user_children(db, uid)
-
-        family[uid] = {
-            "id": uid,
-            "parents": parents,  # Changed from parent_id to parents (list)
-            "partners": partners,
-            "generation": gen
-        }
-
-        for p in partners:
-            await walk(p, gen)
-        for c in children:
-            await walk(c, gen + 1)
-        for parent in parents:  # Walk through all parents
-            await walk(parent, gen - 1)
-
-    await walk(user_id, 0)
-    logger.debug("get_all_family_members: visited_count=%s", len(visited))
-    return sorted(family.values(), key=lambda x: (x["generation"], x["id"]))
+    graph = await get_family_graph(db)
+    family = graph.family_tree(user_id, max_generations)
+    logger.debug("get_all_family_members: visited_count=%s", len(family))
+    return family
@@ -0,0 +1,124 @@
+import logging
+import time
+
+from utils.database import connection
+from utils.singleton import BASE_TICK
+
+logger = logging.getLogger(__name__)
+
+
+class ActiveEffects:
+    """In-memory index of current_effects keyed by (user_id, effect_id) -> expiry (epoch seconds).
+
+    Writers go through apply_effect/clear_effect below so the index follows the table
+    (only once their change has committed); EffectScheduler also resyncs it from the DB
+    periodically.
+    """
+
+    def __init__(self):
+        self._expires: dict[tuple[int, int], float] = {}
+        self.loaded = False
+
+    async def load(self, db):
+        async with connection(db) as conn:
+            rows = await conn.fetch("""
+                SELECT user_id, effect_id,
+                       EXTRACT(EPOCH FROM applied_at) + (duration * $1) - EXTRACT(EPOCH FROM clock_timestamp()) AS remaining
+                FROM current_effects
+            """, BASE_TICK)
+
+        now = time.time()
+        self._expires = {
+            (row["user_id"], row["effect_id"]): now + float(row["remaining"])
+            for row in rows
+            if row["remaining"] > 0
+        }
+        self.loaded = True
+        logger.debug(f"Active effects index loaded with {len(self._expires)} entries")
+
+    def add(self, user_id: int, effect_id: int, duration: int):
+        self._expires[(user_id, effect_id)] = time.time() + duration * BASE_TICK
+
+    def remove(self, user_id: int, effect_id: int):
+        self._expires.pop((user_id, effect_id), None)
+
+    def has(self, user_id: int, effect_id: int) -> bool:
+        key = (user_id, effect_id)
+        expires_at = self._expires.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._expires[key]
+            return False
+        return True
+
+    def __len__(self):
+        return len(self._expires)
+
+
+active_effects = ActiveEffects()
+
+
+class PendingEffects:
+    """Index changes from apply_effect/clear_effect calls made inside a transaction.
+
+    Pass one as `pending` while the transaction is open and call commit() after it has
+    committed; on rollback just drop it, so the index never shows an uncommitted effect.
+    """
+
+    def __init__(self):
+        self._changes: list[tuple[int, int, int | None]] = []
+
+    def add(self, user_id: int, effect_id: int, duration: int):
+        self._changes.append((user_id, effect_id, duration))
+
+    def remove(self, user_id: int, effect_id: int):
+        self._changes.append((user_id, effect_id, None))
+
+    def commit(self):
+        for user_id, effect_id, duration in self._changes:
+            if duration is None:
+                active_effects.remove(user_id, effect_id)
+            else:
+                active_effects.add(user_id, effect_id, duration)
+        self._changes.clear()
+
+
+def _index_for(conn, pending: PendingEffects | None):
+    if pending is not None:
+        return pending
+    if conn.is_in_transaction():
+        raise RuntimeError("effect changes inside a transaction must be collected with PendingEffects")
+    return active_effects
+
+
+async def apply_effect(db, user_id: int, effect_id: int, duration: int, pending: PendingEffects | None = None):
+    """Insert or refresh an effect for `duration` ticks and record it in the index.
+
+    Inside a transaction pass `pending`; the index is then updated by pending.commit().
+    """
+    async with connection(db) as conn:
+        index = _index_for(conn, pending)
+        await conn.execute("""
+            INSERT INTO current_effects (user_id, effect_id, duration, ticks, applied_at)
+            VALUES ($1, $2, $3, $3, NOW())
+            ON CONFLICT (user_id, effect_id) DO UPDATE
+            SET duration = $3, ticks = $3, applied_at = NOW()
+        """, user_id, effect_id, duration)
+    index.add(user_id, effect_id, duration)
+
+
+async def clear_effect(db, user_id: int, effect_id: int, pending: PendingEffects | None = None) -> bool:
+    """Remove an effect; returns True when a row was actually deleted. See apply_effect for `pending`."""
+    async with connection(db) as conn:
+        index = _index_for(conn, pending)
+        result = await conn.execute(
+            "DELETE FROM current_effects WHERE user_id = $1 AND effect_id = $2",
+            user_id, effect_id
+        )
+    index.remove(user_id, effect_id)
+    return result != "DELETE 0"
+
+
+def has_effect(user_id: int, effect_id: int) -> bool:
+    return active_effects.has(user_id, effect_id)
@@ -0,0 +1,211 @@
+import asyncio
+import logging
+from collections import defaultdict, deque
+
+from utils.database import connection
+
+logger = logging.getLogger(__name__)
+
+
+class FamilyGraph:
+    """In-memory adjacency index of the parents and marriages tables.
+
+    The database stays the source of truth: the helpers in utils.db_helpers write
+    there first and only mirror successful writes into this index. Writes mirrored
+    while load() is reading the tables are queued and replayed on top of what it read.
+    """
+
+    def __init__(self):
+        self._parents: dict[int, set[int]] = defaultdict(set)
+        self._children: dict[int, set[int]] = defaultdict(set)
+        self._partners: dict[int, set[int]] = defaultdict(set)
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        # mutations seen while load() is in progress, None when no load is running
+        self._pending: list[tuple] | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    async def ensure_loaded(self, db):
+        if self._loaded:
+            return
+        async with self._lock:
+            if not self._loaded:
+                await self.load(db)
+
+    async def load(self, db):
+        self._pending = []
+        try:
+            async with connection(db) as conn:
+                parent_rows = await conn.fetch("SELECT child_id, parent_id FROM parents")
+                marriage_rows = await conn.fetch("SELECT spouse_a, spouse_b FROM marriages")
+
+            self._parents.clear()
+            self._children.clear()
+            self._partners.clear()
+            for row in parent_rows:
+                self._link_child(row["parent_id"], row["child_id"])
+            for row in marriage_rows:
+                self._link_partners(row["spouse_a"], row["spouse_b"])
+            # every mutation is idempotent, so replaying one the rows already include is harmless
+            for mutate, args in self._pending:
+                mutate(*args)
+            self._loaded = True
+        finally:
+            self._pending = None
+        logger.info(f"Family graph loaded: {len(parent_rows)} parent links, {len(marriage_rows)} marriages")
+
+    def _link_child(self, parent_id: int, child_id: int):
+        self._parents[child_id].add(parent_id)
+        self._children[parent_id].add(child_id)
+
+    def _link_partners(self, a: int, b: int):
+        self._partners[a].add(b)
+        self._partners[b].add(a)
+
+    @staticmethod
+    def _discard(index: dict, key: int, value: int):
+        values = index.get(key)
+        if values is None:
+            return
+        values.discard(value)
+        if not values:
+            del index[key]
+
+    # ---- mutations, mirrored from successful DB writes ----
+
+    def _mirror(self, mutate, *args):
+        if self._pending is not None:
+            self._pending.append((mutate, args))
+        elif self._loaded:
+            mutate(*args)
+        # not loaded and not loading: the next load() reads the write from the DB
+
+    def _unlink_parents(self, child_id: int):
+        for parent_id in self._parents.pop(child_id, set()):
+            self._discard(self._children, parent_id, child_id)
+
+    def _unlink_partners(self, a: int, b: int):
+        self._discard(self._partners, a, b)
+        self._discard(self._partners, b, a)
+
+    def add_child(self, parent_id: int, child_id: int):
+        self._mirror(self._link_child, parent_id, child_id)
+
+    def remove_parents(self, child_id: int):
+        self._mirror(self._unlink_parents, child_id)
+
+    def add_partner(self, a: int, b: int):
+        self._mirror(self._link_partners, a, b)
+
+    def remove_partner(self, a: int, b: int):
+        self._mirror(self._unlink_partners, a, b)
+
+    # ---- queries ----
+
+    def parents(self, user_id: int) -> list[int]:
+        return sorted(self._parents.get(user_id, ()))
+
+    def children(self, user_id: int) -> list[int]:
+        return sorted(self._children.get(user_id, ()))
+
+    def partners(self, user_id: int) -> list[int]:
+        return sorted(self._partners.get(user_id, ()))
+
+    def _walk(self, index: dict, user_id: int, depth: int | None) -> dict[int, int]:
+        found: dict[int, int] = {}
+        queue = deque([(user_id, 0)])
+        while queue:
+            uid, gen = queue.popleft()
+            if depth is not None and gen >= depth:
+                continue
+            for nxt in index.get(uid, ()):
+                if nxt not in found and nxt != user_id:
+                    found[nxt] = gen + 1
+                    queue.append((nxt, gen + 1))
+        return found
+
+    def ancestors(self, user_id: int, depth: int | None = None) -> dict[int, int]:
+        """Map of ancestor id -> generations up (1 = parent)."""
+        return self._walk(self._parents, user_id, depth)
+
+    def descendants(self, user_id: int, depth: int | None = None) -> dict[int, int]:
+        """Map of descendant id -> generations down (1 = child)."""
+        return self._walk(self._children, user_id, depth)
+
+    def is_ancestor(self, ancestor_id: int, user_id: int) -> bool:
+        return ancestor_id in self.ancestors(user_id)
+
+    def is_descendant(self, descendant_id: int, user_id: int) -> bool:
+        return descendant_id in self.descendants(user_id)
+
+    def common_ancestors(self, user_a: int, user_b: int, depth: int | None = None) -> set[int]:
+        return self.ancestors(user_a, depth).keys() & self.ancestors(user_b, depth).keys()
+
+    def family_tree(self, user_id: int, max_generations: int = 5) -> list[dict]:
+        """Connected family around user_id, same shape as get_all_family_members."""
+        family = {}
+        stack = [(user_id, 0)]
+        while stack:
+            uid, gen = stack.pop()
+            if uid in family or abs(gen) > max_generations:
+                continue
+
+            parents = self.parents(uid)
+            partners = self.partners(uid)
+            children = self.children(uid)
+            family[uid] = {
+                "id": uid,
+                "parents": parents,
+                "partners": partners,
+                "generation": gen
+            }
+
+            # pushed in reverse so partners are visited first, then children, then parents
+            stack.extend((p, gen - 1) for p in reversed(parents))
+            stack.extend((c, gen + 1) for c in reversed(children))
+            stack.extend((p, gen) for p in reversed(partners))
+
+        return sorted(family.values(), key=lambda x: (x["generation"], x["id"]))
+
+
+family_graph = FamilyGraph()
+
+
+class PendingFamilyChanges:
+    """Family graph mutations from writes made inside a transaction.
+
+    Pass one as `pending` to the db_helpers writers while the transaction is open and
+    call commit() after it has committed; on rollback just drop it.
+    """
+
+    def __init__(self):
+        self._changes: list[tuple[str, tuple]] = []
+
+    def add_child(self, parent_id: int, child_id: int):
+        self._changes.append(("add_child", (parent_id, child_id)))
+
+    def remove_parents(self, child_id: int):
+        self._changes.append(("remove_parents", (child_id,)))
+
+    def add_partner(self, a: int, b: int):
+        self._changes.append(("add_partner", (a, b)))
+
+    def remove_partner(self, a: int, b: int):
+        self._changes.append(("remove_partner", (a, b)))
+
+    def commit(self):
+        for name, args in self._changes:
+            getattr(family_graph, name)(*args)
+        self._changes.clear()
+
+
+def graph_for(conn, pending: PendingFamilyChanges | None = None):
+    """Where a write on `conn` should mirror its change: the graph itself, or `pending`."""
+    if pending is not None:
+        return pending
+    if conn.is_in_transaction():
+        raise RuntimeError("family changes inside a transaction must be collected with PendingFamilyChanges")
+    return family_graph
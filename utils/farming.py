@@ -0,0 +1,112 @@
+import logging
+import os
+import random
+
+from utils.catalog import catalog
+from utils.database import connection
+from utils.db_helpers import add_items
+
+logger = logging.getLogger(__name__)
+
+HARVEST_BATCH_SIZE = int(os.getenv("FARM_HARVEST_BATCH_SIZE", "500"))
+
+
+def roll_rewards(farm_ids) -> dict[int, int]:
+    """Roll the output of each finished farm; each reward yields between half and all of output_amount."""
+    totals: dict[int, int] = {}
+    for farm_id in farm_ids:
+        for reward in catalog.farm_rewards(farm_id):
+            amount = random.randint(max(1, reward["output_amount"] // 2), reward["output_amount"])
+            totals[reward["output_id"]] = totals.get(reward["output_id"], 0) + amount
+    return totals
+
+
+def format_rewards(totals: dict[int, int]) -> list[str]:
+    labels = {item_id: catalog.item_label(item_id) for item_id in totals}
+    return [f"{totals[item_id]} x {labels[item_id]}" for item_id in sorted(totals, key=lambda k: labels[k])]
+
+
+async def harvest_user(db, user_id: int) -> dict[int, int]:
+    """Remove a user's finished farms and credit their rewards in one transaction.
+
+    Returns item_id -> quantity collected (empty when nothing was ready).
+    """
+    async with connection(db) as conn:
+        async with conn.transaction():
+            rows = await conn.fetch("""
+                DELETE FROM farm_sessions
+                WHERE user_id = $1 AND finished_at <= NOW()
+                RETURNING farm_id
+            """, user_id)
+            if not rows:
+                return {}
+            totals = roll_rewards(row["farm_id"] for row in rows)
+            await add_items(conn, user_id, totals)
+
+    logger.debug(f"Harvested {len(rows)} farms for {user_id}: {totals}")
+    return totals
+
+
+async def harvest_due(db, limit: int = HARVEST_BATCH_SIZE) -> tuple[int, int]:
+    """Harvest up to `limit` finished sessions across all users in one transaction.
+
+    Due sessions are found through idx_farm_sessions_finished_at and claimed with
+    SKIP LOCKED, so an interactive harvest running at the same time is never blocked.
+    Rewards are credited with one inventory upsert and added to farm_harvests, which
+    the owner sees on their next `.farm`. Returns (sessions harvested, users credited).
+    """
+    async with connection(db) as conn:
+        async with conn.transaction():
+            rows = await conn.fetch("""
+                WITH due AS (
+                    SELECT session_id FROM farm_sessions
+                    WHERE finished_at <= NOW()
+                    ORDER BY finished_at
+                    LIMIT $1
+                    FOR UPDATE SKIP LOCKED
+                )
+                DELETE FROM farm_sessions f
+                USING due
+                WHERE f.session_id = due.session_id
+                RETURNING f.user_id, f.farm_id
+            """, limit)
+            if not rows:
+                return 0, 0
+
+            farms_by_user: dict[int, list[int]] = {}
+            for row in rows:
+                farms_by_user.setdefault(row["user_id"], []).append(row["farm_id"])
+
+            user_ids, item_ids, quantities = [], [], []
+            for user_id, farm_ids in farms_by_user.items():
+                for item_id, qty in roll_rewards(farm_ids).items():
+                    user_ids.append(user_id)
+                    item_ids.append(item_id)
+                    quantities.append(qty)
+
+            if user_ids:
+                await conn.execute("""
+                    INSERT INTO inventory (id, item_id, quantity)
+                    SELECT t.user_id, t.item_id, t.quantity
+                    FROM unnest($1::int8[], $2::int4[], $3::int4[]) AS t(user_id, item_id, quantity)
+                    ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+                """, user_ids, item_ids, quantities)
+                await conn.execute("""
+                    INSERT INTO farm_harvests (user_id, item_id, quantity, harvested_at)
+                    SELECT t.user_id, t.item_id, t.quantity, NOW()
+                    FROM unnest($1::int8[], $2::int4[], $3::int4[]) AS t(user_id, item_id, quantity)
+                    ON CONFLICT (user_id, item_id) DO UPDATE
+                    SET quantity = farm_harvests.quantity + EXCLUDED.quantity,
+                        harvested_at = EXCLUDED.harvested_at
+                """, user_ids, item_ids, quantities)
+
+    return len(rows), len(farms_by_user)
+
+
+async def pop_harvest_summary(db, user_id: int) -> dict[int, int]:
+    """Rewards the background harvester credited to a user since they last looked."""
+    async with connection(db) as conn:
+        rows = await conn.fetch(
+            "DELETE FROM farm_harvests WHERE user_id = $1 RETURNING item_id, quantity", user_id
+        )
+    return {row["item_id"]: row["quantity"] for row in rows}
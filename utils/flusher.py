@@ -0,0 +1,51 @@
+import asyncio
+import contextlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicFlusher:
+    """Calls an async `callback` every `interval` seconds from a background task.
+
+    Every call, periodic or through run(), holds the same lock, so stop() waits for an
+    in-flight write to finish before cancelling the task and running a final flush;
+    a write is never cancelled halfway through.
+    """
+
+    def __init__(self, callback, interval: float, name: str):
+        self.callback = callback
+        self.interval = interval
+        self.name = name
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if not self.running:
+            self._task = asyncio.create_task(self._loop(), name=self.name)
+
+    async def _loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.run()
+            except Exception:
+                logger.exception(f"{self.name} flush failed")
+
+    async def run(self, *args):
+        async with self._lock:
+            await self.callback(*args)
+
+    async def stop(self, *args):
+        task, self._task = self._task, None
+        if task is not None:
+            # the task is now either sleeping or waiting for the lock, never mid-write
+            async with self._lock:
+                task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        await self.run(*args)
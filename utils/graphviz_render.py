@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+
+import aiohttp
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DOT_BINARY = os.getenv("GRAPHVIZ_DOT", "dot")
+MAX_WORKERS = int(os.getenv("GRAPHVIZ_WORKERS", "2"))
+RENDER_TIMEOUT_SECONDS = 20
+MAX_CACHED_IMAGES = 128
+KROKI_URL = "https://kroki.io/graphviz/png"
+
+
+class RenderError(Exception):
+    pass
+
+
+class GraphvizRenderer:
+    """Renders DOT source to PNG with local `dot` processes.
+
+    At most MAX_WORKERS renders run at once. Results are cached by the SHA-256 of the
+    DOT source, so an unchanged graph is served without spawning anything.
+    When Graphviz is not installed it falls back to kroki.io.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache("family_tree_png", maxsize=MAX_CACHED_IMAGES)
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._slots = asyncio.Semaphore(MAX_WORKERS)
+        self._dot_path = shutil.which(DOT_BINARY)
+        if not self._dot_path:
+            logger.warning(f"Graphviz '{DOT_BINARY}' not found, family trees will be rendered by kroki.io")
+
+    @staticmethod
+    def key(dot_src: str) -> str:
+        return hashlib.sha256(dot_src.encode("utf-8")).hexdigest()
+
+    async def render_png(self, dot_src: str) -> bytes:
+        key = self.key(dot_src)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(dot_src))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        img = await asyncio.shield(task)
+
+        self._cache.set(key, img)
+        return img
+
+    async def _render(self, dot_src: str) -> bytes:
+        if not self._dot_path:
+            return await self._render_remote(dot_src)
+
+        async with self._slots:
+            proc = await asyncio.create_subprocess_exec(
+                self._dot_path, "-Tpng",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+            try:
+                out, err = await asyncio.wait_for(
+                    proc.communicate(dot_src.encode("utf-8")), RENDER_TIMEOUT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                proc.kill()
+                await proc.wait()
+                raise RenderError("Graphviz render timed out")
+
+        if proc.returncode != 0:
+            raise RenderError(f"Graphviz exited with {proc.returncode}: {err.decode(errors='replace')[:200]}")
+        return out
+
+    async def _render_remote(self, dot_src: str) -> bytes:
+        async with aiohttp.ClientSession() as session:
+            async with session.post(
+                KROKI_URL,
+                data=dot_src,
+                headers={"Content-Type": "text/plain"},
+            ) as r:
+                if r.status != 200:
+                    raise RenderError(f"kroki.io returned status {r.status}")
+                return await r.read()
+
+
+renderer = GraphvizRenderer()
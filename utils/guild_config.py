@@ -0,0 +1,33 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREFIX = "."
+
+
+class GuildConfigCache:
+    """In-memory copy of guild_config prefixes so prefix lookups never hit the DB."""
+
+    def __init__(self):
+        self._prefixes: dict[int, str] = {}
+
+    async def load(self, pool):
+        async with pool.acquire() as conn:
+            rows = await conn.fetch("SELECT guild_id, prefix FROM guild_config")
+        self._prefixes = {row["guild_id"]: row["prefix"] or DEFAULT_PREFIX for row in rows}
+        logger.info(f"Loaded {len(self._prefixes)} guild prefixes into cache.")
+
+    def get_prefix(self, guild_id: int) -> str:
+        return self._prefixes.get(guild_id, DEFAULT_PREFIX)
+
+    def set_prefix(self, guild_id: int, prefix: str | None):
+        self._prefixes[guild_id] = prefix or DEFAULT_PREFIX
+
+    def add_guild(self, guild_id: int):
+        self._prefixes.setdefault(guild_id, DEFAULT_PREFIX)
+
+    def remove_guild(self, guild_id: int):
+        self._prefixes.pop(guild_id, None)
+
+    def __len__(self):
+        return len(self._prefixes)
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+REFRESH_SECONDS = 60
+
+
+class Ranking:
+    """Coin ranking sorted by coins descending; rank lookups are a bisect."""
+
+    def __init__(self, entries):
+        ordered = sorted(entries, key=lambda e: (-e[1], e[0]))
+        self._ids = [uid for uid, _ in ordered]
+        self._neg_coins = [-coins for _, coins in ordered]
+        self._members = set(self._ids)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, user_id):
+        return user_id in self._members
+
+    def top(self, n: int = 10) -> list[tuple[int, int]]:
+        return [(uid, -neg) for uid, neg in zip(self._ids[:n], self._neg_coins[:n])]
+
+    def rank_for(self, coins: int) -> int:
+        """1-based rank a balance of `coins` has (ties share the best rank)."""
+        return bisect_left(self._neg_coins, -coins) + 1
+
+    def percentile_for(self, coins: int) -> float:
+        if not self._ids:
+            return 0.0
+        return round(self.rank_for(coins) / len(self._ids) * 100, 1)
+
+
+class LeaderboardService:
+    """Snapshot of user balances, refreshed at most every REFRESH_SECONDS.
+
+    The global ranking is rebuilt with each snapshot; per-guild rankings are built
+    on first use after a refresh and reused until the next one.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self._coins: dict[int, int] = {}
+        self._global = Ranking([])
+        self._guilds: dict[int, Ranking] = {}
+        self._refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self):
+        async with self.db.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT u.id, COALESCE(u.coins, 0) AS coins, COALESCE(c.lb_opt_in, FALSE) AS opted_in
+                FROM users u
+                LEFT JOIN user_config c ON u.id = c.user_id
+            """)
+
+        self._coins = {row["id"]: row["coins"] for row in rows}
+        self._global = Ranking((row["id"], row["coins"]) for row in rows if row["opted_in"])
+        self._guilds = {}
+        self._refreshed_at = time.monotonic()
+        logger.debug(f"Leaderboard snapshot refreshed: {len(self._coins)} users, {len(self._global)} global")
+
+    async def _ensure_fresh(self):
+        if time.monotonic() - self._refreshed_at < REFRESH_SECONDS:
+            return
+        async with self._lock:
+            if time.monotonic() - self._refreshed_at >= REFRESH_SECONDS:
+                await self.refresh()
+
+    async def global_ranking(self) -> Ranking:
+        await self._ensure_fresh()
+        return self._global
+
+    async def guild_ranking(self, guild) -> Ranking:
+        await self._ensure_fresh()
+        ranking = self._guilds.get(guild.id)
+        if ranking is None:
+            ranking = Ranking(
+                (m.id, self._coins[m.id])
+                for m in guild.members
+                if not m.bot and m.id in self._coins
+            )
+            self._guilds[guild.id] = ranking
+        return ranking
+
+    def coins_of(self, user_id: int) -> int | None:
+        return self._coins.get(user_id)
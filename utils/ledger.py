@@ -0,0 +1,165 @@
+import logging
+import os
+from collections import defaultdict
+
+from utils.database import connection
+from utils.flusher import PeriodicFlusher
+from utils.datetime_helpers import utc_now
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = float(os.getenv("LEDGER_FLUSH_SECONDS", "5"))
+
+# energy/mood move towards their bound but never past it; a zero delta leaves the column alone
+_STAT_SET = """
+    coins = {t}coins + {coins},
+    energy = CASE
+        WHEN {energy} > 0 THEN LEAST({t}energy + {energy}, {t}energy_max)
+        WHEN {energy} < 0 THEN GREATEST({t}energy + {energy}, 0)
+        ELSE {t}energy
+    END,
+    mood = CASE
+        WHEN {mood} > 0 THEN LEAST({t}mood + {mood}, {t}mood_max)
+        WHEN {mood} < 0 THEN GREATEST({t}mood + {mood}, 0)
+        ELSE {t}mood
+    END
+"""
+
+APPLY_SQL = f"""
+    UPDATE users SET {_STAT_SET.format(t="", coins="$2::int8", energy="$3::int8", mood="$4::int8")}
+    WHERE id = $1
+      AND ($5::int8 IS NULL OR coins >= $5)
+      AND ($6::int8 IS NULL OR energy >= $6)
+    RETURNING coins, energy, energy_max, mood, mood_max
+"""
+
+APPLY_MANY_SQL = f"""
+    UPDATE users u SET {_STAT_SET.format(t="u.", coins="d.coins", energy="d.energy", mood="d.mood")}
+    FROM unnest($1::int8[], $2::int8[], $3::int8[], $4::int8[]) AS d(id, coins, energy, mood)
+    WHERE u.id = d.id
+"""
+
+# the debit only happens when the receiver exists, so a failed transfer changes nothing
+TRANSFER_SQL = """
+    WITH debit AS (
+        UPDATE users SET coins = coins - $3
+        WHERE id = $1 AND coins >= $3
+          AND EXISTS (SELECT 1 FROM users WHERE id = $2)
+        RETURNING id
+    )
+    UPDATE users SET coins = coins + $4
+    WHERE id = $2 AND EXISTS (SELECT 1 FROM debit)
+    RETURNING coins
+"""
+
+
+class EconomyLedger:
+    """Single place where coin/energy/mood changes are written to `users`.
+
+    `apply`/`apply_many`/`transfer` write immediately, each as one statement, so
+    balance checks and payouts stay atomic. `defer` buffers non-critical deltas
+    (mood swings and the like) per user and `record_spending` buffers the hourly
+    spending totals; both are written in one batch every FLUSH_SECONDS.
+    """
+
+    def __init__(self, flush_seconds: float = FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._pending: dict[int, list[int]] = defaultdict(lambda: [0, 0, 0])
+        self._spending: dict[tuple, int] = defaultdict(int)
+        self._db = None
+        self._flusher = PeriodicFlusher(self._flush, flush_seconds, "ledger")
+
+    async def apply(self, db, user_id: int, coins: int = 0, energy: int = 0, mood: int = 0,
+                    *, min_coins: int | None = None, min_energy: int | None = None):
+        """Apply deltas in one statement.
+
+        Returns the updated (coins, energy, energy_max, mood, mood_max) row, or None
+        when the user does not exist or a min_coins/min_energy guard failed.
+        """
+        async with connection(db) as conn:
+            return await conn.fetchrow(APPLY_SQL, user_id, coins, energy, mood, min_coins, min_energy)
+
+    async def apply_many(self, db, deltas: dict[int, tuple[int, int, int]]):
+        """Apply {user_id: (coins, energy, mood)} to several users in one statement."""
+        if not deltas:
+            return
+        ids = list(deltas)
+        async with connection(db) as conn:
+            await conn.execute(
+                APPLY_MANY_SQL,
+                ids,
+                [deltas[i][0] for i in ids],
+                [deltas[i][1] for i in ids],
+                [deltas[i][2] for i in ids],
+            )
+
+    async def transfer(self, db, from_id: int, to_id: int, amount: int, received: int | None = None) -> bool:
+        """Move coins between users atomically; the receiver gets `received` (defaults to amount).
+
+        Returns False without changing anything when the sender cannot cover `amount`,
+        the receiver does not exist or both are the same user.
+        """
+        if from_id == to_id:
+            return False
+        async with connection(db) as conn:
+            credited = await conn.fetchval(TRANSFER_SQL, from_id, to_id, amount, amount if received is None else received)
+        return credited is not None
+
+    def defer(self, user_id: int, coins: int = 0, energy: int = 0, mood: int = 0):
+        entry = self._pending[user_id]
+        entry[0] += coins
+        entry[1] += energy
+        entry[2] += mood
+
+    def record_spending(self, amount: int):
+        now = utc_now()
+        self._spending[(now.date(), now.hour)] += amount
+
+    async def flush(self, db=None):
+        await self._flusher.run(db)
+
+    async def _flush(self, db=None):
+        db = db or self._db
+        if db is None or (not self._pending and not self._spending):
+            return
+
+        pending, self._pending = self._pending, defaultdict(lambda: [0, 0, 0])
+        spending, self._spending = self._spending, defaultdict(int)
+        deltas = {uid: tuple(d) for uid, d in pending.items() if any(d)}
+
+        try:
+            async with connection(db) as conn:
+                async with conn.transaction():
+                    if deltas:
+                        await self.apply_many(conn, deltas)
+                    if spending:
+                        keys = list(spending)
+                        await conn.execute("""
+                            INSERT INTO spending_hourly (day, hour, total_spent)
+                            SELECT * FROM unnest($1::date[], $2::int4[], $3::int8[])
+                            ON CONFLICT (day, hour)
+                            DO UPDATE SET total_spent = spending_hourly.total_spent + EXCLUDED.total_spent
+                        """, [k[0] for k in keys], [k[1] for k in keys], [spending[k] for k in keys])
+        except Exception:
+            logger.exception("Ledger flush failed, re-queueing %s user deltas", len(deltas))
+            for uid, (c, e, m) in deltas.items():
+                self.defer(uid, c, e, m)
+            for key, amount in spending.items():
+                self._spending[key] += amount
+            return
+
+        logger.debug(f"Ledger flushed {len(deltas)} user deltas, {len(spending)} spending buckets")
+
+    @property
+    def running(self) -> bool:
+        return self._flusher.running
+
+    def start(self, db):
+        self._db = db
+        self._flusher.start()
+
+    async def stop(self):
+        await self._flusher.stop()
+
+
+ledger = EconomyLedger()
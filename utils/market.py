@@ -0,0 +1,261 @@
+import logging
+
+from utils.database import connection
+from utils.price_history import record_fills
+
+logger = logging.getLogger(__name__)
+
+# rows locked per round trip while walking a side of the book
+BOOK_CHUNK = 50
+
+
+class MarketError(Exception):
+    """A trade that cannot go through; the message is shown to the user."""
+
+
+async def _walk_asks(conn, item_id: int, buyer_id: int, quantity: int, max_price: int | None) -> list[tuple]:
+    """Lock the cheapest listings (price, then age) until `quantity` is covered.
+
+    Returns [(trade_id, seller_id, qty, price)].
+    """
+    fills = []
+    remaining = quantity
+    cursor = None
+    while remaining > 0:
+        rows = await conn.fetch("""
+            SELECT id, offerer_id, quantity, price, created_at
+            FROM trades
+            WHERE item_id = $1 AND offerer_id <> $2 AND quantity > 0
+              AND ($3::int8 IS NULL OR price <= $3)
+              AND ($4::int8 IS NULL OR (price, created_at, id) > ($4, $5, $6))
+            ORDER BY price, created_at, id
+            LIMIT $7
+            FOR UPDATE
+        """, item_id, buyer_id, max_price,
+            cursor[0] if cursor else None, cursor[1] if cursor else None, cursor[2] if cursor else None,
+            BOOK_CHUNK)
+        for row in rows:
+            qty = min(remaining, row["quantity"])
+            fills.append((row["id"], row["offerer_id"], qty, row["price"]))
+            remaining -= qty
+            if remaining == 0:
+                break
+        if len(rows) < BOOK_CHUNK:
+            break
+        last = rows[-1]
+        cursor = (last["price"], last["created_at"], last["id"])
+    return fills
+
+
+async def _walk_bids(conn, item_id: int, seller_id: int, quantity: int, min_price: int) -> list[tuple]:
+    """Lock the highest buy orders (price, then age) until `quantity` is covered.
+
+    Returns [(order_id, buyer_id, qty, price)].
+    """
+    fills = []
+    remaining = quantity
+    cursor = None
+    while remaining > 0:
+        rows = await conn.fetch("""
+            SELECT id, buyer_id, quantity, price, created_at
+            FROM buy_orders
+            WHERE item_id = $1 AND buyer_id <> $2 AND quantity > 0 AND price >= $3
+              AND ($4::int8 IS NULL OR (price < $4 OR (price = $4 AND (created_at, id) > ($5, $6))))
+            ORDER BY price DESC, created_at, id
+            LIMIT $7
+            FOR UPDATE
+        """, item_id, seller_id, min_price,
+            cursor[0] if cursor else None, cursor[1] if cursor else None, cursor[2] if cursor else None,
+            BOOK_CHUNK)
+        for row in rows:
+            qty = min(remaining, row["quantity"])
+            fills.append((row["id"], row["buyer_id"], qty, row["price"]))
+            remaining -= qty
+            if remaining == 0:
+                break
+        if len(rows) < BOOK_CHUNK:
+            break
+        last = rows[-1]
+        cursor = (last["price"], last["created_at"], last["id"])
+    return fills
+
+
+async def _consume(conn, table: str, filled: dict[int, int]):
+    """Reduce listings/orders by the filled quantity and drop the emptied ones."""
+    if not filled:
+        return
+    await conn.execute(f"""
+        UPDATE {table} o
+        SET quantity = o.quantity - f.qty
+        FROM unnest($1::int4[], $2::int8[]) AS f(id, qty)
+        WHERE o.id = f.id
+    """, list(filled), list(filled.values()))
+    await conn.execute(f"DELETE FROM {table} WHERE id = ANY($1::int4[]) AND quantity <= 0", list(filled))
+
+
+async def _credit_coins(conn, amounts: dict[int, int]):
+    amounts = {user_id: amount for user_id, amount in amounts.items() if amount}
+    if not amounts:
+        return
+    await conn.execute("""
+        UPDATE users u
+        SET coins = u.coins + t.amount
+        FROM unnest($1::int8[], $2::int8[]) AS t(id, amount)
+        WHERE u.id = t.id
+    """, list(amounts), list(amounts.values()))
+
+
+async def _credit_items(conn, item_id: int, quantities: dict[int, int]):
+    if not quantities:
+        return
+    await conn.execute("""
+        INSERT INTO inventory (id, item_id, quantity)
+        SELECT t.user_id, $1, t.quantity
+        FROM unnest($2::int8[], $3::int4[]) AS t(user_id, quantity)
+        ON CONFLICT (id, item_id) DO UPDATE SET quantity = inventory.quantity + EXCLUDED.quantity
+    """, item_id, list(quantities), list(quantities.values()))
+
+
+async def _debit_buyer(conn, buyer_id: int, amount: int):
+    coins = await conn.fetchval("SELECT coins FROM users WHERE id = $1 FOR UPDATE", buyer_id)
+    if coins is None:
+        raise MarketError("Buyer not found.")
+    if coins < amount:
+        raise MarketError(f"You don't have enough coins (need {amount}, have {coins}).")
+    await conn.execute("UPDATE users SET coins = coins - $1 WHERE id = $2", amount, buyer_id)
+
+
+async def _settle_asks(conn, item_id: int, buyer_id: int, fills: list[tuple]):
+    """Move coins and items for fills against sell listings; the buyer's coins are already taken."""
+    listings, proceeds = {}, {}
+    for trade_id, seller_id, qty, price in fills:
+        listings[trade_id] = listings.get(trade_id, 0) + qty
+        proceeds[seller_id] = proceeds.get(seller_id, 0) + qty * price
+    await _consume(conn, "trades", listings)
+    await _credit_coins(conn, proceeds)
+    await _credit_items(conn, item_id, {buyer_id: sum(f[2] for f in fills)})
+    await record_fills(conn, item_id, [(seller_id, buyer_id, qty, price) for _, seller_id, qty, price in fills])
+
+
+async def buy_from_book(db, buyer_id: int, item_id: int, quantity: int, max_price: int | None = None) -> dict:
+    """Buy `quantity` of an item at the best available prices, across as many listings as needed.
+
+    All-or-nothing: raises MarketError if the book (within `max_price`) cannot cover
+    the whole amount or the buyer cannot pay for it.
+    """
+    if quantity <= 0:
+        raise MarketError("Amount must be positive.")
+
+    async with connection(db) as conn:
+        async with conn.transaction():
+            fills = await _walk_asks(conn, item_id, buyer_id, quantity, max_price)
+            filled = sum(f[2] for f in fills)
+            if filled < quantity:
+                raise MarketError(f"Only {filled} available" + (f" at or below {max_price} each." if max_price else "."))
+
+            total_cost = sum(qty * price for _, _, qty, price in fills)
+            await _debit_buyer(conn, buyer_id, total_cost)
+            await _settle_asks(conn, item_id, buyer_id, fills)
+
+    logger.info(f"Market buy: {buyer_id} bought {quantity}x item {item_id} for {total_cost} over {len(fills)} listings")
+    return {"item_id": item_id, "amount": quantity, "total_cost": total_cost, "fills": fills}
+
+
+async def place_buy_order(db, buyer_id: int, item_id: int, quantity: int, price: int) -> dict:
+    """Fill what the book already offers at or below `price`, then rest the remainder as a buy order.
+
+    The coins for the resting part are held in escrow on the order (quantity * price)
+    and refunded by cancel_buy_order().
+    """
+    if quantity <= 0 or price <= 0:
+        raise MarketError("Quantity and price must be > 0.")
+
+    async with connection(db) as conn:
+        async with conn.transaction():
+            fills = await _walk_asks(conn, item_id, buyer_id, quantity, price)
+            filled = sum(f[2] for f in fills)
+            cost = sum(qty * fill_price for _, _, qty, fill_price in fills)
+            remaining = quantity - filled
+
+            await _debit_buyer(conn, buyer_id, cost + remaining * price)
+            await _settle_asks(conn, item_id, buyer_id, fills)
+
+            order_id = None
+            if remaining:
+                order_id = await conn.fetchval("""
+                    INSERT INTO buy_orders (buyer_id, item_id, quantity, price)
+                    VALUES ($1, $2, $3, $4)
+                    RETURNING id
+                """, buyer_id, item_id, remaining, price)
+
+    return {"item_id": item_id, "filled": filled, "cost": cost, "remaining": remaining, "order_id": order_id}
+
+
+async def match_listing(conn, trade_id: int) -> dict:
+    """Fill a new sell listing against resting buy orders at their prices.
+
+    Must run inside the transaction that created the listing.
+    """
+    listing = await conn.fetchrow(
+        "SELECT id, offerer_id, item_id, quantity, price FROM trades WHERE id = $1 FOR UPDATE", trade_id
+    )
+    if not listing:
+        return {"filled": 0, "proceeds": 0}
+
+    fills = await _walk_bids(conn, listing["item_id"], listing["offerer_id"], listing["quantity"], listing["price"])
+    if not fills:
+        return {"filled": 0, "proceeds": 0}
+
+    orders, received = {}, {}
+    for order_id, buyer_id, qty, _ in fills:
+        orders[order_id] = orders.get(order_id, 0) + qty
+        received[buyer_id] = received.get(buyer_id, 0) + qty
+    filled = sum(orders.values())
+    proceeds = sum(qty * price for _, _, qty, price in fills)
+
+    await _consume(conn, "buy_orders", orders)
+    await _consume(conn, "trades", {trade_id: filled})
+    await _credit_coins(conn, {listing["offerer_id"]: proceeds})
+    await _credit_items(conn, listing["item_id"], received)
+    await record_fills(
+        conn, listing["item_id"],
+        [(listing["offerer_id"], buyer_id, qty, price) for _, buyer_id, qty, price in fills]
+    )
+    return {"filled": filled, "proceeds": proceeds}
+
+
+async def cancel_buy_order(db, user_id: int, order_id: int) -> int:
+    """Remove a resting buy order and refund its escrow; returns the refunded coins."""
+    async with connection(db) as conn:
+        async with conn.transaction():
+            order = await conn.fetchrow(
+                "DELETE FROM buy_orders WHERE id = $1 AND buyer_id = $2 RETURNING quantity, price",
+                order_id, user_id
+            )
+            if not order:
+                raise MarketError("Buy order not found.")
+            refund = order["quantity"] * order["price"]
+            await _credit_coins(conn, {user_id: refund})
+    return refund
+
+
+async def order_book(db, item_id: int, depth: int = 10) -> tuple[list, list]:
+    """Best `depth` price levels on each side as (asks, bids) of (price, quantity, orders)."""
+    async with connection(db) as conn:
+        asks = await conn.fetch("""
+            SELECT price, SUM(quantity) AS quantity, COUNT(*) AS orders
+            FROM trades
+            WHERE item_id = $1 AND quantity > 0
+            GROUP BY price
+            ORDER BY price
+            LIMIT $2
+        """, item_id, depth)
+        bids = await conn.fetch("""
+            SELECT price, SUM(quantity) AS quantity, COUNT(*) AS orders
+            FROM buy_orders
+            WHERE item_id = $1 AND quantity > 0
+            GROUP BY price
+            ORDER BY price DESC
+            LIMIT $2
+        """, item_id, depth)
+    return asks, bids
@@ -0,0 +1,83 @@
+import logging
+import os
+
+from utils.cache import TTLCache
+from utils.database import connection
+from utils.flusher import PeriodicFlusher
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SECONDS = float(os.getenv("MINING_FLUSH_SECONDS", "10"))
+# depth is per user across servers; user_mining rows for it use this server_id
+GLOBAL_SERVER_ID = 0
+
+
+class MiningDepthStore:
+    """User mining depth backed by user_mining, with writes coalesced in memory.
+
+    set() only updates memory; the latest depth per user is upserted in one batch
+    every FLUSH_SECONDS, so repeated button presses cost one write per flush.
+    """
+
+    def __init__(self, flush_seconds: float = FLUSH_SECONDS):
+        self.flush_seconds = flush_seconds
+        self._depths = TTLCache("mining_depth", maxsize=50_000, ttl=6 * 60 * 60)
+        self._dirty: dict[int, int] = {}
+        self._db = None
+        self._flusher = PeriodicFlusher(self._flush, flush_seconds, "mining depth")
+
+    async def get(self, db, user_id: int) -> int:
+        if user_id in self._dirty:
+            return self._dirty[user_id]
+        depth = self._depths.get(user_id)
+        if depth is None:
+            async with connection(db) as conn:
+                depth = await conn.fetchval(
+                    "SELECT depth FROM user_mining WHERE server_id = $1 AND user_id = $2",
+                    GLOBAL_SERVER_ID, user_id
+                ) or 0
+            self._depths.set(user_id, depth)
+        return depth
+
+    def set(self, user_id: int, depth: int):
+        self._depths.set(user_id, depth)
+        self._dirty[user_id] = depth
+
+    async def flush(self, db=None):
+        await self._flusher.run(db)
+
+    async def _flush(self, db=None):
+        db = db or self._db
+        if db is None or not self._dirty:
+            return
+
+        dirty, self._dirty = self._dirty, {}
+        try:
+            async with connection(db) as conn:
+                await conn.execute("""
+                    INSERT INTO user_mining (server_id, user_id, depth)
+                    SELECT $1, t.user_id, t.depth
+                    FROM unnest($2::int8[], $3::int4[]) AS t(user_id, depth)
+                    ON CONFLICT (server_id, user_id) DO UPDATE SET depth = EXCLUDED.depth
+                """, GLOBAL_SERVER_ID, list(dirty), list(dirty.values()))
+        except Exception:
+            logger.exception("Mining depth flush failed, re-queueing %s users", len(dirty))
+            for user_id, depth in dirty.items():
+                self._dirty.setdefault(user_id, depth)
+            return
+
+        logger.debug(f"Mining depth flushed for {len(dirty)} users")
+
+    @property
+    def running(self) -> bool:
+        return self._flusher.running
+
+    def start(self, db):
+        self._db = db
+        self._flusher.start()
+
+    async def stop(self):
+        await self._flusher.stop()
+
+
+mining_depths = MiningDepthStore()
@@ -0,0 +1,75 @@
+import logging
+
+import discord
+
+from utils.cache import TTLCache
+from utils.database import connection
+
+logger = logging.getLogger(__name__)
+
+# totals shown in page footers; refreshed at most once a minute per query
+_row_counts = TTLCache("row_counts", maxsize=64, ttl=60)
+
+
+async def cached_count(db, query: str, *args) -> int:
+    """Run a COUNT query at most once per minute for the same query and arguments."""
+    key = (query, args)
+    total = _row_counts.get(key)
+    if total is None:
+        async with connection(db) as conn:
+            total = await conn.fetchval(query, *args) or 0
+        _row_counts.set(key, total)
+    return total
+
+
+class KeysetPageView(discord.ui.View):
+    """Previous/Next paging over a query ordered by a unique key (e.g. created_at, id).
+
+    `fetch(cursor, limit)` returns up to `limit` rows after `cursor` (None for the first
+    page) and `render(rows, page)` builds the embed. The cursor of every visited page
+    is kept, so moving in either direction is one indexed query regardless of depth.
+    """
+
+    def __init__(self, author_id: int, fetch, render, key, per_page: int, timeout: float = 600):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.fetch = fetch
+        self.render = render
+        self.key = key
+        self.per_page = per_page
+        self.page = 0
+        self.cursors = [None]
+        self.rows = []
+        self.has_next = False
+
+    async def load(self):
+        rows = await self.fetch(self.cursors[self.page], self.per_page + 1)
+        self.has_next = len(rows) > self.per_page
+        self.rows = rows[:self.per_page]
+        if self.has_next:
+            del self.cursors[self.page + 1:]
+            self.cursors.append(self.key(self.rows[-1]))
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = not self.has_next
+
+    def embed(self) -> discord.Embed:
+        return self.render(self.rows, self.page + 1)
+
+    async def _turn(self, interaction: discord.Interaction, step: int):
+        if interaction.user.id != self.author_id:
+            return await interaction.response.send_message("This is not your menu.", ephemeral=True)
+        self.page = max(0, self.page + step)
+        try:
+            await self.load()
+        except Exception:
+            logger.exception("Failed to load page %s", self.page + 1)
+            return await interaction.response.send_message("Failed to load that page.", ephemeral=True)
+        await interaction.response.edit_message(embed=self.embed(), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, -1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._turn(interaction, 1)
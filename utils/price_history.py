@@ -0,0 +1,96 @@
+import datetime
+import logging
+
+from utils.database import connection
+
+logger = logging.getLogger(__name__)
+
+HOUR = 3600
+DAY = 86400
+CANDLE_SIZES = (HOUR, DAY)
+# the first rollup after a restart re-covers this much history
+INITIAL_LOOKBACK = datetime.timedelta(days=2)
+# later runs also re-cover fills from transactions that committed just after the previous run
+COMMIT_MARGIN = datetime.timedelta(minutes=5)
+
+
+async def record_fills(conn, item_id: int, fills: list[tuple]):
+    """Append completed sales [(seller_id, buyer_id, quantity, price)] to trade_fills.
+
+    Call inside the transaction that moved the coins and items.
+    """
+    if not fills:
+        return
+    await conn.execute("""
+        INSERT INTO trade_fills (item_id, seller_id, buyer_id, quantity, price)
+        SELECT $1, t.seller_id, t.buyer_id, t.quantity, t.price
+        FROM unnest($2::int8[], $3::int8[], $4::int8[], $5::int8[]) AS t(seller_id, buyer_id, quantity, price)
+    """, item_id, [f[0] for f in fills], [f[1] for f in fills], [f[2] for f in fills], [f[3] for f in fills])
+
+
+class CandleRollup:
+    """Keeps price_candles (hourly and daily OHLC + volume per item) up to date from trade_fills.
+
+    Each run rebuilds every bucket that started at or after the previous run's start,
+    so it is idempotent and a bucket that is still open is simply rewritten next time.
+    """
+
+    def __init__(self):
+        self._since: datetime.datetime | None = None
+
+    async def run(self, db) -> int:
+        started = datetime.datetime.now(datetime.timezone.utc)
+        since = self._since or started - INITIAL_LOOKBACK
+        written = 0
+        async with connection(db) as conn:
+            async with conn.transaction():
+                for size in CANDLE_SIZES:
+                    status = await conn.execute("""
+                        INSERT INTO price_candles
+                            (item_id, bucket_seconds, bucket_start, open, high, low, close, volume, turnover, fills)
+                        SELECT f.item_id, $1::int4,
+                               to_timestamp(floor(extract(epoch FROM f.filled_at) / $1) * $1) AS bucket_start,
+                               (array_agg(f.price ORDER BY f.id))[1],
+                               MAX(f.price), MIN(f.price),
+                               (array_agg(f.price ORDER BY f.id DESC))[1],
+                               SUM(f.quantity), SUM(f.quantity * f.price), COUNT(*)
+                        FROM trade_fills f
+                        WHERE f.filled_at >= to_timestamp(floor(extract(epoch FROM $2::timestamptz) / $1) * $1)
+                        GROUP BY f.item_id, bucket_start
+                        ON CONFLICT (item_id, bucket_seconds, bucket_start) DO UPDATE
+                        SET open = EXCLUDED.open, high = EXCLUDED.high, low = EXCLUDED.low,
+                            close = EXCLUDED.close, volume = EXCLUDED.volume,
+                            turnover = EXCLUDED.turnover, fills = EXCLUDED.fills
+                    """, size, since)
+                    written += int(status.split()[-1])
+        self._since = started - COMMIT_MARGIN
+        return written
+
+
+candle_rollup = CandleRollup()
+
+
+async def item_vwaps(db, item_ids, hours: int = 24) -> dict[int, int]:
+    """Volume-weighted average sale price per item over the last `hours`, from the hourly candles."""
+    async with connection(db) as conn:
+        rows = await conn.fetch("""
+            SELECT item_id, SUM(turnover) / NULLIF(SUM(volume), 0) AS vwap
+            FROM price_candles
+            WHERE item_id = ANY($1::int4[]) AND bucket_seconds = $2
+              AND bucket_start >= NOW() - make_interval(hours => $3)
+            GROUP BY item_id
+        """, list(item_ids), HOUR, hours)
+    return {row["item_id"]: int(row["vwap"]) for row in rows if row["vwap"] is not None}
+
+
+async def candles(db, item_id: int, bucket_seconds: int, limit: int) -> list:
+    """The most recent `limit` candles for an item, oldest first."""
+    async with connection(db) as conn:
+        rows = await conn.fetch("""
+            SELECT bucket_start, open, high, low, close, volume, turnover, fills
+            FROM price_candles
+            WHERE item_id = $1 AND bucket_seconds = $2
+            ORDER BY bucket_start DESC
+            LIMIT $3
+        """, item_id, bucket_seconds, limit)
+    return list(reversed(rows))
@@ -0,0 +1,59 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class RenderCache:
+    """Pre-rendered pages for static paginated embeds.
+
+    Each entry is registered with a builder and an optional version function; pages
+    are rebuilt only when the version changes (e.g. catalog.version after a reload),
+    otherwise every call is served from memory. Entries without a version function
+    are built once and kept until invalidate(). Cached embeds are shared between
+    users, so callers must not mutate them.
+    """
+
+    def __init__(self):
+        self._builders: dict[str, tuple] = {}
+        self._pages: dict[str, tuple] = {}
+
+    def register(self, key: str, builder, version=None):
+        self._builders[key] = (builder, version)
+        self._pages.pop(key, None)
+
+    def _version(self, key: str):
+        version = self._builders[key][1]
+        return version() if version is not None else None
+
+    def pages(self, key: str) -> list:
+        current = self._version(key)
+        cached = self._pages.get(key)
+        if cached is not None and cached[0] == current:
+            return cached[1]
+
+        started = time.perf_counter()
+        pages = self._builders[key][0]()
+        self._pages[key] = (current, pages)
+        logger.info(
+            f"Rendered {len(pages)} '{key}' pages (version {current}) "
+            f"in {(time.perf_counter() - started) * 1000:.1f} ms"
+        )
+        return pages
+
+    def warm(self, *keys: str):
+        """Build the given entries (default: all) now if they are missing or stale."""
+        for key in keys or list(self._builders):
+            try:
+                self.pages(key)
+            except Exception:
+                logger.exception(f"Failed to render '{key}' pages")
+
+    def invalidate(self, key: str | None = None):
+        if key is None:
+            self._pages.clear()
+        else:
+            self._pages.pop(key, None)
+
+
+render_cache = RenderCache()
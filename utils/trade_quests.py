@@ -0,0 +1,76 @@
+import logging
+import random
+
+from utils.catalog import catalog
+from utils.database import connection
+from utils.price_history import item_vwaps
+
+logger = logging.getLogger(__name__)
+
+TRUST_WEIGHTS = [0.15, 0.15, 0.15, 0.15, 0.15, 0.10, 0.05, 0.03, 0.02]
+# used when an item has no sales in the last 24h
+DEFAULT_BASE_VALUES = {
+    3: 50, 10: 80, 15: 120, 18: 25, 19: 30, 26: 500
+}
+DEFAULT_BASE_VALUE = 100
+DAILY_QUEST_SECONDS = 7 * 24 * 60 * 60
+
+
+def daily_expiry(trust_level: int) -> int:
+    return DAILY_QUEST_SECONDS
+
+
+def short_expiry(trust_level: int) -> int:
+    """10 minutes, plus 2 more per trust level above 1."""
+    return (10 + (trust_level - 1) * 2) * 60
+
+
+async def base_values(db, item_ids) -> dict[int, int]:
+    """Quest base value per item: the 24h VWAP where there were sales, else the fixed default."""
+    item_ids = set(item_ids)
+    vwaps = await item_vwaps(db, item_ids)
+    return {
+        item_id: vwaps.get(item_id) or DEFAULT_BASE_VALUES.get(item_id, DEFAULT_BASE_VALUE)
+        for item_id in item_ids
+    }
+
+
+def roll_quests(picked: list[dict], values: dict[int, int], expiry) -> list[tuple]:
+    """Roll one quest per picked item as (trust_level, item_id, amount, payout, expires_in_seconds)."""
+    trust_levels = random.choices(range(1, 10), weights=TRUST_WEIGHTS, k=len(picked))
+    quests = []
+    for item, trust_level in zip(picked, trust_levels):
+        amount = random.randint(1, 5)
+        payout = int(values[item["id"]] * amount * (0.6 + trust_level * 0.04))
+        quests.append((trust_level, item["id"], amount, payout, expiry(trust_level)))
+    return quests
+
+
+async def generate_trade_quests(db, count: int, *, min_item_id: int = 1, expiry=daily_expiry,
+                                replace: bool = False) -> int:
+    """Generate `count` trade quests in one transaction and return how many were written.
+
+    Items are sampled from the catalog, base values come from one grouped query and all
+    quests are inserted with a single statement. With `replace`, existing quests are
+    removed in the same transaction.
+    """
+    items = [item for item in catalog.items() if item["id"] >= min_item_id]
+    if not items or count <= 0:
+        return 0
+
+    async with connection(db) as conn:
+        picked = random.choices(items, k=count)
+        values = await base_values(conn, (item["id"] for item in picked))
+        quests = roll_quests(picked, values, expiry)
+        async with conn.transaction():
+            if replace:
+                await conn.execute("DELETE FROM trade_quests")
+            await conn.execute("""
+                INSERT INTO trade_quests (trust_level, item_id, item_amount, payout, expires_at)
+                SELECT t.trust_level, t.item_id, t.amount, t.payout, NOW() + make_interval(secs => t.expires_in)
+                FROM unnest($1::int4[], $2::int4[], $3::int4[], $4::int8[], $5::int4[])
+                    AS t(trust_level, item_id, amount, payout, expires_in)
+            """, *(list(column) for column in zip(*quests)))
+
+    logger.info(f"Generated {len(quests)} trade quests" + (" (replaced existing)" if replace else ""))
+    return len(quests)
@@ -1,9 +1,11 @@
 from deep_translator import GoogleTranslator
 import logging
 import discord
+from utils.cache import TTLCache
 
 _bot_instance = None
-_translator_cache = {}
+# one translator per locale; bounded since locales come from user/guild settings
+_translator_cache = TTLCache("translators", maxsize=64)
 
 TRANSLATION_OVERRIDES = {
     "vi": {
@@ -28,13 +30,14 @@ def init_translation(bot):
     _bot_instance = bot
 
 def _get_translator(locale):
-    if locale not in _translator_cache:
-        # Skip creating translator for English since it's the source language
-        if locale == "en":
-            _translator_cache[locale] = None
-        else:
-            _translator_cache[locale] = GoogleTranslator(target=locale)
-    return _translator_cache[locale]
+    # Skip creating translator for English since it's the source language
+    if locale == "en":
+        return None
+    translator = _translator_cache.get(locale)
+    if translator is None:
+        translator = GoogleTranslator(target=locale)
+        _translator_cache.set(locale, translator)
+    return translator
 
 async def translate(text, user_or_ctx, guild_id=None):
     try:
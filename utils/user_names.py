@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+from utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+NAME_TTL_SECONDS = 60 * 60
+MAX_CACHED_NAMES = 20_000
+DEFAULT_FETCH_LIMIT = 10
+
+# user_id -> (display_name, username) for users that had to be fetched over REST
+_fetched_names = TTLCache("user_names", maxsize=MAX_CACHED_NAMES, ttl=NAME_TTL_SECONDS)
+
+
+async def resolve_user_labels(bot, user_ids, fetch_limit: int = DEFAULT_FETCH_LIMIT) -> dict[int, tuple[str, str] | None]:
+    """Resolve (display_name, username) pairs, from the gateway cache first.
+
+    At most `fetch_limit` unknown users are fetched over REST (concurrently);
+    users that could not be resolved map to None.
+    """
+    labels: dict[int, tuple[str, str] | None] = {}
+    missing = []
+    for uid in dict.fromkeys(user_ids):
+        user = bot.get_user(uid)
+        if user is not None:
+            labels[uid] = (user.display_name or user.name, user.name)
+            continue
+        cached = _fetched_names.get(uid)
+        if cached is not None:
+            labels[uid] = cached
+        else:
+            missing.append(uid)
+
+    async def fetch(uid):
+        try:
+            user = await bot.fetch_user(uid)
+            names = (user.display_name or user.name, user.name)
+            _fetched_names.set(uid, names)
+            return uid, names
+        except Exception as e:
+            logger.debug(f"Could not fetch user {uid}: {e}")
+            return uid, None
+
+    to_fetch = missing[:fetch_limit]
+    if to_fetch:
+        for uid, names in await asyncio.gather(*(fetch(uid) for uid in to_fetch)):
+            labels[uid] = names
+
+    for uid in missing:
+        labels.setdefault(uid, None)
+    return labels
+
+
+async def resolve_user_names(bot, user_ids, fetch_limit: int = DEFAULT_FETCH_LIMIT) -> dict[int, str]:
+    """Resolve usernames, falling back to "User <id>" for anyone unresolved."""
+    labels = await resolve_user_labels(bot, user_ids, fetch_limit)
+    return {uid: label[1] if label else f"User {uid}" for uid, label in labels.items()}
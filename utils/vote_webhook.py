@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import os
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, Request
+
+from utils.votes import VoteCache
+
+logger = logging.getLogger(__name__)
+
+
+def create_vote_app(cache: VoteCache, auth: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/topgg/webhook")
+    async def topgg_webhook(request: Request, authorization: str | None = Header(default=None)):
+        if authorization != auth:
+            raise HTTPException(status_code=401, detail="Unauthorized")
+
+        payload = await request.json()
+        try:
+            user_id = int(payload["user"])
+        except (KeyError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Missing user")
+
+        if payload.get("type") in ("upvote", "test"):
+            cache.mark_voted(user_id)
+            logger.info(f"Received top.gg vote for user {user_id}")
+        return {"ok": True}
+
+    return app
+
+
+def start_vote_webhook(cache: VoteCache) -> asyncio.Task | None:
+    """Serve the top.gg webhook in the bot's event loop when TOPGG_WEBHOOK_PORT is set."""
+    port = os.getenv("TOPGG_WEBHOOK_PORT")
+    auth = os.getenv("TOPGG_WEBHOOK_AUTH")
+    if not port:
+        return None
+    if not auth:
+        logger.warning("TOPGG_WEBHOOK_PORT is set but TOPGG_WEBHOOK_AUTH is missing, webhook disabled")
+        return None
+
+    config = uvicorn.Config(
+        create_vote_app(cache, auth),
+        host=os.getenv("TOPGG_WEBHOOK_HOST", "0.0.0.0"),
+        port=int(port),
+        log_level="warning",
+    )
+    server = uvicorn.Server(config)
+    logger.info(f"Starting top.gg vote webhook on port {port}")
+    return asyncio.create_task(server.serve())
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+
+import aiohttp
+from dotenv import load_dotenv
+
+from utils.cache import TTLCache
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+TOPGG_API_TOKEN = os.getenv("TOPGG_TOKEN")
+TOPGG_BOT_ID = os.getenv("BOT_ID")
+
+# top.gg reports a vote as active for 12 hours
+VOTE_WINDOW_SECONDS = 12 * 60 * 60
+POSITIVE_TTL_SECONDS = 30 * 60
+NEGATIVE_TTL_SECONDS = 5 * 60
+ERROR_TTL_SECONDS = 60
+REQUEST_TIMEOUT_SECONDS = 5
+MAX_ENTRIES = 50_000
+
+
+class VoteCache:
+    """Caches top.gg vote status per user and shares one HTTP session for lookups.
+
+    Concurrent lookups for the same user wait on a single request, and votes pushed
+    through the webhook are stored for the whole vote window.
+    """
+
+    def __init__(self):
+        self._entries = TTLCache("topgg_votes", maxsize=MAX_ENTRIES, ttl=NEGATIVE_TTL_SECONDS)
+        self._inflight: dict[int, asyncio.Task] = {}
+        self._session: aiohttp.ClientSession | None = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT_SECONDS)
+            )
+        return self._session
+
+    def _store(self, user_id: int, voted: bool, ttl: float):
+        self._entries.set(user_id, voted, ttl=ttl)
+
+    def get_cached(self, user_id: int) -> bool | None:
+        return self._entries.get(user_id)
+
+    def mark_voted(self, user_id: int, ttl: float = VOTE_WINDOW_SECONDS):
+        self._store(user_id, True, ttl)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    async def has_voted(self, user_id: int) -> bool:
+        cached = self.get_cached(user_id)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._fetch(user_id))
+            self._inflight[user_id] = task
+            task.add_done_callback(lambda _: self._inflight.pop(user_id, None))
+        return await asyncio.shield(task)
+
+    async def _fetch(self, user_id: int) -> bool:
+        url = f"https://top.gg/api/bots/{TOPGG_BOT_ID}/check?userId={user_id}"
+        headers = {"Authorization": TOPGG_API_TOKEN or ""}
+        try:
+            async with self._get_session().get(url, headers=headers) as resp:
+                if resp.status != 200:
+                    logger.warning(f"TopGG API returned status {resp.status} for user {user_id}")
+                    self._store(user_id, False, ERROR_TTL_SECONDS)
+                    return False
+                data = await resp.json()
+        except asyncio.TimeoutError:
+            logger.warning(f"TopGG API timeout for user {user_id}")
+            self._store(user_id, False, ERROR_TTL_SECONDS)
+            return False
+        except Exception as e:
+            logger.warning(f"TopGG API error for user {user_id}: {e}")
+            self._store(user_id, False, ERROR_TTL_SECONDS)
+            return False
+
+        voted = bool(data.get("voted", 0))
+        self._store(user_id, voted, POSITIVE_TTL_SECONDS if voted else NEGATIVE_TTL_SECONDS)
+        return voted
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+
+vote_cache = VoteCache()